@@ -0,0 +1,156 @@
+"""Benchmark cases for the hot paths of the integration.
+
+A case is a setup function that receives the event loop and returns the
+callable to time - sync or async. Setup cost is not measured.
+"""
+
+from __future__ import annotations
+import json
+
+from fakes import install
+
+install()
+
+from homeassistant.const import (  # noqa: E402
+    CONF_API_KEY,
+    CONF_DEVICES,
+    CONF_OPTIMISTIC,
+    CONF_PARAMS,
+    CONF_STATE,
+)
+from homeassistant.core import HomeAssistant  # noqa: E402
+
+from custom_components.goveelife.const import DOMAIN, CONF_TRANSPORT  # noqa: E402
+from custom_components.goveelife.state import GoveeAPIDeviceState  # noqa: E402
+from custom_components.goveelife.transport import GoveeAPITransportReplay  # noqa: E402
+from custom_components.goveelife.utils import (  # noqa: E402
+    GoveeAPI_BuildRequest,
+    GoveeAPI_CreatePlatformPlan,
+    GoveeAPI_GetCachedStateValue,
+    _async_GoveeAPI_FetchDeviceState,
+    async_GoveeAPI_ControlDevice,
+)
+from custom_components.goveelife.light import GoveeLifeLight  # noqa: E402
+from custom_components.goveelife.climate import GoveeLifeClimate  # noqa: E402
+from custom_components.goveelife.fan import GoveeLifeFan  # noqa: E402
+from custom_components.goveelife.humidifier import GoveeLifeHumidifier  # noqa: E402
+
+from payloads import HEATER, HUMIDIFIER, LIGHT, PURIFIER, fleet, state_payload  # noqa: E402
+
+ENTRY_ID = 'bench'
+FLEET_SIZE = 60
+
+CASES = {}
+
+
+def case(name: str):
+    """Register a benchmark case."""
+    def register(setup):
+        CASES[name] = setup
+        return setup
+    return register
+
+
+def _hass(loop, devices) -> HomeAssistant:
+    """Return a hass object with an entry whose state cache holds all devices - requests are served by a replay transport."""
+    hass = HomeAssistant()
+    hass.loop = loop
+    records = [
+        {"method": "POST", "path": "device/state", "request": {"payload": {"device": device_cfg['device']}}, "status": 200,
+         "body": json.dumps({"requestId": "replay", "msg": "success", "code": 200, "payload": state_payload(device_cfg)})}
+        for device_cfg in devices
+    ]
+    hass.data[DOMAIN] = {ENTRY_ID: {
+        CONF_PARAMS: {CONF_API_KEY: 'benchmark', CONF_OPTIMISTIC: False},
+        CONF_DEVICES: devices,
+        CONF_STATE: {device_cfg['device']: GoveeAPIDeviceState(state_payload(device_cfg)) for device_cfg in devices},
+        CONF_TRANSPORT: GoveeAPITransportReplay(hass, ENTRY_ID, records),
+    }}
+    return hass
+
+
+def _init_platform_specific(cls, device_cfg):
+    """Return a callable that runs the capability parser of a platform on a bare entity."""
+    #class level containers are shared by all instances - every run gets fresh ones
+    containers = {
+        name: type(value)
+        for klass in reversed(cls.__mro__)
+        for name, value in vars(klass).items()
+        if name.startswith('_') and not name.startswith('__') and type(value) in (list, dict, set)
+    }
+
+    def run():
+        entity = cls.__new__(cls)
+        entity._api_id = ENTRY_ID
+        entity._identifier = device_cfg['device']
+        entity._device_cfg = device_cfg
+        for name, factory in containers.items():
+            setattr(entity, name, factory())
+        cls._init_platform_specific(entity)
+    return run
+
+
+@case('cached_state_value')
+def _cached_state_value(loop):
+    devices = fleet(FLEET_SIZE)
+    hass = _hass(loop, devices)
+    d = devices[-1]['device']
+    return lambda: GoveeAPI_GetCachedStateValue(hass, ENTRY_ID, d, 'devices.capabilities.property', 'sensorHumidity')
+
+
+@case('init_platform_light')
+def _init_platform_light(loop):
+    return _init_platform_specific(GoveeLifeLight, LIGHT)
+
+
+@case('init_platform_climate')
+def _init_platform_climate(loop):
+    return _init_platform_specific(GoveeLifeClimate, HEATER)
+
+
+@case('init_platform_fan')
+def _init_platform_fan(loop):
+    return _init_platform_specific(GoveeLifeFan, PURIFIER)
+
+
+@case('init_platform_humidifier')
+def _init_platform_humidifier(loop):
+    return _init_platform_specific(GoveeLifeHumidifier, HUMIDIFIER)
+
+
+@case('platform_plan')
+def _platform_plan(loop):
+    #sensor and switch capabilities are matched against the platform patterns here
+    devices = fleet(FLEET_SIZE)
+    return lambda: GoveeAPI_CreatePlatformPlan(ENTRY_ID, devices)
+
+
+@case('build_request_state')
+def _build_request_state(loop):
+    return lambda: GoveeAPI_BuildRequest(LIGHT)
+
+
+@case('build_request_control')
+def _build_request_control(loop):
+    capability = {"type": "devices.capabilities.color_setting", "instance": "colorRgb", "value": 16744192}
+    return lambda: GoveeAPI_BuildRequest(LIGHT, capability)
+
+
+@case('control_device')
+def _control_device(loop):
+    #request building, transport round trip and merge of the returned capability into the cached state
+    hass = _hass(loop, [LIGHT])
+    capability = {"type": "devices.capabilities.range", "instance": "brightness", "value": 42}
+
+    async def run():
+        await async_GoveeAPI_ControlDevice(hass, ENTRY_ID, LIGHT, dict(capability))
+    return run
+
+
+@case('fetch_device_state')
+def _fetch_device_state(loop):
+    hass = _hass(loop, [HEATER])
+
+    async def run():
+        await _async_GoveeAPI_FetchDeviceState(hass, ENTRY_ID, HEATER)
+    return run
@@ -0,0 +1,300 @@
+"""Minimal stand-ins for the Home Assistant modules the benchmarked code imports.
+
+Only installed for packages that are not importable - with Home Assistant
+installed the benchmarks run against the real modules. The fakes never touch
+the network: the aiohttp client session is not available.
+"""
+
+from __future__ import annotations
+import contextlib
+import enum
+import importlib.util
+import os
+import sys
+import types
+from datetime import datetime, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+INTEGRATION = os.path.join(ROOT, 'custom_components', 'goveelife')
+
+
+class _StrEnum(str, enum.Enum):
+    """String enum like the ones of Home Assistant."""
+
+    def __str__(self) -> str:
+        return str(self.value)
+
+
+def _module(name: str, **attrs) -> types.ModuleType:
+    """Register a fake module and link it to its parent package."""
+    module = types.ModuleType(name)
+    module.__dict__.update(attrs)
+    if not '.' in name:
+        module.__path__ = []
+    sys.modules[name] = module
+    parent, _, child = name.rpartition('.')
+    if parent:
+        sys.modules[parent].__path__ = []
+        setattr(sys.modules[parent], child, module)
+    return module
+
+
+def _install_homeassistant() -> None:
+    """Install the Home Assistant fakes."""
+
+    class HomeAssistant:
+        def __init__(self, loop=None) -> None:
+            self.loop = loop
+            self.data = {}
+
+        def async_create_task(self, coro):
+            return self.loop.create_task(coro)
+
+        async def async_add_executor_job(self, target, *args):
+            return target(*args)
+
+    class ConfigEntry:
+        def __init__(self, entry_id: str, data: dict, options: dict | None = None) -> None:
+            self.entry_id = entry_id
+            self.data = data
+            self.options = options or {}
+
+    class HomeAssistantError(Exception):
+        pass
+
+    class ConfigEntryAuthFailed(HomeAssistantError):
+        pass
+
+    class UnitOfTemperature(_StrEnum):
+        CELSIUS = '°C'
+        FAHRENHEIT = '°F'
+        KELVIN = 'K'
+
+    class Entity:
+        hass = None
+        entity_id = None
+        _attr_supported_features = 0
+
+        def async_write_ha_state(self) -> None:
+            pass
+
+    class EntityCategory(_StrEnum):
+        CONFIG = 'config'
+        DIAGNOSTIC = 'diagnostic'
+
+    def generate_entity_id(entity_id_format: str, name: str, current_ids=None, hass=None) -> str:
+        return entity_id_format.format(name.lower().replace(' ', '_'))
+
+    class DataUpdateCoordinator:
+        def __init__(self, hass, logger, name=None, update_interval=None, update_method=None, **kwargs) -> None:
+            self.hass = hass
+            self.logger = logger
+            self.name = name
+            self.update_interval = update_interval
+            self._listeners = {}
+
+        def async_update_listeners(self) -> None:
+            for update_callback, _ in list(self._listeners.values()):
+                update_callback()
+
+    class CoordinatorEntity(Entity):
+        def __init__(self, coordinator, context=None) -> None:
+            self.coordinator = coordinator
+            self.coordinator_context = context
+
+    class UpdateFailed(Exception):
+        pass
+
+    class DeviceEntryType(_StrEnum):
+        SERVICE = 'service'
+
+    class Store:
+        def __init__(self, hass, version, key, **kwargs) -> None:
+            self.key = key
+
+        async def async_load(self):
+            return None
+
+        async def async_save(self, data) -> None:
+            pass
+
+        def async_delay_save(self, data_func, delay: float = 0) -> None:
+            pass
+
+        async def async_remove(self) -> None:
+            pass
+
+    def async_get_clientsession(hass):
+        raise RuntimeError("benchmarks do not access the network")
+
+    def now() -> datetime:
+        return datetime.now(timezone.utc).astimezone()
+
+    def utc_from_timestamp(timestamp: float) -> datetime:
+        return datetime.fromtimestamp(timestamp, timezone.utc)
+
+    def start_of_local_day(dt: datetime | None = None) -> datetime:
+        dt = dt or now()
+        return dt.replace(hour=0, minute=0, second=0, microsecond=0)
+
+    def value_to_brightness(low_high_range: tuple, value: float) -> int:
+        low, high = low_high_range
+        return round((value - low + 1) * 255 / (high - low + 1))
+
+    def brightness_to_value(low_high_range: tuple, brightness: int) -> float:
+        low, high = low_high_range
+        return brightness * (high - low + 1) / 255 + low - 1
+
+    class ColorMode(_StrEnum):
+        UNKNOWN = 'unknown'
+        ONOFF = 'onoff'
+        BRIGHTNESS = 'brightness'
+        COLOR_TEMP = 'color_temp'
+        RGB = 'rgb'
+
+    class LightEntity(Entity):
+        pass
+
+    class ClimateEntityFeature(enum.IntFlag):
+        TARGET_TEMPERATURE = 1
+        TARGET_TEMPERATURE_RANGE = 2
+        TARGET_HUMIDITY = 4
+        FAN_MODE = 8
+        PRESET_MODE = 16
+        SWING_MODE = 32
+        AUX_HEAT = 64
+        TURN_OFF = 128
+        TURN_ON = 256
+
+    class HVACMode(_StrEnum):
+        OFF = 'off'
+        HEAT = 'heat'
+        COOL = 'cool'
+        HEAT_COOL = 'heat_cool'
+        AUTO = 'auto'
+        DRY = 'dry'
+        FAN_ONLY = 'fan_only'
+
+    class ClimateEntity(Entity):
+        _attr_supported_features = ClimateEntityFeature(0)
+
+    class FanEntityFeature(enum.IntFlag):
+        SET_SPEED = 1
+        OSCILLATE = 2
+        DIRECTION = 4
+        PRESET_MODE = 8
+        TURN_OFF = 16
+        TURN_ON = 32
+
+    class FanEntity(Entity):
+        _attr_supported_features = FanEntityFeature(0)
+
+    class HumidifierDeviceClass(_StrEnum):
+        HUMIDIFIER = 'humidifier'
+        DEHUMIDIFIER = 'dehumidifier'
+
+    class HumidifierEntityFeature(enum.IntFlag):
+        MODES = 1
+
+    class HumidifierEntity(Entity):
+        _attr_supported_features = HumidifierEntityFeature(0)
+
+    class SensorDeviceClass(_StrEnum):
+        HUMIDITY = 'humidity'
+        TEMPERATURE = 'temperature'
+        TIMESTAMP = 'timestamp'
+
+    class SensorStateClass(_StrEnum):
+        MEASUREMENT = 'measurement'
+        TOTAL = 'total'
+        TOTAL_INCREASING = 'total_increasing'
+
+    class SensorEntity(Entity):
+        pass
+
+    _module('homeassistant')
+    _module('homeassistant.core', HomeAssistant=HomeAssistant, callback=lambda func: func)
+    _module('homeassistant.config_entries', ConfigEntry=ConfigEntry)
+    _module('homeassistant.exceptions', HomeAssistantError=HomeAssistantError, ConfigEntryAuthFailed=ConfigEntryAuthFailed)
+    _module('homeassistant.const',
+        ATTR_DATE='date',
+        CONF_API_KEY='api_key',
+        CONF_COUNT='count',
+        CONF_DEVICES='devices',
+        CONF_FRIENDLY_NAME='friendly_name',
+        CONF_OPTIMISTIC='optimistic',
+        CONF_PARAMS='params',
+        CONF_SCAN_INTERVAL='scan_interval',
+        CONF_STATE='state',
+        CONF_TIMEOUT='timeout',
+        STATE_OFF='off',
+        STATE_ON='on',
+        STATE_UNKNOWN='unknown',
+        UnitOfTemperature=UnitOfTemperature,
+    )
+    _module('homeassistant.helpers')
+    _module('homeassistant.helpers.entity', DeviceInfo=dict, Entity=Entity, EntityCategory=EntityCategory, generate_entity_id=generate_entity_id)
+    _module('homeassistant.helpers.update_coordinator', CoordinatorEntity=CoordinatorEntity, DataUpdateCoordinator=DataUpdateCoordinator, UpdateFailed=UpdateFailed)
+    _module('homeassistant.helpers.device_registry', DeviceEntryType=DeviceEntryType)
+    _module('homeassistant.helpers.dispatcher', async_dispatcher_send=lambda hass, signal, *args: None, async_dispatcher_connect=lambda hass, signal, target: lambda: None)
+    _module('homeassistant.helpers.entity_platform', AddEntitiesCallback=object)
+    _module('homeassistant.helpers.storage', Store=Store)
+    _module('homeassistant.helpers.event', async_track_time_interval=lambda hass, action, interval: lambda: None, async_call_at=lambda hass, action, loop_time: lambda: None, async_call_later=lambda hass, delay, action: lambda: None)
+    _module('homeassistant.helpers.aiohttp_client', async_get_clientsession=async_get_clientsession)
+    _module('homeassistant.util')
+    _module('homeassistant.util.dt', now=now, utc_from_timestamp=utc_from_timestamp, start_of_local_day=start_of_local_day)
+    _module('homeassistant.util.color', value_to_brightness=value_to_brightness, brightness_to_value=brightness_to_value)
+    _module('homeassistant.components')
+    _module('homeassistant.components.light', ATTR_BRIGHTNESS='brightness', ATTR_COLOR_TEMP_KELVIN='color_temp_kelvin', ATTR_RGB_COLOR='rgb_color', ColorMode=ColorMode, LightEntity=LightEntity)
+    _module('homeassistant.components.climate', ClimateEntity=ClimateEntity, ClimateEntityFeature=ClimateEntityFeature, HVACMode=HVACMode)
+    _module('homeassistant.components.fan', FanEntity=FanEntity, FanEntityFeature=FanEntityFeature)
+    _module('homeassistant.components.humidifier', HumidifierDeviceClass=HumidifierDeviceClass, HumidifierEntity=HumidifierEntity, HumidifierEntityFeature=HumidifierEntityFeature, MODE_AUTO='auto')
+    _module('homeassistant.components.sensor', SensorDeviceClass=SensorDeviceClass, SensorEntity=SensorEntity, SensorStateClass=SensorStateClass)
+
+
+def _install_aiohttp() -> None:
+    """Install the aiohttp fake - only ClientTimeout is referenced at import."""
+
+    class ClientTimeout:
+        def __init__(self, total=None, connect=None, sock_read=None, sock_connect=None) -> None:
+            self.total = total
+            self.sock_read = sock_read
+            self.sock_connect = sock_connect
+
+    _module('aiohttp', ClientTimeout=ClientTimeout)
+
+
+def _install_async_timeout() -> None:
+    """Install the async_timeout fake."""
+
+    @contextlib.asynccontextmanager
+    async def timeout(delay):
+        yield
+
+    _module('async_timeout', timeout=timeout)
+
+
+def _missing(name: str) -> bool:
+    """Return if a package is neither imported nor importable."""
+    return not name in sys.modules and importlib.util.find_spec(name) is None
+
+
+def install() -> None:
+    """Install the fakes of missing packages and make the integration importable without its setup."""
+    if _missing('homeassistant'):
+        _install_homeassistant()
+    if _missing('aiohttp'):
+        _install_aiohttp()
+    if _missing('async_timeout'):
+        _install_async_timeout()
+
+    #the package module is registered without running __init__ - it imports the
+    #config flow, services and push client which the benchmarks do not need
+    if not 'custom_components' in sys.modules:
+        package = types.ModuleType('custom_components')
+        package.__path__ = [os.path.dirname(INTEGRATION)]
+        sys.modules['custom_components'] = package
+    if not 'custom_components.goveelife' in sys.modules:
+        package = types.ModuleType('custom_components.goveelife')
+        package.__path__ = [INTEGRATION]
+        sys.modules['custom_components.goveelife'] = package
@@ -0,0 +1,173 @@
+"""Synthetic device and state payloads shaped like the Govee OpenAPI responses."""
+
+from __future__ import annotations
+import copy
+
+ON_OFF = {
+    "type": "devices.capabilities.on_off",
+    "instance": "powerSwitch",
+    "parameters": {"dataType": "ENUM", "options": [{"name": "on", "value": 1}, {"name": "off", "value": 0}]},
+}
+
+
+def _toggle(instance: str) -> dict:
+    return {
+        "type": "devices.capabilities.toggle",
+        "instance": instance,
+        "parameters": {"dataType": "ENUM", "options": [{"name": "on", "value": 1}, {"name": "off", "value": 0}]},
+    }
+
+
+def _property(instance: str) -> dict:
+    return {"type": "devices.capabilities.property", "instance": instance, "parameters": {"dataType": "INTEGER"}}
+
+
+def _work_mode(modes: dict, gear: dict | None = None) -> dict:
+    """Return a work_mode capability - modes maps name to value, gear adds a gearMode with levels."""
+    work_options = [{"name": name, "value": value} for name, value in modes.items()]
+    value_options = [{"name": name, "value": 0, "defaultValue": 0} for name in modes if not name in (gear or {})]
+    for name, levels in (gear or {}).items():
+        work_options.append({"name": name, "value": len(work_options) + 1})
+        value_options.append({"name": name, "options": [{"name": level, "value": i + 1} for i, level in enumerate(levels)]})
+    return {
+        "type": "devices.capabilities.work_mode",
+        "instance": "workMode",
+        "parameters": {
+            "dataType": "STRUCT",
+            "fields": [
+                {"fieldName": "workMode", "dataType": "ENUM", "options": work_options, "required": True},
+                {"fieldName": "modeValue", "dataType": "ENUM", "options": value_options, "required": True},
+            ],
+        },
+    }
+
+
+LIGHT = {
+    "sku": "H6199",
+    "device": "AA:BB:CC:DD:EE:FF:00:01",
+    "deviceName": "Living Room Strip",
+    "type": "devices.types.light",
+    "capabilities": [
+        ON_OFF,
+        {"type": "devices.capabilities.range", "instance": "brightness", "parameters": {"unit": "unit.percent", "dataType": "INTEGER", "range": {"min": 1, "max": 100, "precision": 1}}},
+        {"type": "devices.capabilities.color_setting", "instance": "colorRgb", "parameters": {"dataType": "INTEGER", "range": {"min": 0, "max": 16777215, "precision": 1}}},
+        {"type": "devices.capabilities.color_setting", "instance": "colorTemperatureK", "parameters": {"dataType": "INTEGER", "range": {"min": 2000, "max": 9000, "precision": 1}}},
+        _toggle("gradientToggle"),
+        {"type": "devices.capabilities.segment_color_setting", "instance": "segmentedBrightness", "parameters": {"dataType": "STRUCT", "fields": []}},
+        {"type": "devices.capabilities.dynamic_scene", "instance": "lightScene", "parameters": {"dataType": "ENUM", "options": [{"name": "Sunrise", "value": {"id": 3853, "paramId": 4280}}] * 40}},
+        {"type": "devices.capabilities.music_setting", "instance": "musicMode", "parameters": {"dataType": "STRUCT", "fields": []}},
+        {"type": "devices.capabilities.dynamic_setting", "instance": "snapshot", "parameters": {"dataType": "ENUM", "options": []}},
+    ],
+}
+
+HEATER = {
+    "sku": "H7131",
+    "device": "AA:BB:CC:DD:EE:FF:00:02",
+    "deviceName": "Office Heater",
+    "type": "devices.types.heater",
+    "capabilities": [
+        ON_OFF,
+        _toggle("oscillationToggle"),
+        {
+            "type": "devices.capabilities.temperature_setting",
+            "instance": "targetTemperature",
+            "parameters": {
+                "dataType": "STRUCT",
+                "fields": [
+                    {"fieldName": "autoStop", "dataType": "ENUM", "options": [{"name": "Auto Stop", "value": 1}, {"name": "Maintain", "value": 0}]},
+                    {"fieldName": "temperature", "dataType": "INTEGER", "range": {"min": 5, "max": 30, "precision": 1}},
+                    {"fieldName": "unit", "dataType": "ENUM", "defaultValue": "Celsius", "options": [{"name": "Celsius", "value": "Celsius"}, {"name": "Fahrenheit", "value": "Fahrenheit"}]},
+                ],
+            },
+        },
+        _work_mode({"Fan": 9, "Auto": 3}, gear={"gearMode": ["Low", "Medium", "High"]}),
+        _property("sensorTemperature"),
+    ],
+}
+
+PURIFIER = {
+    "sku": "H7126",
+    "device": "AA:BB:CC:DD:EE:FF:00:03",
+    "deviceName": "Bedroom Purifier",
+    "type": "devices.types.air_purifier",
+    "capabilities": [
+        ON_OFF,
+        _work_mode({"Custom": 2, "Auto": 3, "Sleep": 5}, gear={"gearMode": ["Low", "Medium", "High"]}),
+        _property("filterLifeTime"),
+        _property("airQuality"),
+    ],
+}
+
+HUMIDIFIER = {
+    "sku": "H7141",
+    "device": "AA:BB:CC:DD:EE:FF:00:04",
+    "deviceName": "Nursery Humidifier",
+    "type": "devices.types.humidifier",
+    "capabilities": [
+        ON_OFF,
+        _work_mode({"Custom": 2, "Auto": 3}, gear={"Manual": ["Level 1", "Level 2", "Level 3", "Level 4", "Level 5", "Level 6", "Level 7", "Level 8"]}),
+        {"type": "devices.capabilities.range", "instance": "humidity", "parameters": {"unit": "unit.percent", "dataType": "INTEGER", "range": {"min": 40, "max": 80, "precision": 1}}},
+        _toggle("nightlightToggle"),
+        _property("sensorHumidity"),
+    ],
+}
+
+THERMOMETER = {
+    "sku": "H5179",
+    "device": "AA:BB:CC:DD:EE:FF:00:05",
+    "deviceName": "Garage Thermometer",
+    "type": "devices.types.thermometer",
+    "capabilities": [
+        _property("sensorTemperature"),
+        _property("sensorHumidity"),
+        {"type": "devices.capabilities.event", "instance": "lackWaterEvent", "eventState": {"options": []}},
+    ],
+}
+
+SOCKET = {
+    "sku": "H5080",
+    "device": "AA:BB:CC:DD:EE:FF:00:06",
+    "deviceName": "Kettle Socket",
+    "type": "devices.types.socket",
+    "capabilities": [ON_OFF, _toggle("childLock")],
+}
+
+DEVICES = [LIGHT, HEATER, PURIFIER, HUMIDIFIER, THERMOMETER, SOCKET]
+
+STATE_VALUES = {
+    ("devices.capabilities.online", "online"): True,
+    ("devices.capabilities.on_off", "powerSwitch"): 1,
+    ("devices.capabilities.range", "brightness"): 80,
+    ("devices.capabilities.range", "humidity"): 55,
+    ("devices.capabilities.color_setting", "colorRgb"): 16744192,
+    ("devices.capabilities.color_setting", "colorTemperatureK"): 0,
+    ("devices.capabilities.toggle", "gradientToggle"): 0,
+    ("devices.capabilities.toggle", "oscillationToggle"): 1,
+    ("devices.capabilities.toggle", "nightlightToggle"): 0,
+    ("devices.capabilities.toggle", "childLock"): 0,
+    ("devices.capabilities.temperature_setting", "targetTemperature"): {"temperature": 22, "unit": "Celsius"},
+    ("devices.capabilities.work_mode", "workMode"): {"workMode": 1, "modeValue": 2},
+    ("devices.capabilities.property", "sensorTemperature"): 21.5,
+    ("devices.capabilities.property", "sensorHumidity"): 48.2,
+    ("devices.capabilities.property", "filterLifeTime"): 87,
+    ("devices.capabilities.property", "airQuality"): 12,
+}
+
+
+def state_payload(device_cfg: dict) -> dict:
+    """Return the device/state payload of a device - every capability reports a value."""
+    capabilities = [{"type": "devices.capabilities.online", "instance": "online", "state": {"value": True}}]
+    for cap in device_cfg['capabilities']:
+        value = STATE_VALUES.get((cap['type'], cap['instance']), "")
+        capabilities.append({"type": cap['type'], "instance": cap['instance'], "state": {"value": value}})
+    return {"sku": device_cfg['sku'], "device": device_cfg['device'], "capabilities": capabilities}
+
+
+def fleet(count: int) -> list:
+    """Return count devices cycling through the device kinds - device ids are unique."""
+    devices = []
+    for i in range(count):
+        device_cfg = copy.deepcopy(DEVICES[i % len(DEVICES)])
+        device_cfg['device'] = device_cfg['device'][:-5] + '%02X:%02X' % (i // 256, i % 256)
+        devices.append(device_cfg)
+    return devices
@@ -0,0 +1,160 @@
+"""Run the benchmark suite and store or compare baselines.
+
+    python benchmarks/run.py                      run all cases
+    python benchmarks/run.py -k init_platform     run the cases matching a pattern
+    python benchmarks/run.py --save               store the results as baseline of the manifest version
+    python benchmarks/run.py --compare benchmarks/baselines/3.1.0.json
+
+Compare exits with status 1 if a case got slower than the threshold allows.
+"""
+
+from __future__ import annotations
+import argparse
+import asyncio
+import inspect
+import json
+import logging
+import os
+import platform
+import re
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fakes import INTEGRATION, ROOT  # noqa: E402
+from cases import CASES  # noqa: E402
+
+BASELINES = os.path.join(ROOT, 'benchmarks', 'baselines')
+
+
+def _timer(loop, func):
+    """Return a function that times n calls of func in nanoseconds."""
+    if inspect.iscoroutinefunction(func):
+        async def batch(n):
+            start = time.perf_counter_ns()
+            for _ in range(n):
+                await func()
+            return time.perf_counter_ns() - start
+        return lambda n: loop.run_until_complete(batch(n))
+
+    def timed(n):
+        start = time.perf_counter_ns()
+        for _ in range(n):
+            func()
+        return time.perf_counter_ns() - start
+    return timed
+
+
+def measure(loop, func, repeat: int, min_time: float) -> dict:
+    """Return best and median time per call - the loop count is scaled until a run takes min_time."""
+    timed = _timer(loop, func)
+    timed(1)
+    loops = 1
+    while True:
+        elapsed = timed(loops)
+        if elapsed >= min_time * 1e9:
+            break
+        loops *= 2 if elapsed == 0 else max(2, min(10, int(min_time * 1e9 / elapsed) + 1))
+    runs = [elapsed / loops] + [timed(loops) / loops for _ in range(repeat - 1)]
+    return {'best_ns': round(min(runs), 1), 'median_ns': round(statistics.median(runs), 1), 'loops': loops}
+
+
+def _version() -> str:
+    """Return the integration version of the manifest."""
+    with open(os.path.join(INTEGRATION, 'manifest.json')) as stream:
+        return json.load(stream)['version']
+
+
+def _commit() -> str | None:
+    """Return the git commit of the working tree - None outside a git checkout."""
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip() or None
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _format_ns(ns: float) -> str:
+    """Return a duration with a readable unit."""
+    if ns >= 1e6:
+        return '%.2f ms' % (ns / 1e6)
+    if ns >= 1e3:
+        return '%.2f us' % (ns / 1e3)
+    return '%.0f ns' % ns
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> bool:
+    """Print the change against a baseline - returns False if a case regressed beyond the threshold."""
+    ok = True
+    #a baseline older than the code it is compared to reports the changes in between as regressions
+    label = 'compare to %s (%s)' % (baseline.get('version', '?'), baseline.get('commit', None) or 'unknown commit')
+    print('\n%-28s %12s %12s %8s' % (label, 'baseline', 'current', 'ratio'))
+    for name, result in results.items():
+        base = baseline['results'].get(name, None)
+        if base is None:
+            print('%-28s %12s %12s %8s' % (name, '-', _format_ns(result['best_ns']), 'new'))
+            continue
+        ratio = result['best_ns'] / base['best_ns']
+        flag = ''
+        if ratio > 1 + threshold:
+            flag = '  REGRESSION'
+            ok = False
+        elif ratio < 1 - threshold:
+            flag = '  faster'
+        print('%-28s %12s %12s %7.2fx%s' % (name, _format_ns(base['best_ns']), _format_ns(result['best_ns']), ratio, flag))
+    return ok
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('-k', dest='pattern', help='run the cases matching this regular expression')
+    parser.add_argument('--repeat', type=int, default=5, help='timed runs per case (default 5)')
+    parser.add_argument('--min-time', type=float, default=0.2, help='minimum seconds per run (default 0.2)')
+    parser.add_argument('--save', nargs='?', const='', metavar='FILE', help='store the results as baseline - default baselines/<version>.json')
+    parser.add_argument('--compare', metavar='FILE', help='compare the results to a baseline')
+    parser.add_argument('--threshold', type=float, default=0.2, help='slowdown ratio that counts as regression (default 0.2)')
+    args = parser.parse_args(argv)
+
+    #debug logging of the integration would dominate the measurements
+    logging.basicConfig(level=logging.WARNING)
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+
+    results = {}
+    print('%-28s %12s %12s %10s' % ('case', 'best', 'median', 'loops'))
+    for name, setup in CASES.items():
+        if args.pattern and not re.search(args.pattern, name):
+            continue
+        results[name] = measure(loop, setup(loop), args.repeat, args.min_time)
+        print('%-28s %12s %12s %10s' % (name, _format_ns(results[name]['best_ns']), _format_ns(results[name]['median_ns']), results[name]['loops']))
+    loop.close()
+
+    ok = True
+    if args.compare:
+        with open(args.compare) as stream:
+            ok = compare(results, json.load(stream), args.threshold)
+
+    if args.save is not None:
+        filename = args.save or os.path.join(BASELINES, _version() + '.json')
+        os.makedirs(os.path.dirname(os.path.abspath(filename)), exist_ok=True)
+        with open(filename, 'w') as stream:
+            json.dump({
+                'version': _version(),
+                'commit': _commit(),
+                'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+                'python': platform.python_version(),
+                'implementation': platform.python_implementation(),
+                'machine': platform.machine(),
+                'results': results,
+            }, stream, indent=2)
+            stream.write('\n')
+        print('\nbaseline written to %s' % filename)
+
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
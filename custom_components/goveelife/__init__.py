@@ -6,31 +6,61 @@ import logging
 import asyncio
 
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, SupportsResponse
+from homeassistant.helpers.storage import Store
 from homeassistant.const import (
     CONF_API_KEY,
     CONF_DEVICES,
     CONF_PARAMS,
     CONF_SCAN_INTERVAL,
+    CONF_STATE,
 )
 
 from .const import (
     DOMAIN,
+    CONF_CIRCUIT,
     CONF_COORDINATORS,
+    CONF_LAN,
+    CONF_MAX_CONCURRENT_REQUESTS,
+    CONF_PLATFORM_PLAN,
+    CONF_PUSH,
+    CONF_ROUTER,
+    CONF_SCHEDULER,
+    CONF_TRANSPORT,
+    DEFAULT_LAN,
+    DEFAULT_MAX_CONCURRENT_REQUESTS,
+    DEFAULT_PUSH,
+    STORAGE_KEY_API_COUNT,
+    STORAGE_KEY_DEVICES,
+    STORAGE_KEY_PHASES,
+    STORAGE_VERSION,
     FUNC_OPTION_UPDATES,
     SUPPORTED_PLATFORMS,
 )
+from .configuration_schema import PROFILE_SERVICE_SCHEMA
 from .entities import (
     GoveeAPIUpdateCoordinator,
 )
+from .lan import GoveeAPILanClient
+from .push import GoveeAPIPushClient
+from .ratelimit import GoveeAPICircuitBreaker
+from .router import GoveeAPIRouter
+from .scheduler import GoveeAPIPollScheduler
+from .state import GoveeAPIDeviceState
+from .transport import async_GoveeAPI_CreateTransport
 from .services import (
     async_registerService,
+    async_service_Profile,
     async_service_SetPollInterval,
 )
 from .utils import (
     async_ProgrammingDebug,
+    async_GooveAPI_LoadRequestCount,
+    async_GooveAPI_SaveRequestCount,
     async_GoveeAPI_GETRequest,
     async_GoveeAPI_GetDeviceState,
+    GoveeAPI_CancelSignals,
+    GoveeAPI_CreatePlatformPlan,
 )
 
 _LOGGER: Final = logging.getLogger(__name__)
@@ -46,28 +76,69 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         entry_data = hass.data[DOMAIN][entry.entry_id]
         entry_data[CONF_PARAMS] = entry.data
         entry_data[CONF_SCAN_INTERVAL] = None
+        entry_data[CONF_TRANSPORT] = await async_GoveeAPI_CreateTransport(hass, entry.entry_id)
+        entry_data[CONF_CIRCUIT] = GoveeAPICircuitBreaker(entry.entry_id)
+        entry_data[CONF_ROUTER] = GoveeAPIRouter(entry.entry_id)
+        await async_GooveAPI_LoadRequestCount(hass, entry.entry_id)
     except Exception as e:
         _LOGGER.error("%s - async_setup_entry: Creating data store failed: %s (%s.%s)", entry.entry_id, str(e), e.__class__.__module__, type(e).__name__)
         return False
 
     try:
-        _LOGGER.debug("%s - async_setup_entry: Receiving cloud devices..", entry.entry_id)
-        api_devices = await async_GoveeAPI_GETRequest(hass, entry.entry_id, 'user/devices')
+        _LOGGER.debug("%s - async_setup_entry: Loading cached cloud devices..", entry.entry_id)
+        store = Store(hass, STORAGE_VERSION, STORAGE_KEY_DEVICES.format(entry.entry_id))
+        api_devices = await store.async_load()
+    except Exception as e:
+        _LOGGER.warning("%s - async_setup_entry: Loading cached cloud devices failed: %s (%s.%s)", entry.entry_id, str(e), e.__class__.__module__, type(e).__name__)
+        api_devices = None
+
+    reconcile_devices = False
+    try:
         if api_devices is None:
-            return False
+            _LOGGER.debug("%s - async_setup_entry: Receiving cloud devices..", entry.entry_id)
+            api_devices = await async_GoveeAPI_GETRequest(hass, entry.entry_id, 'user/devices')
+            if api_devices is None:
+                return False
+            await store.async_save(api_devices)
+        else:
+            _LOGGER.debug("%s - async_setup_entry: Using %s cached cloud devices - reconcile after setup", entry.entry_id, len(api_devices))
+            reconcile_devices = True
         entry_data[CONF_DEVICES] = api_devices
+        entry_data[CONF_PLATFORM_PLAN] = GoveeAPI_CreatePlatformPlan(entry.entry_id, api_devices)
     except Exception as e:
         _LOGGER.error("%s - async_setup_entry: Receiving cloud devices failed: %s (%s.%s)", entry.entry_id, str(e), e.__class__.__module__, type(e).__name__)
         return False 
 
+    try:
+        _LOGGER.debug("%s - async_setup_entry: Receiving initial device states..", entry.entry_id)
+        semaphore = asyncio.Semaphore(entry.data.get(CONF_MAX_CONCURRENT_REQUESTS, DEFAULT_MAX_CONCURRENT_REQUESTS))
+        async def async_bootstrap_state(device_cfg):
+            async with semaphore:
+                return await async_GoveeAPI_GetDeviceState(hass, entry.entry_id, device_cfg)
+        results = await asyncio.gather(*[async_bootstrap_state(device_cfg) for device_cfg in api_devices], return_exceptions=True)
+    except Exception as e:
+        _LOGGER.error("%s - async_setup_entry: Receiving initial device states failed: %s (%s.%s)", entry.entry_id, str(e), e.__class__.__module__, type(e).__name__)
+        return False
+
     try:
         _LOGGER.debug("%s - async_setup_entry: Creating update coordinators per device..", entry.entry_id)
         entry_data.setdefault(CONF_COORDINATORS, {})
-        for device_cfg in api_devices:
-            await async_GoveeAPI_GetDeviceState(hass, entry.entry_id, device_cfg)
-            coordinator = GoveeAPIUpdateCoordinator(hass, entry.entry_id, device_cfg)
+        entry_data.setdefault(CONF_STATE, {})
+        scheduler = entry_data[CONF_SCHEDULER] = GoveeAPIPollScheduler(hass, entry.entry_id, entry.data.get(CONF_MAX_CONCURRENT_REQUESTS, DEFAULT_MAX_CONCURRENT_REQUESTS))
+        #only devices that are set up on a platform are polled
+        planned_devices = {device_cfg.get('device') for platform_plan in entry_data[CONF_PLATFORM_PLAN].values() for device_cfg, capability in platform_plan}
+        await scheduler.async_load_phases(planned_devices)
+        for device_cfg, result in zip(api_devices, results):
             d = device_cfg.get('device')
+            if not result is True:
+                #without state the device is unavailable until its coordinator receives one
+                _LOGGER.warning("%s - async_setup_entry: Receiving initial state failed - device unavailable until next poll: %s (%s)", entry.entry_id, d, result)
+                entry_data[CONF_STATE].setdefault(d, GoveeAPIDeviceState({'sku': device_cfg.get('sku'), 'device': d}))
+            coordinator = GoveeAPIUpdateCoordinator(hass, entry.entry_id, device_cfg)
             entry_data[CONF_COORDINATORS][d] = coordinator            
+            if d in planned_devices:
+                #devices without initial state are retried right after setup
+                scheduler.async_add_coordinator(d, coordinator, None if result is True else 0)
     except Exception as e:
         _LOGGER.error("%s - async_setup_entry: Creating update coordinators failed: %s (%s.%s)", entry.entry_id, str(e), e.__class__.__module__, type(e).__name__)
         return False 
@@ -85,16 +156,59 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         _LOGGER.error("%s - async_setup_entry: Setup trigger for platform failed: %s (%s.%s)", entry.entry_id, str(e), e.__class__.__module__, type(e).__name__)
         return False
 
+    _LOGGER.debug("%s - async_setup_entry: Start poll scheduler", entry.entry_id)
+    scheduler.async_start()
+
+    if entry.data.get(CONF_LAN, DEFAULT_LAN):
+        try:
+            _LOGGER.debug("%s - async_setup_entry: Start LAN client", entry.entry_id)
+            lan = GoveeAPILanClient(hass, entry.entry_id)
+            await lan.async_start()
+            entry_data[CONF_LAN] = lan
+        except Exception as e:
+            #all requests go to the cloud without LAN
+            _LOGGER.error("%s - async_setup_entry: Start LAN client failed: %s (%s.%s)", entry.entry_id, str(e), e.__class__.__module__, type(e).__name__)
+
+    if entry.data.get(CONF_PUSH, DEFAULT_PUSH):
+        try:
+            _LOGGER.debug("%s - async_setup_entry: Start push client", entry.entry_id)
+            entry_data[CONF_PUSH] = GoveeAPIPushClient(hass, entry.entry_id)
+            await entry_data[CONF_PUSH].async_start()
+        except Exception as e:
+            #polling keeps all devices up to date without push
+            _LOGGER.error("%s - async_setup_entry: Start push client failed: %s (%s.%s)", entry.entry_id, str(e), e.__class__.__module__, type(e).__name__)
+
     try:
         _LOGGER.debug("%s - async_setup_entry: register services", entry.entry_id)
         await async_registerService(hass, "set_poll_interval", async_service_SetPollInterval)
+        await async_registerService(hass, "profile", async_service_Profile, SupportsResponse.OPTIONAL, PROFILE_SERVICE_SCHEMA)
     except Exception as e:
         _LOGGER.error("%s - async_setup_entry: register services failed: %s (%s.%s)", entry.entry_id, str(e), e.__class__.__module__, type(e).__name__)
         return False 
 
+    if reconcile_devices:
+        hass.async_create_task(async_reconcile_devices(hass, entry, store, api_devices))
+
     _LOGGER.debug("%s - async_setup_entry: Completed", entry.entry_id)
     return True
 
+async def async_reconcile_devices(hass: HomeAssistant, entry: ConfigEntry, store: Store, cached_devices) -> None:
+    """Async: Compare cached cloud devices with the cloud and reload the entry on differences."""
+    try:
+        _LOGGER.debug("%s - async_reconcile_devices: Receiving cloud devices..", entry.entry_id)
+        api_devices = await async_GoveeAPI_GETRequest(hass, entry.entry_id, 'user/devices')
+        if api_devices is None:
+            _LOGGER.warning("%s - async_reconcile_devices: Receiving cloud devices failed - keep using cached devices", entry.entry_id)
+            return None
+        if api_devices == cached_devices:
+            _LOGGER.debug("%s - async_reconcile_devices: Cached cloud devices are up to date", entry.entry_id)
+            return None
+        _LOGGER.info("%s - async_reconcile_devices: Cloud devices changed - reload config entry", entry.entry_id)
+        await store.async_save(api_devices)
+        await hass.config_entries.async_reload(entry.entry_id)
+    except Exception as e:
+        _LOGGER.error("%s - async_reconcile_devices: Failed: %s (%s.%s)", entry.entry_id, str(e), e.__class__.__module__, type(e).__name__)
+
 async def options_update_listener(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Handle options update."""
     _LOGGER.debug("Update options / reload config entry: %s", entry.entry_id)
@@ -126,6 +240,31 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
             _LOGGER.debug("%s - async_unload_entry: Unload option updates listener: %s.%s ", entry.entry_id, FUNC_OPTION_UPDATES)
             hass.data[DOMAIN][entry.entry_id][FUNC_OPTION_UPDATES]()
 
+            # Stop polling
+            _LOGGER.debug("%s - async_unload_entry: Stop poll scheduler", entry.entry_id)
+            hass.data[DOMAIN][entry.entry_id][CONF_SCHEDULER].async_stop()
+
+            # Drop throttled signals
+            GoveeAPI_CancelSignals(hass, entry.entry_id)
+
+            # Persist request count
+            _LOGGER.debug("%s - async_unload_entry: Save request count", entry.entry_id)
+            await async_GooveAPI_SaveRequestCount(hass, entry.entry_id)
+
+            # Disconnect push client
+            if CONF_PUSH in hass.data[DOMAIN][entry.entry_id]:
+                _LOGGER.debug("%s - async_unload_entry: Stop push client", entry.entry_id)
+                await hass.data[DOMAIN][entry.entry_id][CONF_PUSH].async_stop()
+
+            # Close LAN client
+            if CONF_LAN in hass.data[DOMAIN][entry.entry_id]:
+                _LOGGER.debug("%s - async_unload_entry: Stop LAN client", entry.entry_id)
+                await hass.data[DOMAIN][entry.entry_id][CONF_LAN].async_stop()
+
+            # Flush and close request transport
+            _LOGGER.debug("%s - async_unload_entry: Close request transport", entry.entry_id)
+            await hass.data[DOMAIN][entry.entry_id][CONF_TRANSPORT].async_close()
+
             # Remove data store
             _LOGGER.debug("%s - async_unload_entry: Remove data store: %s.%s ", entry.entry_id, DOMAIN, entry.entry_id)
             hass.data[DOMAIN].pop(entry.entry_id)
@@ -134,3 +273,13 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     except Exception as e:
         _LOGGER.error("%s - async_unload_entry: Unload device failed: %s (%s.%s)", entry.entry_id, str(e), e.__class__.__module__, type(e).__name__)
         return False
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove persisted data of a config entry."""
+    try:
+        _LOGGER.debug("Removing stored data of config entry: %s", entry.entry_id)
+        await Store(hass, STORAGE_VERSION, STORAGE_KEY_DEVICES.format(entry.entry_id)).async_remove()
+        await Store(hass, STORAGE_VERSION, STORAGE_KEY_PHASES.format(entry.entry_id)).async_remove()
+        await Store(hass, STORAGE_VERSION, STORAGE_KEY_API_COUNT.format(entry.entry_id)).async_remove()
+    except Exception as e:
+        _LOGGER.error("%s - async_remove_entry: Removing stored data failed: %s (%s.%s)", entry.entry_id, str(e), e.__class__.__module__, type(e).__name__)
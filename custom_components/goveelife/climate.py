@@ -3,7 +3,6 @@
 from __future__ import annotations
 from typing import Final
 import logging
-import asyncio
 
 from homeassistant.core import HomeAssistant
 from homeassistant.config_entries import ConfigEntry
@@ -14,18 +13,16 @@ from homeassistant.components.climate import (
 )
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.const import (
-    CONF_DEVICES,
     STATE_UNKNOWN,
     UnitOfTemperature,
 )
 
 from .entities import GoveeLifePlatformEntity
-from .const import DOMAIN, CONF_COORDINATORS
+from .const import DOMAIN, CONF_COORDINATORS, CONF_PLATFORM_PLAN
 from .utils import GoveeAPI_GetCachedStateValue, async_GoveeAPI_ControlDevice
 
 _LOGGER: Final = logging.getLogger(__name__)
 PLATFORM = 'climate'
-PLATFORM_DEVICE_TYPES = ['devices.types.heater']
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry, async_add_entities: AddEntitiesCallback) -> None:
     """Set up the climate platform."""
@@ -34,20 +31,17 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry, async_add_e
 
     try:
         entry_data = hass.data[DOMAIN][entry.entry_id]
-        api_devices = entry_data[CONF_DEVICES]
+        platform_plan = entry_data[CONF_PLATFORM_PLAN][PLATFORM]
     except Exception as e:
-        _LOGGER.error("%s - async_setup_entry %s: Failed to get cloud devices from data store: %s (%s.%s)", entry.entry_id, PLATFORM, str(e), e.__class__.__module__, type(e).__name__)
+        _LOGGER.error("%s - async_setup_entry %s: Failed to get platform plan from data store: %s (%s.%s)", entry.entry_id, PLATFORM, str(e), e.__class__.__module__, type(e).__name__)
         return
 
-    for device_cfg in api_devices:
+    for device_cfg, capability in platform_plan:
         try:
-            if device_cfg.get('type') not in PLATFORM_DEVICE_TYPES:
-                continue
             device = device_cfg.get('device')
             coordinator = entry_data[CONF_COORDINATORS][device]
             entity = GoveeLifeClimate(hass, entry, coordinator, device_cfg, platform=PLATFORM)
             entities.append(entity)
-            await asyncio.sleep(0)
         except Exception as e:
             _LOGGER.error("%s - async_setup_entry %s: Failed to setup device: %s (%s.%s)", entry.entry_id, PLATFORM, str(e), e.__class__.__module__, type(e).__name__)
             return
@@ -65,6 +59,7 @@ class GoveeLifeClimate(ClimateEntity, GoveeLifePlatformEntity):
     _attr_preset_modes = []
     _attr_preset_modes_mapping = {}
     _attr_preset_modes_mapping_set = {}
+    _attr_temperature_unit = UnitOfTemperature.CELSIUS
     _enable_turn_on_off_backwards_compatibility = False
 
     def _init_platform_specific(self, **kwargs):
@@ -129,16 +124,41 @@ class GoveeLifeClimate(ClimateEntity, GoveeLifePlatformEntity):
             else:
                 _LOGGER.debug("%s - %s: _init_platform_specific: cap unhandled: %s", self._api_id, self._identifier, cap)
 
+    def _update_state_view(self):
+        """Decode the cached device state into the values the properties return."""
+        super()._update_state_view()
+        d = self._device_cfg.get('device')
+        value = GoveeAPI_GetCachedStateValue(self.hass, self._entry_id, d, 'devices.capabilities.on_off', 'powerSwitch')
+        self._attr_hvac_mode = self._attr_hvac_modes_mapping.get(value, STATE_UNKNOWN)
+        if self._attr_hvac_mode == STATE_UNKNOWN:
+            _LOGGER.warning("%s - %s: hvac_mode: invalid value: %s", self._api_id, self._identifier, value)
+            _LOGGER.debug("%s - %s: hvac_mode: valid are: %s", self._api_id, self._identifier, self._attr_hvac_modes_mapping)
+
+        self._attr_preset_mode = None
+        value = GoveeAPI_GetCachedStateValue(self.hass, self._entry_id, d, 'devices.capabilities.work_mode', 'workMode')
+        if not value is None:
+            v = str(value.get('workMode', None)) + ':' + str(value.get('modeValue', None))
+            self._attr_preset_mode = self._attr_preset_modes_mapping.get(v, STATE_UNKNOWN)
+            if self._attr_preset_mode == STATE_UNKNOWN:
+                _LOGGER.warning("%s - %s: preset_mode: invalid value: %s", self._api_id, self._identifier, value)
+                _LOGGER.debug("%s - %s: preset_mode: valid are: %s", self._api_id, self._identifier, self._attr_preset_modes_mapping)
+
+        value = GoveeAPI_GetCachedStateValue(self.hass, self._entry_id, d, 'devices.capabilities.temperature_setting', 'targetTemperature') or {}
+        self._target_unit = value.get('unit', 'Celsius')
+        if 'unit' in value:
+            self._attr_temperature_unit = UnitOfTemperature[value['unit'].upper()]
+        self._attr_target_temperature = value.get('targetTemperature', 0)
+
+        value = GoveeAPI_GetCachedStateValue(self.hass, self._entry_id, d, 'devices.capabilities.property', 'sensorTemperature')
+        if not value is None and self._attr_temperature_unit == UnitOfTemperature.CELSIUS:
+            #value seems to be always Fahrenheit - calculate to °C if necessary
+            value = (value - 32) * 5 / 9
+        self._attr_current_temperature = value
+
     @property
     def hvac_mode(self) -> str:
         """Return the hvac_mode of the entity."""
-        #_LOGGER.debug("%s - %s: hvac_mode", self._api_id, self._identifier)  
-        value = GoveeAPI_GetCachedStateValue(self.hass, self._entry_id, self._device_cfg.get('device'), 'devices.capabilities.on_off', 'powerSwitch')
-        v = self._attr_hvac_modes_mapping.get(value,STATE_UNKNOWN)
-        if v == STATE_UNKNOWN:
-            _LOGGER.warning("%s - %s: hvac_mode: invalid value: %s", self._api_id, self._identifier, value)
-            _LOGGER.debug("%s - %s: hvac_mode: valid are: %s", self._api_id, self._identifier, self._state_mapping)
-        return v
+        return self._attr_hvac_mode
 
     async def async_set_hvac_mode(self, hvac_mode: HVACMode) -> None:
         """Set new target hvac mode."""
@@ -148,8 +168,7 @@ class GoveeLifeClimate(ClimateEntity, GoveeLifePlatformEntity):
             "instance": "powerSwitch",
             "value": self._attr_hvac_modes_mapping_set[hvac_mode]
             }
-        if await async_GoveeAPI_ControlDevice(self.hass, self._entry_id, self._device_cfg, state_capability):
-            self.async_write_ha_state()
+        await async_GoveeAPI_ControlDevice(self.hass, self._entry_id, self._device_cfg, state_capability)
         return None
 
     async def async_turn_off(self) -> None:
@@ -163,14 +182,7 @@ class GoveeLifeClimate(ClimateEntity, GoveeLifePlatformEntity):
     @property
     def preset_mode(self) -> str | None:
         """Return the preset_mode of the entity."""
-        #_LOGGER.debug("%s - %s: preset_mode", self._api_id, self._identifier)  
-        value = GoveeAPI_GetCachedStateValue(self.hass, self._entry_id, self._device_cfg.get('device'), 'devices.capabilities.work_mode', 'workMode')
-        v=str(value['workMode'])+':'+str(value['modeValue'])
-        v=self._attr_preset_modes_mapping.get(v,STATE_UNKNOWN)
-        if v == STATE_UNKNOWN:
-            _LOGGER.warning("%s - %s: preset_mode: invalid value: %s", self._api_id, self._identifier, value)
-            _LOGGER.debug("%s - %s: preset_mode: valid are: %s", self._api_id, self._identifier, self._attr_preset_modes_mapping)
-        return v 
+        return self._attr_preset_mode
 
     async def async_set_preset_mode(self, preset_mode) -> None:
         """Set new target preset mode."""
@@ -180,29 +192,24 @@ class GoveeLifeClimate(ClimateEntity, GoveeLifePlatformEntity):
             "instance": "workMode",
             "value": self._attr_preset_modes_mapping_set[preset_mode]
             }
-        if await async_GoveeAPI_ControlDevice(self.hass, self._entry_id, self._device_cfg, state_capability):
-            self.async_write_ha_state()
+        await async_GoveeAPI_ControlDevice(self.hass, self._entry_id, self._device_cfg, state_capability)
         return None
     
 
     @property
     def temperature_unit(self) -> str:
         """Return the temperature unit of the entity."""
-        value = GoveeAPI_GetCachedStateValue(self.hass, self._entry_id, self._device_cfg.get('device'), 'devices.capabilities.temperature_setting', 'targetTemperature')
-        return UnitOfTemperature[value.get('unit', 'CELSIUS').upper()]
+        return self._attr_temperature_unit
 
     @property
     def target_temperature(self) -> float | None:
         """Return the target temperature of the entity."""
-        #_LOGGER.debug("%s - %s: target_temperature", self._api_id, self._identifier)
-        value = GoveeAPI_GetCachedStateValue(self.hass, self._entry_id, self._device_cfg.get('device'), 'devices.capabilities.temperature_setting', 'targetTemperature')
-        return value.get('targetTemperature', 0)
+        return self._attr_target_temperature
 
     async def async_set_temperature(self, **kwargs) -> None:
         """Set new target temperature."""        
         #_LOGGER.debug("%s - %s: async_set_temperature", self._api_id, self._identifier)
-        value = GoveeAPI_GetCachedStateValue(self.hass, self._entry_id, self._device_cfg.get('device'), 'devices.capabilities.temperature_setting', 'targetTemperature')
-        unit = value.get('unit', 'Celsius')
+        unit = self._target_unit
         state_capability = {
             "type": "devices.capabilities.temperature_setting",
             "instance": "targetTemperature",
@@ -211,19 +218,11 @@ class GoveeLifeClimate(ClimateEntity, GoveeLifePlatformEntity):
                 "unit": unit,
                 }
             }
-        if await async_GoveeAPI_ControlDevice(self.hass, self._entry_id, self._device_cfg, state_capability):
-            self.async_write_ha_state()      
+        await async_GoveeAPI_ControlDevice(self.hass, self._entry_id, self._device_cfg, state_capability)
         return None
 
 
     @property
     def current_temperature(self) -> float | None:
         """Return the current temperature of the entity."""
-        #_LOGGER.debug("%s - %s: current_temperature", self._api_id, self._identifier)  
-        value = GoveeAPI_GetCachedStateValue(self.hass, self._entry_id, self._device_cfg.get('device'), 'devices.capabilities.property', 'sensorTemperature')
-        if self.temperature_unit == UnitOfTemperature.CELSIUS:
-            #value seems to be always Fahrenheit - calculate to °C if necessary
-            value = (value - 32) * 5 / 9
-        return value
-
-
+        return self._attr_current_temperature
@@ -10,16 +10,33 @@ from homeassistant import config_entries
 from homeassistant.const import (
     CONF_API_KEY,
     CONF_FRIENDLY_NAME,
+    CONF_OPTIMISTIC,
     CONF_SCAN_INTERVAL,
     CONF_TIMEOUT,
 )
 import homeassistant.helpers.config_validation as cv
 
 from .const import (
+    CONF_ADAPTIVE_POLLING,
+    CONF_LAN,
+    CONF_MAX_CONCURRENT_REQUESTS,
+    CONF_PROFILE_DURATION,
+    CONF_PROFILE_TOP,
+    CONF_PUSH,
+    CONF_SCAN_INTERVAL_MAX,
+    DEFAULT_ADAPTIVE_POLLING,
+    DEFAULT_LAN,
+    DEFAULT_MAX_CONCURRENT_REQUESTS,
     DEFAULT_NAME,
+    DEFAULT_OPTIMISTIC,
     DEFAULT_POLL_INTERVAL,
+    DEFAULT_POLL_INTERVAL_MAX,
+    DEFAULT_PROFILE_DURATION,
+    DEFAULT_PROFILE_TOP,
+    DEFAULT_PUSH,
     DEFAULT_TIMEOUT,
     DOMAIN,
+    PROFILE_DURATION_MAX,
 )
 
 _LOGGER: Final = logging.getLogger(__name__)
@@ -29,6 +46,17 @@ GOVEELIFE_SCHEMA: Final = vol.Schema({
     vol.Required(CONF_API_KEY, default=None): cv.string,
     vol.Optional(CONF_SCAN_INTERVAL, default=DEFAULT_POLL_INTERVAL): cv.positive_int,
     vol.Optional(CONF_TIMEOUT, default=DEFAULT_TIMEOUT): cv.positive_int,
+    vol.Optional(CONF_ADAPTIVE_POLLING, default=DEFAULT_ADAPTIVE_POLLING): cv.boolean,
+    vol.Optional(CONF_SCAN_INTERVAL_MAX, default=DEFAULT_POLL_INTERVAL_MAX): cv.positive_int,
+    vol.Optional(CONF_MAX_CONCURRENT_REQUESTS, default=DEFAULT_MAX_CONCURRENT_REQUESTS): cv.positive_int,
+    vol.Optional(CONF_OPTIMISTIC, default=DEFAULT_OPTIMISTIC): cv.boolean,
+    vol.Optional(CONF_PUSH, default=DEFAULT_PUSH): cv.boolean,
+    vol.Optional(CONF_LAN, default=DEFAULT_LAN): cv.boolean,
+})
+
+PROFILE_SERVICE_SCHEMA: Final = vol.Schema({
+    vol.Optional(CONF_PROFILE_DURATION, default=DEFAULT_PROFILE_DURATION): vol.All(vol.Coerce(float), vol.Range(min=1, max=PROFILE_DURATION_MAX)),
+    vol.Optional(CONF_PROFILE_TOP, default=DEFAULT_PROFILE_TOP): vol.All(vol.Coerce(int), vol.Range(min=1)),
 })
 
 async def async_get_OPTIONS_GOVEELIFE_SCHEMA(current_data):
@@ -41,6 +69,12 @@ async def async_get_OPTIONS_GOVEELIFE_SCHEMA(current_data):
             vol.Required(CONF_API_KEY, default=current_data.get(CONF_API_KEY)): cv.string,
             vol.Optional(CONF_SCAN_INTERVAL, default=current_data.get(CONF_SCAN_INTERVAL,DEFAULT_POLL_INTERVAL)): cv.positive_int,
             vol.Optional(CONF_TIMEOUT, default=current_data.get(CONF_TIMEOUT,DEFAULT_TIMEOUT)): cv.positive_int,
+            vol.Optional(CONF_ADAPTIVE_POLLING, default=current_data.get(CONF_ADAPTIVE_POLLING,DEFAULT_ADAPTIVE_POLLING)): cv.boolean,
+            vol.Optional(CONF_SCAN_INTERVAL_MAX, default=current_data.get(CONF_SCAN_INTERVAL_MAX,DEFAULT_POLL_INTERVAL_MAX)): cv.positive_int,
+            vol.Optional(CONF_MAX_CONCURRENT_REQUESTS, default=current_data.get(CONF_MAX_CONCURRENT_REQUESTS,DEFAULT_MAX_CONCURRENT_REQUESTS)): cv.positive_int,
+            vol.Optional(CONF_OPTIMISTIC, default=current_data.get(CONF_OPTIMISTIC,DEFAULT_OPTIMISTIC)): cv.boolean,
+            vol.Optional(CONF_PUSH, default=current_data.get(CONF_PUSH,DEFAULT_PUSH)): cv.boolean,
+            vol.Optional(CONF_LAN, default=current_data.get(CONF_LAN,DEFAULT_LAN)): cv.boolean,
         })
         await asyncio.sleep(0)
         return OPTIONS_GOVEELIFE_SCHEMA
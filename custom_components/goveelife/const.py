@@ -6,18 +6,127 @@ from typing import Final
 DOMAIN: Final = 'goveelife'
 FUNC_OPTION_UPDATES: Final = 'options_update_listener'
 SUPPORTED_PLATFORMS: Final = [ "climate","switch","light","fan","sensor", "humidifier" ]
+
+#device types that are set up as one entity per device
+PLATFORM_DEVICE_TYPES: Final = {
+    'climate': [
+        'devices.types.heater',
+    ],
+    'light': [
+        'devices.types.light',
+    ],
+    'fan': [
+        'devices.types.air_purifier',
+        'devices.types.fan',
+    ],
+    'humidifier': [
+        'devices.types.humidifier',
+        'devices.types.dehumidifier',
+    ],
+}
+#patterns of '<device type>:<capability type>:<instance>' that are set up as one entity per capability
+PLATFORM_CAPABILITY_TYPES: Final = {
+    'sensor': [
+        'devices.types.sensor:.*',
+        'devices.types.thermometer:.*',
+    ],
+    'switch': [
+        'devices.types.heater:.*on_off:.*',
+        'devices.types.heater:.*toggle:oscillationToggle',
+        'devices.types.fan:.*toggle:oscillationToggle',
+        'devices.types.socket:.*on_off:.*',
+        'devices.types.socket:.*toggle:.*',
+        'devices.types.light:.*toggle:gradientToggle',
+        'devices.types.ice_maker:.*on_off:.*',
+        'devices.types.aroma_diffuser:.*on_off:.*',
+        'devices.types.humidifier:.*on_off:.*',
+        'devices.types.humidifier:.*toggle:nightlightToggle',
+        'devices.types.kettle:.*on_off:.*',
+    ],
+}
 STATE_DEBUG_FILENAME: Final = '/_diagnostics.json'
+TRANSPORT_RECORD_FILENAME: Final = '_record.jsonl'
+TRANSPORT_REPLAY_FILENAME: Final = '_replay.jsonl'
+TRANSPORT_RECORD_FLUSH: Final = 50
+PROFILE_FILENAME: Final = 'goveelife_profile_{}.prof'
+STATE_FRESHNESS: Final = 5
+STORAGE_VERSION: Final = 1
+STORAGE_KEY_DEVICES: Final = DOMAIN + '.{}.devices'
+STORAGE_KEY_PHASES: Final = DOMAIN + '.{}.phases'
+STORAGE_KEY_API_COUNT: Final = DOMAIN + '.{}.api_count'
 
 
 DEFAULT_TIMEOUT: Final = 10
 DEFAULT_POLL_INTERVAL: Final = 60
+DEFAULT_POLL_INTERVAL_MAX: Final = 900
+DEFAULT_ADAPTIVE_POLLING: Final = False
+DEFAULT_OPTIMISTIC: Final = False
+DEFAULT_PUSH: Final = False
+DEFAULT_LAN: Final = False
+DEFAULT_MAX_CONCURRENT_REQUESTS: Final = 10
 DEFAULT_NAME: Final = 'GoveeLife'
+DEFAULT_PROFILE_DURATION: Final = 30
+DEFAULT_PROFILE_TOP: Final = 20
 EVENT_PROPS_ID: Final = DOMAIN + '_property_message'
+SIGNAL_RATELIMIT_UPDATED: Final = DOMAIN + '_ratelimit_updated_{}'
+SIGNAL_API_COUNT_UPDATED: Final = DOMAIN + '_api_count_updated_{}'
+SIGNAL_THROTTLE_INTERVAL: Final = 30
+#hass.data keys outside the per entry data of DOMAIN
+DATA_PROFILE: Final = DOMAIN + '_profile'
 
 CONF_COORDINATORS: Final = 'coordinators'
 CONF_API_COUNT: Final = 'api_count'
+CONF_API_COUNT_STORE: Final = 'api_count_store'
+CONF_STATE_INFLIGHT: Final = 'state_inflight'
+CONF_STATE_UPDATED: Final = 'state_updated'
+CONF_STATE_PENDING: Final = 'state_pending'
+CONF_TRANSPORT: Final = 'transport'
+CONF_PLATFORM_PLAN: Final = 'platform_plan'
+CONF_SCHEDULER: Final = 'scheduler'
+CONF_CIRCUIT: Final = 'circuit_breaker'
+CONF_ROUTER: Final = 'router'
+CONF_PUSH: Final = 'push'
+CONF_LAN: Final = 'lan'
+CONF_RATELIMIT: Final = 'ratelimit'
+CONF_SIGNAL_THROTTLE: Final = 'signal_throttle'
 CONF_ENTRY_ID: Final = 'entry_id'
+CONF_PROFILE_DURATION: Final = 'duration'
+CONF_PROFILE_TOP: Final = 'top'
+CONF_ADAPTIVE_POLLING: Final = 'adaptive_polling'
+CONF_SCAN_INTERVAL_MAX: Final = 'scan_interval_max'
+CONF_MAX_CONCURRENT_REQUESTS: Final = 'max_concurrent_requests'
+
+API_DAILY_LIMIT: Final = 10000
+API_CONTROL_RESERVE: Final = 0.1
+API_COUNT_POLL: Final = 'poll'
+API_COUNT_CONTROL: Final = 'control'
+API_COUNT_HOURS: Final = 'hours'
+API_COUNT_SAVE_DELAY: Final = 60
+
+CIRCUIT_BACKOFF_BASE: Final = 30
+CIRCUIT_BACKOFF_MAX: Final = 3600
+CIRCUIT_BACKOFF_JITTER: Final = 0.2
+
+ROUTER_SMOOTHING: Final = 0.3
+ROUTER_ERROR_THRESHOLD: Final = 0.5
+ROUTER_PROBE_INTERVAL: Final = 60
+
+ADAPTIVE_POLLING_SMOOTHING: Final = 0.3
+POLL_PHASE_JITTER: Final = 2
 
 CLOUD_API_URL_DEVELOPER: Final = 'https://developer-api.govee.com/v1/appliance/devices/'
 CLOUD_API_URL_OPENAPI: Final = 'https://openapi.api.govee.com/router/api/v1'
 CLOUD_API_HEADER_KEY: Final = 'Govee-API-Key'
+CLOUD_MQTT_HOST: Final = 'mqtt.openapi.govee.com'
+CLOUD_MQTT_PORT: Final = 8883
+CLOUD_MQTT_TOPIC: Final = 'GA/{}'
+PUSH_POLL_INTERVAL: Final = 1800
+LAN_MULTICAST_ADDRESS: Final = '239.255.255.250'
+LAN_SCAN_PORT: Final = 4001
+LAN_LISTEN_PORT: Final = 4002
+LAN_CONTROL_PORT: Final = 4003
+LAN_SCAN_INTERVAL: Final = 300
+LAN_TIMEOUT: Final = 1
+LAN_CONFIRM_DELAY: Final = 0.1
+LAN_CLOUD_REFRESH: Final = 900
+PROFILE_DURATION_MAX: Final = 600
@@ -8,6 +8,8 @@ from typing import (
 )
 import logging
 import asyncio
+import sys
+import types
 
 from homeassistant.core import HomeAssistant
 from homeassistant.config_entries import ConfigEntry
@@ -21,6 +23,9 @@ from homeassistant.const import (
 
 from .const import (
     DOMAIN,
+    CONF_COORDINATORS,
+    CONF_RATELIMIT,
+    CONF_ROUTER,
 )
 
 REDACT_CONFIG = {CONF_API_KEY}
@@ -30,6 +35,112 @@ REDACT_CLOUD_STATES = {'dummy1', 'dummy2' }
 _LOGGER: Final = logging.getLogger(__name__)
 platform='diagnostics'
 
+#objects that are shared with home assistant or only reference code - never counted
+SIZE_OPAQUE_TYPES: Final = (
+    type,
+    types.ModuleType,
+    types.FunctionType,
+    types.BuiltinFunctionType,
+    types.MethodType,
+    types.CodeType,
+    types.FrameType,
+    types.TracebackType,
+    BaseException,
+    logging.Logger,
+    asyncio.AbstractEventLoop,
+    asyncio.Future,
+    asyncio.Handle,
+)
+
+
+def _retained_size(obj, seen: set) -> int:
+    """Return the approximate bytes retained by an object - objects in seen are not counted (again)"""
+    size = 0
+    stack = [obj]
+    while stack:
+        o = stack.pop()
+        if id(o) in seen or isinstance(o, SIZE_OPAQUE_TYPES):
+            continue
+        seen.add(id(o))
+        size += sys.getsizeof(o)
+        if isinstance(o, dict):
+            stack.extend(o.keys())
+            stack.extend(o.values())
+        elif isinstance(o, (list, tuple, set, frozenset)):
+            stack.extend(o)
+        else:
+            stack.extend(getattr(o, name, None) for klass in type(o).__mro__ for name in getattr(klass, '__slots__', ()))
+            if hasattr(o, '__dict__'):
+                stack.append(o.__dict__)
+    return size
+
+
+def _entity_containers(entity) -> list:
+    """Return the mapping and list attributes the integration classes of an entity define or assign"""
+    names = set()
+    for klass in type(entity).__mro__:
+        if not klass.__module__.startswith(__package__):
+            continue
+        for name, value in vars(klass).items():
+            names.add(name)
+            code = getattr(value, '__code__', None)
+            if not code is None:
+                names.update(code.co_names)
+    containers = []
+    for name in sorted(names):
+        #looked up without getattr - properties are not evaluated
+        value = vars(entity).get(name, None)
+        if value is None:
+            value = next((vars(klass)[name] for klass in type(entity).__mro__ if name in vars(klass)), None)
+        if isinstance(value, (dict, list, set, frozenset)):
+            containers.append(value)
+    return containers
+
+
+def _memory_footprint(hass: HomeAssistant, entry: ConfigEntry) -> dict:
+    """Return the approximate retained bytes per structure, device and sku - shared objects count for the first owner"""
+    entry_data = hass.data[DOMAIN][entry.entry_id]
+    coordinators = entry_data.get(CONF_COORDINATORS, {})
+    entities = {}
+    for d, coordinator in coordinators.items():
+        for update_callback, _ in list(getattr(coordinator, '_listeners', {}).values()):
+            entity = getattr(update_callback, '__self__', None)
+            if not entity is None:
+                entities.setdefault(d, []).append(entity)
+    #home assistant objects and the entity objects themselves are not owned by a single structure
+    seen = {id(hass), id(entry), id(hass.data), id(hass.data[DOMAIN])}
+    seen.update(id(coordinator) for coordinator in coordinators.values())
+    seen.update(id(entity) for v in entities.values() for entity in v)
+
+    devices = {}
+    for device_cfg in entry_data.get(CONF_DEVICES, []):
+        devices[device_cfg.get('device')] = {'sku': device_cfg.get('sku', None), 'device_config': _retained_size(device_cfg, seen)}
+    for d, state in entry_data.get(CONF_STATE, {}).items():
+        devices.setdefault(d, {'sku': getattr(state, 'sku', None)})['state'] = _retained_size(state, seen)
+    for d, coordinator in coordinators.items():
+        devices.setdefault(d, {'sku': None})['coordinator'] = sys.getsizeof(coordinator) + _retained_size(vars(coordinator), seen)
+    for d, v in entities.items():
+        #class level mappings are shared by all entities of a platform - they count for the first entity
+        devices[d]['entities'] = sum(sys.getsizeof(entity) + sum(_retained_size(c, seen) for c in _entity_containers(entity)) for entity in v)
+        devices[d]['entity_count'] = len(v)
+
+    structures = {'device_config': 0, 'state': 0, 'coordinator': 0, 'entities': 0}
+    skus = {}
+    for d, v in devices.items():
+        for k in structures:
+            v.setdefault(k, 0)
+            structures[k] += v[k]
+        v.setdefault('entity_count', 0)
+        v['total'] = sum(v[k] for k in structures)
+        sku = skus.setdefault(v['sku'], {'devices': 0, 'total': 0})
+        sku['devices'] += 1
+        sku['total'] += v['total']
+    for sku in skus.values():
+        sku['per_device'] = sku['total'] // sku['devices']
+    #everything else the entry holds - transport, scheduler, request counter, routing, push and lan clients
+    structures['runtime'] = _retained_size(entry_data, seen)
+    return {'total': sum(structures.values()), 'structures': structures, 'devices': devices, 'skus': skus}
+
 async def async_get_config_entry_diagnostics( hass: HomeAssistant, entry: ConfigEntry ) -> dict[str, Any]:
     """Return diagnostics for a config entry."""
     _LOGGER.debug("Returning %s platform entry: %s", platform, entry.entry_id) 
@@ -50,16 +161,39 @@ async def async_get_config_entry_diagnostics( hass: HomeAssistant, entry: Config
         
     try:
         _LOGGER.debug("%s - async_get_config_entry_diagnostics %s: Add cloud received device states", entry.entry_id, platform)
-        diag["cloud_states"] = async_redact_data(entry_data[CONF_STATE], REDACT_CLOUD_STATES)
+        cloud_states = {d: state.as_dict() for d, state in entry_data[CONF_STATE].items()}
+        diag["cloud_states"] = async_redact_data(cloud_states, REDACT_CLOUD_STATES)
     except Exception as e:
         _LOGGER.error("%s - async_get_config_entry_diagnostics %s: Add cloud received device states: %s (%s.%s)", entry.entry_id, platform, str(e), e.__class__.__module__, type(e).__name__)
         #return False
 
     try:
-        _LOGGER.debug("%s - async_get_config_entry_diagnostics %s: Add python module [goveelife] version", entry.entry_id, platform)
-        diag["py_module_requests"] = version('requests')
+        _LOGGER.debug("%s - async_get_config_entry_diagnostics %s: Add cloud reported rate limit", entry.entry_id, platform)
+        diag["cloud_ratelimit"] = entry_data.get(CONF_RATELIMIT, None)
+    except Exception as e:
+        _LOGGER.error("%s - async_get_config_entry_diagnostics %s: Add cloud reported rate limit failed: %s (%s.%s)", entry.entry_id, platform, str(e), e.__class__.__module__, type(e).__name__)
+        #return False
+
+    try:
+        _LOGGER.debug("%s - async_get_config_entry_diagnostics %s: Add request routing", entry.entry_id, platform)
+        router = entry_data.get(CONF_ROUTER, None)
+        diag["routing"] = None if router is None else async_redact_data(router.as_dict(), REDACT_CLOUD_STATES)
+    except Exception as e:
+        _LOGGER.error("%s - async_get_config_entry_diagnostics %s: Add request routing failed: %s (%s.%s)", entry.entry_id, platform, str(e), e.__class__.__module__, type(e).__name__)
+        #return False
+
+    try:
+        _LOGGER.debug("%s - async_get_config_entry_diagnostics %s: Add memory footprint", entry.entry_id, platform)
+        diag["memory"] = async_redact_data(_memory_footprint(hass, entry), REDACT_CLOUD_STATES)
+    except Exception as e:
+        _LOGGER.error("%s - async_get_config_entry_diagnostics %s: Add memory footprint failed: %s (%s.%s)", entry.entry_id, platform, str(e), e.__class__.__module__, type(e).__name__)
+        #return False
+
+    try:
+        _LOGGER.debug("%s - async_get_config_entry_diagnostics %s: Add python module [aiohttp] version", entry.entry_id, platform)
+        diag["py_module_aiohttp"] = version('aiohttp')
     except Exception as e:
-        _LOGGER.error("%s - async_get_config_entry_diagnostics %s: Add python module [goveelife] version failed: %s (%s.%s)", entry.entry_id, platform, str(e), e.__class__.__module__, type(e).__name__)
+        _LOGGER.error("%s - async_get_config_entry_diagnostics %s: Add python module [aiohttp] version failed: %s (%s.%s)", entry.entry_id, platform, str(e), e.__class__.__module__, type(e).__name__)
         #return False
 
     return diag
@@ -3,19 +3,20 @@
 from __future__ import annotations
 from typing import Final
 import logging
-import os
+import math
 from datetime import timedelta
 
 import async_timeout
 
 from homeassistant.core import HomeAssistant, callback
 from homeassistant.config_entries import ConfigEntry
+from homeassistant.exceptions import ConfigEntryAuthFailed
 from homeassistant.helpers.entity import (
     DeviceInfo,
     Entity,
     generate_entity_id,
 )
-from homeassistant.helpers.update_coordinator import CoordinatorEntity, DataUpdateCoordinator
+from homeassistant.helpers.update_coordinator import CoordinatorEntity, DataUpdateCoordinator, UpdateFailed
 from homeassistant.const import (
     CONF_FRIENDLY_NAME,
     CONF_PARAMS,
@@ -26,12 +27,23 @@ from homeassistant.const import (
 )
 
 from .const import (
+    ADAPTIVE_POLLING_SMOOTHING,
+    CONF_ADAPTIVE_POLLING,
+    CONF_PUSH,
+    CONF_SCHEDULER,
+    CONF_SCAN_INTERVAL_MAX,
+    CONF_STATE_PENDING,
+    DEFAULT_ADAPTIVE_POLLING,
     DEFAULT_NAME,
+    DEFAULT_POLL_INTERVAL_MAX,
     DOMAIN,
-    STATE_DEBUG_FILENAME, 
+    PUSH_POLL_INTERVAL,
 )
 
-from .utils import async_GoveeAPI_GetDeviceState
+from .utils import (
+    async_GoveeAPI_GetDeviceState,
+    GoveeAPI_GetPlannedPollInterval,
+)
 
 _LOGGER: Final = logging.getLogger(__name__)
 
@@ -65,10 +77,15 @@ class GoveeLifePlatformEntity(CoordinatorEntity, Entity):
             #self._attributes['description'] = self._entity_cfg.get('description', None)
             self._state = STATE_UNKNOWN
 
-            super().__init__(coordinator)
+            #capability entities are only notified if their capability changed - device entities on any change
+            cap = kwargs.get('cap', None)
+            self._capability_keys = None if cap is None else frozenset([(cap.get('type', None), cap.get('instance', None))])
+            super().__init__(coordinator, self._capability_keys)
 
             #_LOGGER.debug("%s - %s: __init__ kwargs = %s", self._api_id, self._identifier, kwargs)
             self._init_platform_specific(**kwargs)
+            self._available = False
+            self._update_state_view()
             self.entity_id = generate_entity_id(platform + '.{}', self._entity_id, hass=hass)
             _LOGGER.debug("%s - %s: __init__ complete (uid: %s)", self._api_id, self._identifier, self.uniqueid)
             #ProgrammingDebug(self,True)
@@ -83,6 +100,30 @@ class GoveeLifePlatformEntity(CoordinatorEntity, Entity):
         #do not put actions in a try / except block - execeptions should be covered by __init__
         pass        
 
+    def _update_state_view(self):
+        """Decode the cached device state into the values the properties return - once per state change"""
+        #platforms extend this and call it via super() - properties only return the decoded values
+        try:
+            d = self._device_cfg.get('device')
+            entry_data = self.hass.data[DOMAIN][self._entry_id]
+            self._available = entry_data[CONF_STATE][d].online
+            #optimistic control states that are not confirmed yet
+            pending = entry_data.get(CONF_STATE_PENDING, {}).get(d, {})
+            if any(self._capability_keys is None or key in self._capability_keys for key in pending):
+                self._attributes['pending'] = True
+            else:
+                self._attributes.pop('pending', None)
+        except Exception as e:
+            _LOGGER.error("%s - %s: _update_state_view failed: %s (%s.%s)", self._api_id, self._identifier, str(e), e.__class__.__module__, type(e).__name__)
+            self._available = False
+
+    @callback
+    def _async_write_state_view(self) -> None:
+        """Decode the cached device state and write the entity state."""
+        #the only write path - control commands are published through the coordinator to all entities of a capability
+        self._update_state_view()
+        self.async_write_ha_state()
+
     @property
     def name(self) -> str | None:
         """Return the name of the entity."""
@@ -137,21 +178,7 @@ class GoveeLifePlatformEntity(CoordinatorEntity, Entity):
     def available(self) -> bool:
         """Return if device is available."""
         #_LOGGER.debug("%s - %s: available", self._api_id, self._identifier)        
-        try:
-            entry_data = self.hass.data[DOMAIN][self._entry_id]
-            d = self._device_cfg.get('device')
-            capabilities = entry_data[CONF_STATE][d].get('capabilities', [])
-            value=False
-            for cap in capabilities:
-                if cap['type'] == 'devices.capabilities.online':
-                    cap_state = cap.get('state',None)
-                    if not cap_state == None:
-                        value = cap_state.get('value',False)
-            #_LOGGER.debug("%s - %s: available result: %s", self._api_id, self._identifier, value) 
-            return value
-        except Exception as e:
-            _LOGGER.error("%s - available: Failed: %s (%s.%s)", self._entry_id, str(e), e.__class__.__module__, type(e).__name__)
-            return False
+        return self._available
 
     @property
     def device_info(self) -> DeviceInfo:
@@ -170,10 +197,8 @@ class GoveeLifePlatformEntity(CoordinatorEntity, Entity):
     @callback
     def _handle_coordinator_update(self) -> None:
         """Handle updated data from the coordinator."""
-        d = self._device_cfg.get('device')
-        state_data = self.hass.data[DOMAIN][self._entry_id][CONF_STATE][d]
         #_LOGGER.debug("%s - %s: _handle_coordinator_update: new state: %s", self._api_id, self._identifier, s)
-        self.async_write_ha_state()
+        self._async_write_state_view()
 
 
 class GoveeAPIUpdateCoordinator(DataUpdateCoordinator):
@@ -184,14 +209,83 @@ class GoveeAPIUpdateCoordinator(DataUpdateCoordinator):
         self._identifier = (str(device_cfg['device']).replace(':', '')) + '_GoveeAPIUpdate'
         _LOGGER.debug("%s - async_GoveeAPI_GetDeviceState: __init__", self._identifier)
         scan_interval = hass.data[DOMAIN][entry_id][CONF_PARAMS][CONF_SCAN_INTERVAL]
-        super().__init__(hass, _LOGGER, name=self._identifier, update_interval=timedelta(seconds=scan_interval))
+        scan_interval = max(scan_interval, GoveeAPI_GetPlannedPollInterval(hass, entry_id))
+        #no update_interval - polls are triggered by the GoveeAPIPollScheduler of the entry
+        super().__init__(hass, _LOGGER, name=self._identifier)
         self._entry_id = entry_id
         self._device_cfg = device_cfg
+        self._change_rate = 1.0
+        self._changed = None
+        self.poll_interval = timedelta(seconds=scan_interval)
+
+    @callback
+    def async_notify_capabilities(self, keys) -> None:
+        """Notify the listeners of capabilities that changed outside a poll - e.g. control responses and optimistic states."""
+        self._changed = set(keys)
+        self.async_update_listeners()
+
+    @callback
+    def async_update_listeners(self) -> None:
+        """Notify the listeners whose capabilities changed with the last update - all if unknown."""
+        changed, self._changed = self._changed, None
+        if changed is None:
+            return super().async_update_listeners()
+        if not changed:
+            _LOGGER.debug("%s - GoveeAPIUpdateCoordinator: state unchanged - no listener notified", self._identifier)
+            return None
+        for update_callback, context in list(self._listeners.values()):
+            if context is None or not context.isdisjoint(changed):
+                update_callback()
+
+    def _get_scan_interval(self) -> int:
+        """Return the poll interval in seconds before quota planning is applied."""
+        entry_data = self.hass.data[DOMAIN][self._entry_id]
+        scan_interval = entry_data.get(CONF_SCAN_INTERVAL)
+        if scan_interval is None:
+            scan_interval = entry_data[CONF_PARAMS][CONF_SCAN_INTERVAL]
+
+        if entry_data[CONF_PARAMS].get(CONF_ADAPTIVE_POLLING, DEFAULT_ADAPTIVE_POLLING):
+            #quiet devices are stretched from the configured interval up to the ceiling
+            scan_interval_max = max(entry_data[CONF_PARAMS].get(CONF_SCAN_INTERVAL_MAX, DEFAULT_POLL_INTERVAL_MAX), scan_interval)
+            scan_interval = min(math.ceil(scan_interval / max(self._change_rate, 0.001)), scan_interval_max)
+
+        push = entry_data.get(CONF_PUSH, None)
+        if not push is None and push.connected and self._device_cfg.get('device') in push.devices:
+            #updates arrive by push - polling is only a safety net
+            scan_interval = max(scan_interval, PUSH_POLL_INTERVAL)
+        return scan_interval
+
+    def _set_poll_interval(self) -> None:
+        """Apply the adaptive and quota planned poll interval."""
+        scan_interval = self._get_scan_interval()
+
+        #never poll faster than the remaining daily budget allows
+        planned_interval = GoveeAPI_GetPlannedPollInterval(self.hass, self._entry_id)
+        if planned_interval > scan_interval:
+            _LOGGER.debug("%s - GoveeAPIUpdateCoordinator: poll interval stretched by quota planner: %s -> %s seconds", self._identifier, scan_interval, planned_interval)
+            scan_interval = planned_interval
+
+        scan_interval = timedelta(seconds=scan_interval)
+        if scan_interval != self.poll_interval:
+            _LOGGER.debug("%s - GoveeAPIUpdateCoordinator: poll interval changed: %s -> %s", self._identifier, self.poll_interval, scan_interval)
+            self.poll_interval = scan_interval
+
+    @callback
+    def async_reset_poll_interval(self) -> None:
+        """Return to fast polling - e.g. after a control command was sent."""
+        self._change_rate = 1.0
+        self._set_poll_interval()
+        scheduler = self.hass.data[DOMAIN][self._entry_id].get(CONF_SCHEDULER, None)
+        if scheduler is not None:
+            scheduler.async_schedule(self._device_cfg.get('device'), self.poll_interval.total_seconds(), earlier_only=True)
 
     async def _async_update_data(self):
         """Fetch data from the API endpoint."""
+        self._changed = set()
         try:
             entry_data = self.hass.data[DOMAIN][self._entry_id]
+            d = self._device_cfg.get('device')
+            previous_state = entry_data.get(CONF_STATE, {}).get(d, None)
             async with async_timeout.timeout(entry_data[CONF_PARAMS][CONF_TIMEOUT]):
                 result = await async_GoveeAPI_GetDeviceState(self.hass, self._entry_id, self._device_cfg, True)
         except Exception as e:
@@ -199,18 +293,24 @@ class GoveeAPIUpdateCoordinator(DataUpdateCoordinator):
             return False
 
         try:
-            scan_interval = entry_data.get(CONF_SCAN_INTERVAL)
-            debug_file = os.path.dirname(os.path.realpath(__file__)) + STATE_DEBUG_FILENAME
-            if os.path.isfile(debug_file) and scan_interval is None:
-                scan_interval = 3600
-                _LOGGER.info("%s - GoveeAPIUpdateCoordinator: debug poll interval is %s seconds", DOMAIN, scan_interval)
-
-            if scan_interval is not None:
-                scan_interval = timedelta(seconds=scan_interval)
-                if scan_interval != self.update_interval:
-                    self.update_interval = scan_interval
+            if result is True:
+                current_state = entry_data[CONF_STATE].get(d, None)
+                if previous_state is None or current_state is None or not previous_state.online == current_state.online:
+                    #availability of all entities of the device changes
+                    self._changed = None
+                else:
+                    self._changed = current_state.changed_capabilities(previous_state)
+                if not self._changed == set():
+                    #snap back to fast polling as soon as something happens
+                    self._change_rate = 1.0
+                else:
+                    self._change_rate = (1 - ADAPTIVE_POLLING_SMOOTHING) * self._change_rate
+            self._set_poll_interval()
         except Exception as e:
             _LOGGER.warning("%s - GoveeAPIUpdateCoordinator: _async_update_data update interval change failed: %s (%s.%s)", self._entry_id, str(e), e.__class__.__module__, type(e).__name__)
 
-        if result == 429 or result == 401:      
+        if result == 401:
             raise ConfigEntryAuthFailed
+        if result == 429 or (isinstance(result, int) and not isinstance(result, bool) and result >= 500):
+            #rate limited or cloud failure - the circuit breaker pauses polling, the entry stays set up
+            raise UpdateFailed("cloud request failed: %s" % result)
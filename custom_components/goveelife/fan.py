@@ -1,7 +1,6 @@
 """Sensor entities for the Govee Life integration."""
 
 import logging
-import asyncio
 
 from homeassistant.core import HomeAssistant
 from homeassistant.config_entries import ConfigEntry
@@ -14,15 +13,11 @@ from homeassistant.const import (
 )
 
 from .entities import GoveeLifePlatformEntity
-from .const import DOMAIN, CONF_COORDINATORS
+from .const import DOMAIN, CONF_COORDINATORS, CONF_PLATFORM_PLAN
 from .utils import GoveeAPI_GetCachedStateValue, async_GoveeAPI_ControlDevice
 
 _LOGGER = logging.getLogger(__name__)
 PLATFORM = 'fan'
-PLATFORM_DEVICE_TYPES = [
-    'devices.types.air_purifier',
-    'devices.types.fan'
-]
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry, async_add_entities):
     """Set up the fan platform."""
@@ -30,24 +25,20 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry, async_add_e
     entities = []
 
     try:
-        _LOGGER.debug("%s - async_setup_entry %s: Getting cloud devices from data store", entry.entry_id, PLATFORM)
+        _LOGGER.debug("%s - async_setup_entry %s: Getting platform plan from data store", entry.entry_id, PLATFORM)
         entry_data = hass.data[DOMAIN][entry.entry_id]
-        api_devices = entry_data.get('devices', [])
+        platform_plan = entry_data[CONF_PLATFORM_PLAN][PLATFORM]
     except Exception as e:
-        _LOGGER.error("%s - async_setup_entry %s: Getting cloud devices from data store failed: %s (%s.%s)", entry.entry_id, PLATFORM, str(e), e.__class__.__module__, type(e).__name__)
+        _LOGGER.error("%s - async_setup_entry %s: Getting platform plan from data store failed: %s (%s.%s)", entry.entry_id, PLATFORM, str(e), e.__class__.__module__, type(e).__name__)
         return False
 
-    for device_cfg in api_devices:
+    for device_cfg, capability in platform_plan:
         try:
-            if device_cfg.get('type', STATE_UNKNOWN) not in PLATFORM_DEVICE_TYPES:
-                continue
-
             device_id = device_cfg.get('device')
             _LOGGER.debug("%s - async_setup_entry %s: Setup device: %s", entry.entry_id, PLATFORM, device_id)
             coordinator = entry_data[CONF_COORDINATORS][device_id]
             entity = GoveeLifeFan(hass, entry, coordinator, device_cfg, platform=PLATFORM)
             entities.append(entity)
-            await asyncio.sleep(0)
         except Exception as e:
             _LOGGER.error("%s - async_setup_entry %s: Setup device failed: %s (%s.%s)", entry.entry_id, PLATFORM, str(e), e.__class__.__module__, type(e).__name__)
             return False
@@ -99,16 +90,39 @@ class GoveeLifeFan(FanEntity, GoveeLifePlatformEntity):
                                 self._attr_preset_modes.append(valueOption['name'])
                                 self._attr_preset_modes_mapping_set[valueOption['name']] = {"workMode": self._attr_preset_modes_mapping[valueOption['name']], "modeValue": valueOption['value']}
 
+        #reverse lookup of the reported work mode - the first preset mode wins
+        self._preset_modes_lookup = {}
+        for name, v in self._attr_preset_modes_mapping_set.items():
+            self._preset_modes_lookup.setdefault((v['workMode'], v['modeValue']), name)
+
+    def _update_state_view(self):
+        """Decode the cached device state into the values the properties return."""
+        super()._update_state_view()
+        d = self._device_cfg.get('device')
+        value = GoveeAPI_GetCachedStateValue(self.hass, self._entry_id, d, 'devices.capabilities.on_off', 'powerSwitch')
+        self._state = self._state_mapping.get(value, STATE_UNKNOWN)
+        self._attr_is_on = self._state == STATE_ON
+
+        self._attr_preset_mode = None
+        if self._attr_supported_features & FanEntityFeature.PRESET_MODE:
+            value = GoveeAPI_GetCachedStateValue(self.hass, self._entry_id, d, 'devices.capabilities.work_mode', 'workMode')
+            if value is None:
+                return None
+            v = (value.get('workMode', None), value.get('modeValue', None))
+            self._attr_preset_mode = self._preset_modes_lookup.get(v, STATE_UNKNOWN)
+            if self._attr_preset_mode == STATE_UNKNOWN:
+                _LOGGER.warning("%s - %s: preset_mode: invalid value: %s", self._api_id, self._identifier, value)
+                _LOGGER.debug("%s - %s: preset_mode: valid are: %s", self._api_id, self._identifier, self._attr_preset_modes_mapping_set)
+
     @property
     def state(self) -> str | None:
         """Return the current state of the entity."""
-        value = GoveeAPI_GetCachedStateValue(self.hass, self._entry_id, self._device_cfg.get('device'), 'devices.capabilities.on_off', 'powerSwitch')
-        return self._state_mapping.get(value, STATE_UNKNOWN)
+        return self._state
 
     @property
     def is_on(self) -> bool:
         """Return true if entity is on."""
-        return self.state == STATE_ON
+        return self._attr_is_on
 
     async def async_turn_on(self, speed: str = None, mode: str = None, **kwargs) -> None:
         """Async: Turn entity on."""
@@ -120,8 +134,7 @@ class GoveeLifeFan(FanEntity, GoveeLifePlatformEntity):
                     "instance": 'powerSwitch',
                     "value": self._state_mapping_set[STATE_ON]
                 }
-                if await async_GoveeAPI_ControlDevice(self.hass, self._entry_id, self._device_cfg, state_capability):
-                    self.async_write_ha_state()
+                await async_GoveeAPI_ControlDevice(self.hass, self._entry_id, self._device_cfg, state_capability)
             else:
                 _LOGGER.debug("%s - %s: async_turn_on: device already on", self._api_id, self._identifier)
         except Exception as e:
@@ -137,8 +150,7 @@ class GoveeLifeFan(FanEntity, GoveeLifePlatformEntity):
                     "instance": 'powerSwitch',
                     "value": self._state_mapping_set[STATE_OFF]
                 }
-                if await async_GoveeAPI_ControlDevice(self.hass, self._entry_id, self._device_cfg, state_capability):
-                    self.async_write_ha_state()
+                await async_GoveeAPI_ControlDevice(self.hass, self._entry_id, self._device_cfg, state_capability)
             else:
                 _LOGGER.debug("%s - %s: async_turn_on: device already off", self._api_id, self._identifier)
         except Exception as e:
@@ -147,16 +159,7 @@ class GoveeLifeFan(FanEntity, GoveeLifePlatformEntity):
     @property
     def preset_mode(self) -> str | None:
         """Return the preset_mode of the entity."""
-        value = GoveeAPI_GetCachedStateValue(self.hass, self._entry_id, self._device_cfg.get('device'), 'devices.capabilities.work_mode', 'workMode')
-        v = {"workMode": value['workMode'], "modeValue": value['modeValue']}
-        key_list = [key for key, val in self._attr_preset_modes_mapping_set.items() if val == v]
-
-        if key_list:
-            return key_list[0]
-        else:
-            _LOGGER.warning("%s - %s: preset_mode: invalid value: %s", self._api_id, self._identifier, v)
-            _LOGGER.debug("%s - %s: preset_mode: valid are: %s", self._api_id, self._identifier, self._attr_preset_modes_mapping_set)
-            return STATE_UNKNOWN
+        return self._attr_preset_mode
 
     async def async_set_preset_mode(self, preset_mode: str) -> None:
         """Set new target preset mode."""
@@ -165,5 +168,4 @@ class GoveeLifeFan(FanEntity, GoveeLifePlatformEntity):
             "instance": "workMode",
             "value": self._attr_preset_modes_mapping_set[preset_mode]
         }
-        if await async_GoveeAPI_ControlDevice(self.hass, self._entry_id, self._device_cfg, state_capability):
-            self.async_write_ha_state()
+        await async_GoveeAPI_ControlDevice(self.hass, self._entry_id, self._device_cfg, state_capability)
@@ -3,7 +3,6 @@
 from __future__ import annotations
 from typing import Final
 import logging
-import asyncio
 
 from homeassistant.core import HomeAssistant
 from homeassistant.config_entries import ConfigEntry
@@ -16,22 +15,17 @@ from homeassistant.components.humidifier import (
     HumidifierEntityFeature,
 )
 from homeassistant.const import (
-    CONF_DEVICES,
     STATE_ON,
     STATE_OFF,
     STATE_UNKNOWN,
 )
 
 from .entities import GoveeLifePlatformEntity
-from .const import DOMAIN, CONF_COORDINATORS
+from .const import DOMAIN, CONF_COORDINATORS, CONF_PLATFORM_PLAN
 from .utils import GoveeAPI_GetCachedStateValue, async_GoveeAPI_ControlDevice
 
 _LOGGER: Final = logging.getLogger(__name__)
 platform = 'humidifier'
-platform_device_types = [
-    'devices.types.humidifier',
-    'devices.types.dehumidifier'
-]
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry, async_add_entities):
     """Set up the humidifier platform."""
@@ -39,23 +33,20 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry, async_add_e
     entities = []
         
     try:
-        _LOGGER.debug("%s - async_setup_entry %s: Getting cloud devices from data store", entry.entry_id, platform)
+        _LOGGER.debug("%s - async_setup_entry %s: Getting platform plan from data store", entry.entry_id, platform)
         entry_data = hass.data[DOMAIN][entry.entry_id]
-        api_devices = entry_data[CONF_DEVICES]
+        platform_plan = entry_data[CONF_PLATFORM_PLAN][platform]
     except Exception as e:
-        _LOGGER.error("%s - async_setup_entry %s: Getting cloud devices from data store failed: %s (%s.%s)", entry.entry_id, platform, str(e), e.__class__.__module__, type(e).__name__)
+        _LOGGER.error("%s - async_setup_entry %s: Getting platform plan from data store failed: %s (%s.%s)", entry.entry_id, platform, str(e), e.__class__.__module__, type(e).__name__)
         return False
 
-    for device_cfg in api_devices:
+    for device_cfg, capability in platform_plan:
         try:
-            if device_cfg.get('type', STATE_UNKNOWN) not in platform_device_types:
-                continue      
             device = device_cfg.get('device')
             _LOGGER.debug("%s - async_setup_entry %s: Setup device: %s", entry.entry_id, platform, device) 
             coordinator = entry_data[CONF_COORDINATORS][device]
             entity = GoveeLifeHumidifier(hass, entry, coordinator, device_cfg, platform=platform)
             entities.append(entity)
-            await asyncio.sleep(0)
         except Exception as e:
             _LOGGER.error("%s - async_setup_entry %s: Setup device failed: %s (%s.%s)", entry.entry_id, platform, str(e), e.__class__.__module__, type(e).__name__)
             return False
@@ -121,20 +112,27 @@ class GoveeLifeHumidifier(HumidifierEntity, GoveeLifePlatformEntity):
             else:
                 _LOGGER.debug("%s - %s: _init_platform_specific: cap unhandled: %s", self._api_id, self._identifier, cap)
 
+    def _update_state_view(self):
+        """Decode the cached device state into the values the properties return."""
+        super()._update_state_view()
+        d = self._device_cfg.get('device')
+        value = GoveeAPI_GetCachedStateValue(self.hass, self._entry_id, d, 'devices.capabilities.on_off', 'powerSwitch')
+        self._state = self._state_mapping.get(value, STATE_UNKNOWN)
+        if self._state == STATE_UNKNOWN:
+            _LOGGER.warning("%s - %s: state: invalid value: %s", self._api_id, self._identifier, value)
+            _LOGGER.debug("%s - %s: state: valid are: %s", self._api_id, self._identifier, self._state_mapping)
+        self._attr_is_on = self._state == STATE_ON
+        self._attr_current_humidity = GoveeAPI_GetCachedStateValue(self.hass, self._entry_id, d, 'devices.capabilities.property', 'sensorHumidity')
+
     @property
     def current_humidity(self) -> float:
         """Return current humidity."""
-        value = GoveeAPI_GetCachedStateValue(self.hass, self._entry_id, self._device_cfg.get('device'), 'devices.capabilities.on_off', 'powerSwitch')
-        v = self._state_mapping.get(value, STATE_UNKNOWN)
-        if v == STATE_UNKNOWN:
-            _LOGGER.warning("%s - %s: state: invalid value: %s", self._api_id, self._identifier, value)
-            _LOGGER.debug("%s - %s: state: valid are: %s", self._api_id, self._identifier, self._state_mapping)
-        return v
+        return self._attr_current_humidity
 
     @property
     def is_on(self) -> bool:
         """Return true if entity is on."""
-        return self.state == STATE_ON
+        return self._attr_is_on
 
     @property
     def mode(self) -> str | None:
@@ -151,8 +149,7 @@ class GoveeLifeHumidifier(HumidifierEntity, GoveeLifePlatformEntity):
                     "instance": 'powerSwitch',
                     "value": self._state_mapping_set[STATE_ON]
                 }
-                if await async_GoveeAPI_ControlDevice(self.hass, self._entry_id, self._device_cfg, state_capability):
-                    self.async_write_ha_state()
+                await async_GoveeAPI_ControlDevice(self.hass, self._entry_id, self._device_cfg, state_capability)
             else:
                 _LOGGER.debug("%s - %s: async_turn_on: device already on", self._api_id, self._identifier)
         except Exception as e:
@@ -168,8 +165,7 @@ class GoveeLifeHumidifier(HumidifierEntity, GoveeLifePlatformEntity):
                     "instance": 'powerSwitch',
                     "value": self._state_mapping_set[STATE_OFF]
                 }
-                if await async_GoveeAPI_ControlDevice(self.hass, self._entry_id, self._device_cfg, state_capability):
-                    self.async_write_ha_state()
+                await async_GoveeAPI_ControlDevice(self.hass, self._entry_id, self._device_cfg, state_capability)
             else:
                 _LOGGER.debug("%s - %s: async_turn_on: device already off", self._api_id, self._identifier)
         except Exception as e:
@@ -182,5 +178,4 @@ class GoveeLifeHumidifier(HumidifierEntity, GoveeLifePlatformEntity):
             "instance": "workMode",
             "value": self._attr_preset_modes_mapping_set[preset_mode]
         }
-        if await async_GoveeAPI_ControlDevice(self.hass, self._entry_id, self._device_cfg, state_capability):
-            self.async_write_ha_state()
+        await async_GoveeAPI_ControlDevice(self.hass, self._entry_id, self._device_cfg, state_capability)
@@ -0,0 +1,267 @@
+"""Local LAN control for the Govee Life integration."""
+
+from __future__ import annotations
+from typing import Final
+import logging
+import asyncio
+import errno
+import json
+import socket
+import time
+from datetime import timedelta
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.const import CONF_STATE
+
+from .const import (
+    DOMAIN,
+    LAN_CLOUD_REFRESH,
+    LAN_CONFIRM_DELAY,
+    LAN_CONTROL_PORT,
+    LAN_LISTEN_PORT,
+    LAN_MULTICAST_ADDRESS,
+    LAN_SCAN_INTERVAL,
+    LAN_SCAN_PORT,
+    LAN_TIMEOUT,
+)
+
+_LOGGER: Final = logging.getLogger(__name__)
+
+CAPABILITY_ONLINE: Final = ('devices.capabilities.online', 'online')
+CAPABILITY_POWER: Final = ('devices.capabilities.on_off', 'powerSwitch')
+CAPABILITY_BRIGHTNESS: Final = ('devices.capabilities.range', 'brightness')
+CAPABILITY_RGB: Final = ('devices.capabilities.color_setting', 'colorRgb')
+CAPABILITY_COLOR_TEMP: Final = ('devices.capabilities.color_setting', 'colorTemperatureK')
+
+
+def _lan_command(capability: dict) -> dict | None:
+    """Return the LAN message of a control capability - None if the LAN API does not cover it."""
+    key = (capability.get('type', None), capability.get('instance', None))
+    value = capability.get('value', None)
+    if key == CAPABILITY_POWER:
+        return {"cmd": "turn", "data": {"value": 1 if value else 0}}
+    if key == CAPABILITY_BRIGHTNESS:
+        return {"cmd": "brightness", "data": {"value": min(max(int(value), 1), 100)}}
+    if key == CAPABILITY_RGB:
+        value = int(value)
+        return {"cmd": "colorwc", "data": {"color": {"r": (value >> 16) & 255, "g": (value >> 8) & 255, "b": value & 255}, "colorTemInKelvin": 0}}
+    if key == CAPABILITY_COLOR_TEMP:
+        #a color temperature other than 0 takes precedence over the color
+        return {"cmd": "colorwc", "data": {"color": {"r": 0, "g": 0, "b": 0}, "colorTemInKelvin": int(value)}}
+    return None
+
+
+def _lan_capabilities(status: dict) -> dict:
+    """Return the capability states of a devStatus reply keyed by (type, instance) - None if the reply lacks a value."""
+    color = status.get('color', None)
+    return {
+        CAPABILITY_ONLINE: True,
+        CAPABILITY_POWER: status.get('onOff', None),
+        CAPABILITY_BRIGHTNESS: status.get('brightness', None),
+        CAPABILITY_RGB: None if not isinstance(color, dict) else (color.get('r', 0) << 16) + (color.get('g', 0) << 8) + color.get('b', 0),
+        CAPABILITY_COLOR_TEMP: status.get('colorTemInKelvin', None),
+    }
+
+
+def _lan_applied(msg: dict, capability: dict, values: dict):
+    """Return the reported value of a control capability if the status shows the command applied - None if not."""
+    key = (capability.get('type', None), capability.get('instance', None))
+    value = values.get(key, None)
+    if value is None:
+        return None
+    if key == CAPABILITY_COLOR_TEMP:
+        #devices round the color temperature to the steps they support
+        return value if value > 0 else None
+    expected = msg['data']['value'] if key in (CAPABILITY_POWER, CAPABILITY_BRIGHTNESS) else int(capability.get('value', 0))
+    return value if value == expected else None
+
+
+class GoveeAPILanError(Exception):
+    """The device did not confirm a LAN request."""
+
+
+class _GoveeLanProtocol(asyncio.DatagramProtocol):
+    """Datagram protocol that hands replies to the LAN client."""
+
+    def __init__(self, client: GoveeAPILanClient) -> None:
+        """Initialize the protocol."""
+        self._client = client
+
+    def datagram_received(self, data: bytes, addr) -> None:
+        """Pass a received datagram on."""
+        self._client._handle_datagram(data, addr)
+
+    def error_received(self, exc) -> None:
+        """Log socket errors."""
+        _LOGGER.debug("%s - GoveeAPILanClient: socket error: %s", self._client._entry_id, exc)
+
+
+class GoveeAPILanClient:
+    """Control and state of LAN enabled devices via the local UDP API - requests it cannot serve go to the cloud."""
+
+    def __init__(self, hass: HomeAssistant, entry_id: str, multicast_address: str = LAN_MULTICAST_ADDRESS, scan_port: int = LAN_SCAN_PORT, listen_port: int = LAN_LISTEN_PORT, control_port: int = LAN_CONTROL_PORT) -> None:
+        """Initialize the LAN client - addresses and ports can point to a local responder."""
+        self.hass = hass
+        self._entry_id = entry_id
+        self._multicast_address = multicast_address
+        self._scan_port = scan_port
+        self._listen_port = listen_port
+        self._control_port = control_port
+        self._transport = None
+        self._unsub_scan = None
+        self._status_waiters = {}
+        self._locks = {}
+        self._cloud_read = {}
+        #device id: {'ip', 'sku', 'seen'}
+        self.devices = {}
+
+    def _create_socket(self) -> socket.socket:
+        """Return the socket for scan and status replies."""
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+        try:
+            sock.bind(('', self._listen_port))
+        except OSError as e:
+            if not e.errno == errno.EADDRINUSE:
+                sock.close()
+                raise
+            #unicast replies reach only one of the sockets sharing the port
+            _LOGGER.warning("%s - GoveeAPILanClient: UDP port %s is used by another application (e.g. the govee_light_local integration) - LAN discovery and status replies may be lost", self._entry_id, self._listen_port)
+            sock.close()
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            sock.bind(('', self._listen_port))
+        sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, 2)
+        sock.setblocking(False)
+        return sock
+
+    async def async_start(self) -> None:
+        """Async: Open the socket and start discovery."""
+        self._transport, _ = await self.hass.loop.create_datagram_endpoint(lambda: _GoveeLanProtocol(self), sock=self._create_socket())
+        self.async_scan()
+        self._unsub_scan = async_track_time_interval(self.hass, self.async_scan, timedelta(seconds=LAN_SCAN_INTERVAL))
+
+    async def async_stop(self) -> None:
+        """Async: Stop discovery and close the socket."""
+        if self._unsub_scan is not None:
+            self._unsub_scan()
+            self._unsub_scan = None
+        if self._transport is not None:
+            self._transport.close()
+            self._transport = None
+
+    @callback
+    def async_scan(self, _now=None) -> None:
+        """Send a discovery request - devices reply on the listen port."""
+        #devices that missed three scans are controlled via the cloud again
+        stale = time.monotonic() - 3 * LAN_SCAN_INTERVAL
+        for d in [d for d, v in self.devices.items() if v['seen'] < stale]:
+            _LOGGER.debug("%s - GoveeAPILanClient: %s no longer seen on LAN", self._entry_id, d)
+            del self.devices[d]
+        self._send({"cmd": "scan", "data": {"account_topic": "reserve"}}, (self._multicast_address, self._scan_port))
+
+    def _send(self, msg: dict, addr) -> None:
+        """Send a LAN message."""
+        if self._transport is None:
+            return None
+        self._transport.sendto(json.dumps({"msg": msg}).encode(), addr)
+
+    def _handle_datagram(self, data: bytes, addr) -> None:
+        """Handle scan and status replies."""
+        try:
+            msg = json.loads(data).get('msg', {})
+            cmd = msg.get('cmd', None)
+            payload = msg.get('data', {})
+            if cmd == 'scan':
+                d = payload.get('device', None)
+                if not d in self.devices:
+                    _LOGGER.info("%s - GoveeAPILanClient: discovered %s (%s) at %s", self._entry_id, d, payload.get('sku', None), payload.get('ip', addr[0]))
+                self.devices[d] = {'ip': payload.get('ip', addr[0]), 'sku': payload.get('sku', None), 'seen': time.monotonic()}
+            elif cmd == 'devStatus':
+                waiter = self._status_waiters.pop(addr[0], None)
+                if waiter is not None and not waiter.done():
+                    waiter.set_result(payload)
+        except Exception as e:
+            _LOGGER.debug("%s - GoveeAPILanClient: invalid datagram from %s: %s (%s.%s)", self._entry_id, addr, str(e), e.__class__.__module__, type(e).__name__)
+
+    def serves(self, d: str) -> bool:
+        """Return if a device was discovered on the LAN."""
+        return d in self.devices
+
+    async def async_request(self, path: str, data):
+        """Async: Serve a cloud request via LAN - returns status, headers and text like a transport.
+
+        Returns None if the LAN API does not cover the request and raises if the device does not answer."""
+        path = path.strip('/')
+        payload = (data or {}).get('payload', {})
+        d = payload.get('device', None)
+        device = self.devices.get(d, None)
+        if device is None:
+            return None
+        if path == 'device/control':
+            return await self._async_control(device, data)
+        if path == 'device/state':
+            return await self._async_state(d, device, data)
+        return None
+
+    async def _async_control(self, device: dict, data):
+        """Async: Send a control command and confirm it by a status read - capabilities the LAN API does not cover return None.
+
+        UDP commands are not acknowledged - raises if the device does not report the command applied."""
+        capability = data['payload']['capability']
+        msg = _lan_command(capability)
+        if msg is None:
+            return None
+        async with self._lock(device['ip']):
+            _LOGGER.debug("%s - GoveeAPILanClient: %s: %s", self._entry_id, device['ip'], msg)
+            self._send(msg, (device['ip'], self._control_port))
+            await asyncio.sleep(LAN_CONFIRM_DELAY)
+            status = await self._async_read_status(device['ip'])
+        value = _lan_applied(msg, capability, _lan_capabilities(status))
+        if value is None:
+            raise GoveeAPILanError("%s did not apply %s" % (device['ip'], msg['cmd']))
+        #answer the way the cloud does - with the value the device reports
+        capability = dict(capability, value=value, state={"status": "success"})
+        return 200, {}, json.dumps({"requestId": data.get('requestId', None), "msg": "success", "code": 200, "capability": capability})
+
+    def _lock(self, ip: str) -> asyncio.Lock:
+        """Return the lock that keeps one command and status exchange per device in flight."""
+        lock = self._locks.get(ip, None)
+        if lock is None:
+            lock = self._locks[ip] = asyncio.Lock()
+        return lock
+
+    async def _async_read_status(self, ip: str) -> dict:
+        """Async: Return the devStatus reply of a device - raises if it does not answer."""
+        waiter = self.hass.loop.create_future()
+        self._status_waiters[ip] = waiter
+        self._send({"cmd": "devStatus", "data": {}}, (ip, self._control_port))
+        try:
+            return await asyncio.wait_for(waiter, LAN_TIMEOUT)
+        except asyncio.TimeoutError:
+            raise TimeoutError("no status reply from %s" % ip) from None
+        finally:
+            if self._status_waiters.get(ip, None) is waiter:
+                del self._status_waiters[ip]
+
+    async def _async_state(self, d: str, device: dict, data):
+        """Async: Read the device status - capabilities the LAN API does not report keep their cached state."""
+        now = time.monotonic()
+        state = self.hass.data[DOMAIN][self._entry_id].get(CONF_STATE, {}).get(d, None)
+        if state is None or not d in self._cloud_read or now - self._cloud_read[d] > LAN_CLOUD_REFRESH:
+            #the cloud refreshes the capabilities the LAN API does not report now and then
+            self._cloud_read[d] = now
+            return None
+
+        async with self._lock(device['ip']):
+            status = await self._async_read_status(device['ip'])
+
+        values = _lan_capabilities(status)
+        capabilities = []
+        for cap in state.as_dict()['capabilities']:
+            key = (cap['type'], cap['instance'])
+            if key in values and not values[key] is None:
+                cap = dict(cap, state={'value': values[key]})
+            capabilities.append(cap)
+        payload = {'sku': state.sku, 'device': d, 'capabilities': capabilities}
+        return 200, {}, json.dumps({"requestId": data.get('requestId', None), "msg": "success", "code": 200, "payload": payload})
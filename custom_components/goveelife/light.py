@@ -3,7 +3,6 @@
 from __future__ import annotations
 from typing import Final
 import logging
-import asyncio
 import math
 
 from homeassistant.core import HomeAssistant
@@ -19,19 +18,17 @@ from homeassistant.components.light import (
     LightEntity,
 )
 from homeassistant.const import (
-    CONF_DEVICES,
     STATE_ON,
     STATE_OFF,
     STATE_UNKNOWN,
 )
 
 from .entities import GoveeLifePlatformEntity
-from .const import DOMAIN, CONF_COORDINATORS
-from .utils import GoveeAPI_GetCachedStateValue, async_GoveeAPI_ControlDevice
+from .const import DOMAIN, CONF_COORDINATORS, CONF_PLATFORM_PLAN
+from .utils import GoveeAPI_GetCachedStateValue, async_GoveeAPI_ControlDevice, async_GoveeAPI_ControlDevicePipeline
 
 _LOGGER: Final = logging.getLogger(__name__)
 platform = 'light'
-platform_device_types = ['devices.types.light']
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry, async_add_entities: AddEntitiesCallback):
     """Set up the light platform."""
@@ -39,23 +36,20 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry, async_add_e
     entities = []
         
     try:
-        _LOGGER.debug("%s - async_setup_entry %s: Getting cloud devices from data store", entry.entry_id, platform)
+        _LOGGER.debug("%s - async_setup_entry %s: Getting platform plan from data store", entry.entry_id, platform)
         entry_data = hass.data[DOMAIN][entry.entry_id]
-        api_devices = entry_data[CONF_DEVICES]
+        platform_plan = entry_data[CONF_PLATFORM_PLAN][platform]
     except Exception as e:
-        _LOGGER.error("%s - async_setup_entry %s: Getting cloud devices from data store failed: %s (%s.%s)", entry.entry_id, platform, str(e), e.__class__.__module__, type(e).__name__)
+        _LOGGER.error("%s - async_setup_entry %s: Getting platform plan from data store failed: %s (%s.%s)", entry.entry_id, platform, str(e), e.__class__.__module__, type(e).__name__)
         return False
 
-    for device_cfg in api_devices:
+    for device_cfg, capability in platform_plan:
         try:
-            if not device_cfg.get('type', STATE_UNKNOWN) in platform_device_types:
-                continue      
             d = device_cfg.get('device')
             _LOGGER.debug("%s - async_setup_entry %s: Setup device: %s", entry.entry_id, platform, d) 
             coordinator = entry_data[CONF_COORDINATORS][d]
             entity = GoveeLifeLight(hass, entry, coordinator, device_cfg, platform=platform)
             entities.append(entity)
-            await asyncio.sleep(0)
         except Exception as e:
             _LOGGER.error("%s - async_setup_entry %s: Setup device failed: %s (%s.%s)", entry.entry_id, platform, str(e), e.__class__.__module__, type(e).__name__)
             return False
@@ -125,82 +119,92 @@ class GoveeLifeLight(LightEntity, GoveeLifePlatformEntity):
         RGBint = (red << 16) + (green << 8) + blue
         return RGBint
 
+    def _update_state_view(self):
+        """Decode the cached device state into the values the properties return"""
+        super()._update_state_view()
+        d = self._device_cfg.get('device')
+        value = GoveeAPI_GetCachedStateValue(self.hass, self._entry_id, d, 'devices.capabilities.on_off', 'powerSwitch')
+        self._state = self._state_mapping.get(value, STATE_UNKNOWN)
+        if self._state == STATE_UNKNOWN:
+            _LOGGER.warning("%s - %s: state: invalid value: %s", self._api_id, self._identifier, value)
+            _LOGGER.debug("%s - %s: state: valid are: %s", self._api_id, self._identifier, self._state_mapping)
+        self._attr_is_on = self._state == STATE_ON
+
+        self._attr_brightness = None
+        if ColorMode.BRIGHTNESS in self._attr_supported_color_modes:
+            value = GoveeAPI_GetCachedStateValue(self.hass, self._entry_id, d, 'devices.capabilities.range', 'brightness')
+            if not value is None:
+                self._attr_brightness = value_to_brightness(self._brightness_scale, value)
+        self._attr_color_temp_kelvin = GoveeAPI_GetCachedStateValue(self.hass, self._entry_id, d, 'devices.capabilities.color_setting', 'colorTemperatureK')
+        value = GoveeAPI_GetCachedStateValue(self.hass, self._entry_id, d, 'devices.capabilities.color_setting', 'colorRgb')
+        self._attr_rgb_color = None if value is None else self._getRGBfromI(value)
+
     @property
     def state(self) -> str | None:
         """Return the current state of the entity."""
-        value = GoveeAPI_GetCachedStateValue(self.hass, self._entry_id, self._device_cfg.get('device'), 'devices.capabilities.on_off', 'powerSwitch')
-        v = self._state_mapping.get(value, STATE_UNKNOWN)
-        if v == STATE_UNKNOWN:
-            _LOGGER.warning("%s - %s: state: invalid value: %s", self._api_id, self._identifier, value)
-            _LOGGER.debug("%s - %s: state: valid are: %s", self._api_id, self._identifier, self._state_mapping)
-        return v
+        return self._state
 
     @property
     def is_on(self) -> bool:
         """Return true if entity is on."""
-        return self.state == STATE_ON
+        return self._attr_is_on
 
     @property
     def brightness(self) -> int | None:
         """Return the current brightness."""
-        value = GoveeAPI_GetCachedStateValue(self.hass, self._entry_id, self._device_cfg.get('device'), 'devices.capabilities.range', 'brightness')
-        return value_to_brightness(self._brightness_scale, value)
+        return self._attr_brightness
 
     @property
     def color_temp_kelvin(self) -> int | None:
         """Return the color temperature in Kelvin."""
-        value = GoveeAPI_GetCachedStateValue(self.hass, self._entry_id, self._device_cfg.get('device'), 'devices.capabilities.color_setting', 'colorTemperatureK')
-        return value
+        return self._attr_color_temp_kelvin
 
     @property
     def rgb_color(self) -> tuple[int, int, int] | None:
         """Return the rgb color."""
-        value = GoveeAPI_GetCachedStateValue(self.hass, self._entry_id, self._device_cfg.get('device'), 'devices.capabilities.color_setting', 'colorRgb')
-        return self._getRGBfromI(value)
+        return self._attr_rgb_color
 
     async def async_turn_on(self, **kwargs) -> None:
         """Async: Turn entity on"""
         try:
             _LOGGER.debug("%s - %s: async_turn_on", self._api_id, self._identifier)
             _LOGGER.debug("%s - %s: async_turn_on: kwargs = %s", self._api_id, self._identifier, kwargs)
-            
+            state_capabilities = []
+
             if ATTR_BRIGHTNESS in kwargs:
-                state_capability = {
+                state_capabilities.append({
                     "type": "devices.capabilities.range",
                     "instance": 'brightness',
                     "value": math.ceil(brightness_to_value(self._brightness_scale, kwargs[ATTR_BRIGHTNESS]))   
-                }
-                if await async_GoveeAPI_ControlDevice(self.hass, self._entry_id, self._device_cfg, state_capability):
-                    self.async_write_ha_state()
+                })
 
             if ATTR_COLOR_TEMP_KELVIN in kwargs:
-                state_capability = {
+                state_capabilities.append({
                     "type": "devices.capabilities.color_setting",
                     "instance": 'colorTemperatureK',
                     "value": kwargs[ATTR_COLOR_TEMP_KELVIN]
-                }
-                if await async_GoveeAPI_ControlDevice(self.hass, self._entry_id, self._device_cfg, state_capability):
-                    self.async_write_ha_state()
+                })
 
             if ATTR_RGB_COLOR in kwargs:
-                state_capability = {
+                state_capabilities.append({
                     "type": "devices.capabilities.color_setting",
                     "instance": 'colorRgb',
                     "value": self._getIfromRGB(kwargs[ATTR_RGB_COLOR])
-                }
-                if await async_GoveeAPI_ControlDevice(self.hass, self._entry_id, self._device_cfg, state_capability):
-                    self.async_write_ha_state()
-            
+                })
+
+            #power has to be switched first - the other capabilities are independent and sent concurrently
+            stages = []
             if not self.is_on:
-                state_capability = {
+                stages.append([{
                     "type": "devices.capabilities.on_off",
                     "instance": 'powerSwitch',
                     "value": self._state_mapping_set[STATE_ON]
-                }
-                if await async_GoveeAPI_ControlDevice(self.hass, self._entry_id, self._device_cfg, state_capability):
-                    self.async_write_ha_state()
+                }])
             else:
                 _LOGGER.debug("%s - %s: async_turn_on: device already on", self._api_id, self._identifier)
+            stages.append(state_capabilities)
+
+            await async_GoveeAPI_ControlDevicePipeline(self.hass, self._entry_id, self._device_cfg, stages)
         except Exception as e:
             _LOGGER.error("%s - %s: async_turn_on failed: %s (%s.%s)", self._api_id, self._identifier, str(e), e.__class__.__module__, type(e).__name__)
 
@@ -215,8 +219,7 @@ class GoveeLifeLight(LightEntity, GoveeLifePlatformEntity):
                     "instance": 'powerSwitch',
                     "value": self._state_mapping_set[STATE_OFF]
                 }
-                if await async_GoveeAPI_ControlDevice(self.hass, self._entry_id, self._device_cfg, state_capability):
-                    self.async_write_ha_state()
+                await async_GoveeAPI_ControlDevice(self.hass, self._entry_id, self._device_cfg, state_capability)
             else:
                 _LOGGER.debug("%s - %s: async_turn_on: device already off", self._api_id, self._identifier)
         except Exception as e:
@@ -0,0 +1,157 @@
+"""Push updates via the OpenAPI MQTT event stream for the Govee Life integration."""
+
+from __future__ import annotations
+from typing import Final
+import logging
+import json
+import ssl
+import uuid
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.const import (
+    CONF_API_KEY,
+    CONF_PARAMS,
+    CONF_STATE,
+)
+
+from .const import (
+    DOMAIN,
+    CONF_COORDINATORS,
+    CLOUD_MQTT_HOST,
+    CLOUD_MQTT_PORT,
+    CLOUD_MQTT_TOPIC,
+    EVENT_PROPS_ID,
+)
+
+_LOGGER: Final = logging.getLogger(__name__)
+
+
+def _normalize_capability(cap: dict) -> dict:
+    """Return a pushed capability in the state payload shape - events report a list of states."""
+    state = cap.get('state', None)
+    if isinstance(state, list):
+        first = state[0] if state else {}
+        cap = dict(cap, state={'value': first.get('value', None), 'events': state})
+    return cap
+
+
+class GoveeAPIPushClient:
+    """MQTT client for the event stream of the account - messages are applied to the state store."""
+
+    def __init__(self, hass: HomeAssistant, entry_id: str, host: str = CLOUD_MQTT_HOST, port: int = CLOUD_MQTT_PORT, tls: bool = True) -> None:
+        """Initialize the push client - host, port and tls can point to a local broker."""
+        self.hass = hass
+        self._entry_id = entry_id
+        self._host = host
+        self._port = port
+        self._tls = tls
+        self._client = None
+        self._mqtt = None
+        self.connected = False
+        #devices that delivered a push message - their polling drops to the safety net interval
+        self.devices = set()
+
+    def _create_client(self, api_key: str):
+        """Create and connect the paho client - blocking, runs in the executor."""
+        #paho is only needed with push enabled - imported here to keep it an optional dependency
+        import paho.mqtt.client as mqtt
+        self._mqtt = mqtt
+        client_id = DOMAIN + '-' + uuid.uuid4().hex[:12]
+        try:
+            client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION1, client_id=client_id)
+        except AttributeError:
+            #paho-mqtt < 2.0
+            client = mqtt.Client(client_id=client_id)
+        client.username_pw_set(api_key, api_key)
+        if self._tls:
+            client.tls_set(cert_reqs=ssl.CERT_REQUIRED)
+        client.on_connect = self._on_connect
+        client.on_disconnect = self._on_disconnect
+        client.on_message = self._on_message
+        client.user_data_set(CLOUD_MQTT_TOPIC.format(api_key))
+        client.connect_async(self._host, self._port)
+        client.loop_start()
+        return client
+
+    async def async_start(self) -> None:
+        """Async: Connect to the broker - paho reconnects on its own network thread."""
+        api_key = str(self.hass.data[DOMAIN][self._entry_id][CONF_PARAMS].get(CONF_API_KEY, None))
+        _LOGGER.debug("%s - GoveeAPIPushClient: connecting to %s:%s", self._entry_id, self._host, self._port)
+        try:
+            self._client = await self.hass.async_add_executor_job(self._create_client, api_key)
+        except ImportError as e:
+            _LOGGER.warning("%s - GoveeAPIPushClient: push updates need the paho-mqtt package - devices are polled: %s", self._entry_id, str(e))
+
+    def _stop_client(self, client) -> None:
+        """Disconnect the paho client - blocking, runs in the executor."""
+        client.disconnect()
+        client.loop_stop()
+
+    async def async_stop(self) -> None:
+        """Async: Disconnect from the broker."""
+        if self._client is None:
+            return None
+        client, self._client = self._client, None
+        await self.hass.async_add_executor_job(self._stop_client, client)
+
+    def _on_connect(self, client, topic, flags, rc) -> None:
+        """Subscribe to the event topic of the account - paho network thread."""
+        if not rc == 0:
+            _LOGGER.warning("%s - GoveeAPIPushClient: connect failed: %s", self._entry_id, self._mqtt.connack_string(rc))
+            return None
+        client.subscribe(topic)
+        self.hass.loop.call_soon_threadsafe(self._async_set_connected, True)
+
+    def _on_disconnect(self, client, topic, rc) -> None:
+        """Fall back to polling - paho network thread."""
+        self.hass.loop.call_soon_threadsafe(self._async_set_connected, False)
+
+    def _on_message(self, client, topic, msg) -> None:
+        """Hand a message over to the event loop - paho network thread."""
+        self.hass.loop.call_soon_threadsafe(self._async_handle_message, msg.payload)
+
+    @callback
+    def _async_set_connected(self, connected: bool) -> None:
+        """Track the connection - devices return to their poll interval while disconnected."""
+        if connected == self.connected:
+            return None
+        self.connected = connected
+        _LOGGER.info("%s - GoveeAPIPushClient: %s", self._entry_id, 'connected' if connected else 'disconnected - polling resumes')
+        if not connected:
+            coordinators = self.hass.data[DOMAIN][self._entry_id].get(CONF_COORDINATORS, {})
+            for d in self.devices:
+                if d in coordinators:
+                    coordinators[d].async_reset_poll_interval()
+
+    @callback
+    def _async_handle_message(self, payload) -> None:
+        """Apply a pushed message to the state store, publish it and fire it on the event bus."""
+        try:
+            message = json.loads(payload)
+            d = message.get('device', None)
+            _LOGGER.debug("%s - GoveeAPIPushClient: message for %s: %s", self._entry_id, d, message)
+            self.hass.bus.async_fire(EVENT_PROPS_ID, message)
+
+            entry_data = self.hass.data[DOMAIN][self._entry_id]
+            state = entry_data.get(CONF_STATE, {}).get(d, None)
+            coordinator = entry_data.get(CONF_COORDINATORS, {}).get(d, None)
+            if state is None or coordinator is None:
+                return None
+
+            #only the entities of capabilities whose state differs are notified
+            keys = []
+            for cap in message.get('capabilities', []):
+                cap = _normalize_capability(cap)
+                key = (cap['type'], cap['instance'])
+                old_cap = state.set_capability(cap)
+                if not old_cap == state.get_capability(*key):
+                    keys.append(key)
+
+            if not d in self.devices:
+                _LOGGER.debug("%s - GoveeAPIPushClient: %s receives push - poll as safety net only", self._entry_id, d)
+                self.devices.add(d)
+                coordinator.async_reset_poll_interval()
+            if keys:
+                coordinator.async_notify_capabilities(keys)
+        except Exception as e:
+            _LOGGER.error("%s - GoveeAPIPushClient: message failed: %s (%s.%s)", self._entry_id, str(e), e.__class__.__module__, type(e).__name__)
@@ -0,0 +1,136 @@
+"""Rate limit handling for the Govee Life integration."""
+
+from __future__ import annotations
+from typing import Final
+import logging
+import random
+import time
+from email.utils import parsedate_to_datetime
+
+from .const import (
+    CIRCUIT_BACKOFF_BASE,
+    CIRCUIT_BACKOFF_JITTER,
+    CIRCUIT_BACKOFF_MAX,
+)
+
+_LOGGER: Final = logging.getLogger(__name__)
+
+CIRCUIT_CLOSED: Final = 'closed'
+CIRCUIT_OPEN: Final = 'open'
+CIRCUIT_HALF_OPEN: Final = 'half_open'
+
+HEADERS_RATELIMIT_RESET: Final = ['x-ratelimit-reset', 'api-ratelimit-reset']
+#daily account limit first - the per api limit is used if the account headers are missing
+HEADERS_RATELIMIT_PREFIX: Final = ['x-ratelimit-', 'api-ratelimit-']
+
+
+class GoveeAPICircuitOpenError(Exception):
+    """Raised if a request is blocked by an open circuit."""
+
+
+def GoveeAPI_GetRetryAfter(headers) -> float | None:
+    """Return the seconds to wait from Retry-After or rate limit reset headers"""
+    try:
+        headers = headers or {}
+        retry_after = headers.get('retry-after', None)
+        if retry_after is not None:
+            try:
+                return max(float(retry_after), 0)
+            except ValueError:
+                return max(parsedate_to_datetime(retry_after).timestamp() - time.time(), 0)
+        for header in HEADERS_RATELIMIT_RESET:
+            reset = headers.get(header, None)
+            if reset is None:
+                continue
+            return max(_reset_timestamp(float(reset)) - time.time(), 0)
+    except Exception as e:
+        _LOGGER.warning("GoveeAPI_GetRetryAfter: invalid header: %s (%s.%s)", str(e), e.__class__.__module__, type(e).__name__)
+    return None
+
+
+def _reset_timestamp(reset: float) -> float:
+    """Return a reset header value as unix timestamp - accepts milliseconds, seconds and a delta in seconds"""
+    if reset > 1e11:
+        return reset / 1000
+    if reset < 1e9:
+        return time.time() + reset
+    return reset
+
+
+def GoveeAPI_GetRateLimit(headers) -> dict | None:
+    """Return limit, remaining and reset (unix timestamp) from the rate limit headers of a response"""
+    try:
+        headers = headers or {}
+        for prefix in HEADERS_RATELIMIT_PREFIX:
+            remaining = headers.get(prefix + 'remaining', None)
+            if remaining is None:
+                continue
+            limit = headers.get(prefix + 'limit', None)
+            reset = headers.get(prefix + 'reset', None)
+            return {
+                'limit': None if limit is None else int(limit),
+                'remaining': int(remaining),
+                #whole seconds - a reset sent as delta would make every response look changed
+                'reset': None if reset is None else round(_reset_timestamp(float(reset))),
+            }
+    except Exception as e:
+        _LOGGER.warning("GoveeAPI_GetRateLimit: invalid header: %s (%s.%s)", str(e), e.__class__.__module__, type(e).__name__)
+    return None
+
+
+class GoveeAPICircuitBreaker:
+    """Circuit breaker shared by all requests of an entry - opens on 429 and 5xx responses."""
+
+    def __init__(self, entry_id: str) -> None:
+        """Initialize the circuit breaker."""
+        self._entry_id = entry_id
+        self.state = CIRCUIT_CLOSED
+        self.failures = 0
+        self.retry_at = 0.0
+
+    @property
+    def retry_in(self) -> float:
+        """Return the seconds until the open circuit lets a probe request through."""
+        return max(self.retry_at - time.monotonic(), 0.0)
+
+    def allow_request(self) -> bool:
+        """Return if a request may be sent - an open circuit lets a single probe through once the wait is over."""
+        if self.state == CIRCUIT_CLOSED:
+            return True
+        if self.state == CIRCUIT_OPEN and self.retry_in <= 0:
+            _LOGGER.info("%s - GoveeAPICircuitBreaker: sending probe request", self._entry_id)
+            self.state = CIRCUIT_HALF_OPEN
+            return True
+        return False
+
+    def record_success(self) -> None:
+        """Close the circuit on a successful probe - responses to requests sent before it opened are ignored."""
+        if self.state == CIRCUIT_OPEN:
+            return None
+        if self.state == CIRCUIT_HALF_OPEN:
+            _LOGGER.info("%s - GoveeAPICircuitBreaker: closed - resume requests", self._entry_id)
+        self.state = CIRCUIT_CLOSED
+        self.failures = 0
+
+    def record_failure(self, retry_after: float | None = None) -> None:
+        """Open the circuit - for retry_after seconds or an exponential backoff with jitter, at most CIRCUIT_BACKOFF_MAX."""
+        now = time.monotonic()
+        if self.state == CIRCUIT_OPEN:
+            #requests that were in flight when the circuit opened do not escalate the backoff
+            if retry_after is not None:
+                self.retry_at = max(self.retry_at, now + min(retry_after, CIRCUIT_BACKOFF_MAX))
+            return None
+        self.failures += 1
+        if retry_after is None:
+            retry_after = CIRCUIT_BACKOFF_BASE * 2 ** (self.failures - 1)
+            retry_after = retry_after * random.uniform(1 - CIRCUIT_BACKOFF_JITTER, 1 + CIRCUIT_BACKOFF_JITTER)
+        retry_after = min(retry_after, CIRCUIT_BACKOFF_MAX)
+        self.state = CIRCUIT_OPEN
+        self.retry_at = now + retry_after
+        _LOGGER.warning("%s - GoveeAPICircuitBreaker: open for %s seconds after %s failures", self._entry_id, int(retry_after), self.failures)
+
+    def release_probe(self) -> None:
+        """Return a probe that ended without a result - the next request probes again."""
+        if self.state == CIRCUIT_HALF_OPEN:
+            self.state = CIRCUIT_OPEN
+            self.retry_at = time.monotonic()
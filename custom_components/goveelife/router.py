@@ -0,0 +1,112 @@
+"""Request routing for the Govee Life integration."""
+
+from __future__ import annotations
+from typing import Final
+import logging
+import time
+
+from .const import (
+    ROUTER_ERROR_THRESHOLD,
+    ROUTER_PROBE_INTERVAL,
+    ROUTER_SMOOTHING,
+)
+
+_LOGGER: Final = logging.getLogger(__name__)
+
+ROUTE_LAN: Final = 'lan'
+ROUTE_CLOUD: Final = 'cloud'
+
+
+class GoveeAPIRouteHealth:
+    """Latency and error health of one path to a device - both smoothed exponentially."""
+
+    def __init__(self) -> None:
+        """Initialize the path health."""
+        self.latency = None
+        self.error = 0.0
+        self.requests = 0
+        self.failures = 0
+        self.failed_at = None
+
+    @property
+    def healthy(self) -> bool:
+        """Return if the path is healthy - a degraded path is probed again after a while."""
+        if self.error < ROUTER_ERROR_THRESHOLD:
+            return True
+        return time.monotonic() - self.failed_at > ROUTER_PROBE_INTERVAL
+
+    def record(self, latency: float | None) -> None:
+        """Record a request result - None records a failure."""
+        self.requests += 1
+        failed = 1.0 if latency is None else 0.0
+        self.error += ROUTER_SMOOTHING * (failed - self.error)
+        if latency is None:
+            self.failures += 1
+            self.failed_at = time.monotonic()
+        elif self.latency is None:
+            self.latency = latency
+        else:
+            self.latency += ROUTER_SMOOTHING * (latency - self.latency)
+
+    def as_dict(self) -> dict:
+        """Return the path health for diagnostics."""
+        return {
+            'healthy': self.healthy,
+            'latency_ms': None if self.latency is None else round(self.latency * 1000, 1),
+            'error': round(self.error, 3),
+            'requests': self.requests,
+            'failures': self.failures,
+        }
+
+
+class GoveeAPIRouter:
+    """Orders the paths to a device by health and latency and keeps the routing decisions."""
+
+    def __init__(self, entry_id: str) -> None:
+        """Initialize the router."""
+        self._entry_id = entry_id
+        #device id: {route: GoveeAPIRouteHealth}
+        self._health = {}
+        #device id: {'route', 'reason', 'count'}
+        self._decisions = {}
+
+    def routes(self, d: str, available) -> list:
+        """Return the available paths to a device in the order to try them.
+
+        Healthy paths come first ordered by latency - a path without a sample yet
+        is tried first to get one. Degraded paths stay as fallback."""
+        health = self._health.setdefault(d, {})
+        for route in available:
+            health.setdefault(route, GoveeAPIRouteHealth())
+
+        def order(route):
+            h = health[route]
+            return (not h.healthy, -1 if h.latency is None else h.latency, h.error)
+        return sorted(available, key=order)
+
+    def record(self, d: str, route: str, latency: float | None, reason: str | None = None) -> None:
+        """Record the result of a request - None as latency records a failure."""
+        health = self._health.setdefault(d, {}).setdefault(route, GoveeAPIRouteHealth())
+        was_healthy = health.healthy
+        health.record(latency)
+        if was_healthy and not health.healthy:
+            _LOGGER.info("%s - GoveeAPIRouter: %s: %s degraded - %s", self._entry_id, d, route, reason)
+        elif not latency is None:
+            decision = self._decisions.get(d, None)
+            if decision is None or not decision['route'] == route:
+                _LOGGER.debug("%s - GoveeAPIRouter: %s: routed via %s", self._entry_id, d, route)
+                decision = self._decisions[d] = {'route': route, 'count': 0}
+            decision['count'] += 1
+            decision['reason'] = reason
+
+    def as_dict(self) -> dict:
+        """Return health and routing decision of all devices for diagnostics."""
+        return {
+            d: {
+                'route': self._decisions.get(d, {}).get('route', None),
+                'reason': self._decisions.get(d, {}).get('reason', None),
+                'count': self._decisions.get(d, {}).get('count', 0),
+                'paths': {route: h.as_dict() for route, h in health.items()},
+            }
+            for d, health in self._health.items()
+        }
@@ -0,0 +1,177 @@
+"""Poll scheduler for the Govee Life integration."""
+
+from __future__ import annotations
+from typing import Final
+import logging
+import asyncio
+import heapq
+import random
+import zlib
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.event import async_call_at
+from homeassistant.helpers.storage import Store
+
+from .const import (
+    DOMAIN,
+    CONF_CIRCUIT,
+    POLL_PHASE_JITTER,
+    STORAGE_KEY_PHASES,
+    STORAGE_VERSION,
+)
+from .ratelimit import (
+    CIRCUIT_HALF_OPEN,
+    CIRCUIT_OPEN,
+)
+
+_LOGGER: Final = logging.getLogger(__name__)
+
+
+class GoveeAPIPollScheduler:
+    """Entry level poll scheduler - one timer drives the coordinators of all devices."""
+
+    def __init__(self, hass: HomeAssistant, entry_id: str, max_concurrent: int) -> None:
+        """Initialize the scheduler."""
+        self.hass = hass
+        self._entry_id = entry_id
+        self._coordinators = {}
+        self._due = {}
+        self._heap = []
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        self._unsub_timer = None
+        self._timer_when = None
+        self._tasks = set()
+        self._running = False
+        self._phases = {}
+
+    async def async_load_phases(self, devices) -> None:
+        """Async: Load the poll phases of the devices - rebalanced and saved if the devices changed."""
+        store = Store(self.hass, STORAGE_VERSION, STORAGE_KEY_PHASES.format(self._entry_id))
+        try:
+            phases = await store.async_load() or {}
+        except Exception as e:
+            _LOGGER.warning("%s - GoveeAPIPollScheduler: loading poll phases failed: %s (%s.%s)", self._entry_id, str(e), e.__class__.__module__, type(e).__name__)
+            phases = {}
+
+        if not set(phases) == set(devices):
+            #spread evenly over the interval - the order is derived from the device id so it is stable
+            ordered = sorted(devices, key=lambda device: (zlib.crc32(str(device).encode()), str(device)))
+            phases = {device: i / len(ordered) for i, device in enumerate(ordered)}
+            _LOGGER.debug("%s - GoveeAPIPollScheduler: rebalanced poll phases of %s devices", self._entry_id, len(phases))
+            await store.async_save(phases)
+        self._phases = phases
+
+    @property
+    def devices(self) -> set:
+        """Return the devices the scheduler polls."""
+        return set(self._phases) | set(self._coordinators)
+
+    @callback
+    def async_add_coordinator(self, device: str, coordinator, delay: float | None = None) -> None:
+        """Add the coordinator of a device - first poll after delay or at its phase of the poll interval."""
+        self._coordinators[device] = coordinator
+        if delay is None:
+            interval = coordinator.poll_interval.total_seconds()
+            delay = self._phases.get(device, 1.0) * interval + random.uniform(0, min(POLL_PHASE_JITTER, interval / max(len(self._phases), 1)))
+        self.async_schedule(device, delay)
+
+    @callback
+    def async_schedule(self, device: str, delay: float, earlier_only: bool = False) -> None:
+        """Schedule the next poll of a device in delay seconds."""
+        self._async_schedule_at(device, self.hass.loop.time() + delay, earlier_only)
+
+    @callback
+    def _async_schedule_at(self, device: str, due: float, earlier_only: bool = False) -> None:
+        """Schedule the next poll of a device at loop time due."""
+        if not device in self._coordinators:
+            return None
+        current = self._due.get(device, None)
+        if earlier_only and current is not None and current <= due:
+            return None
+        #superseded heap entries are skipped when they come due
+        self._due[device] = due
+        heapq.heappush(self._heap, (due, device))
+        self._async_arm_timer()
+
+    @callback
+    def async_start(self) -> None:
+        """Start polling."""
+        _LOGGER.debug("%s - GoveeAPIPollScheduler: start polling %s devices", self._entry_id, len(self._coordinators))
+        self._running = True
+        self._async_arm_timer()
+
+    @callback
+    def async_stop(self) -> None:
+        """Stop polling and cancel running polls."""
+        _LOGGER.debug("%s - GoveeAPIPollScheduler: stop polling", self._entry_id)
+        self._running = False
+        if self._unsub_timer is not None:
+            self._unsub_timer()
+            self._unsub_timer = None
+            self._timer_when = None
+        for task in list(self._tasks):
+            task.cancel()
+
+    @callback
+    def _async_arm_timer(self, when: float | None = None) -> None:
+        """Arm the timer for the earliest due device or at loop time when."""
+        if not self._running or not self._heap:
+            return None
+        when = max(self._heap[0][0], when or 0)
+        if self._timer_when is not None and self._timer_when <= when:
+            return None
+        if self._unsub_timer is not None:
+            self._unsub_timer()
+        self._timer_when = when
+        self._unsub_timer = async_call_at(self.hass, self._async_tick, when)
+
+    @callback
+    def _async_tick(self, _now) -> None:
+        """Start a poll batch for all due devices."""
+        self._unsub_timer = None
+        self._timer_when = None
+        now = self.hass.loop.time()
+        limit = None
+        breaker = self.hass.data.get(DOMAIN, {}).get(self._entry_id, {}).get(CONF_CIRCUIT, None)
+        if breaker is not None and breaker.state == CIRCUIT_HALF_OPEN:
+            #wait for the running probe - it may be a control request, so check back shortly
+            self._async_arm_timer(now + POLL_PHASE_JITTER)
+            return None
+        if breaker is not None and breaker.state == CIRCUIT_OPEN:
+            if breaker.retry_in > 0:
+                _LOGGER.debug("%s - GoveeAPIPollScheduler: circuit open - polling paused for %s seconds", self._entry_id, int(breaker.retry_in))
+                self._async_arm_timer(now + breaker.retry_in)
+                return None
+            #a single device probes the cloud
+            limit = 1
+        devices = []
+        while self._heap and self._heap[0][0] <= now and not len(devices) == limit:
+            due, device = heapq.heappop(self._heap)
+            if not self._due.get(device, None) == due:
+                continue
+            del self._due[device]
+            devices.append((device, due))
+
+        if devices:
+            _LOGGER.debug("%s - GoveeAPIPollScheduler: polling %s devices", self._entry_id, len(devices))
+            task = self.hass.async_create_task(self._async_poll(devices))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        self._async_arm_timer()
+
+    async def _async_poll(self, devices) -> None:
+        """Async: Poll a batch of devices - concurrency is bound by the scheduler."""
+        await asyncio.gather(*[self._async_poll_device(device, due) for device, due in devices])
+
+    async def _async_poll_device(self, device: str, due: float) -> None:
+        """Async: Refresh the coordinator of a device and schedule its next poll - keeps the phase of the device."""
+        coordinator = self._coordinators[device]
+        try:
+            async with self._semaphore:
+                await coordinator.async_refresh()
+        except Exception as e:
+            _LOGGER.error("%s - GoveeAPIPollScheduler: poll failed: %s: %s (%s.%s)", self._entry_id, device, str(e), e.__class__.__module__, type(e).__name__)
+        finally:
+            if self._running:
+                #a poll requested while this one was in flight (e.g. after a control command) stays if it is earlier
+                self._async_schedule_at(device, max(due + coordinator.poll_interval.total_seconds(), self.hass.loop.time()), earlier_only=True)
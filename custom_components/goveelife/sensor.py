@@ -3,19 +3,28 @@
 from __future__ import annotations
 from typing import Final
 import logging
-import asyncio
-import re
 
 from homeassistant.core import (
     HomeAssistant,
     callback,
 )
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.components.sensor import SensorStateClass
+from homeassistant.components.sensor import (
+    SensorDeviceClass,
+    SensorEntity,
+    SensorStateClass,
+)
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.helpers.entity import DeviceInfo
+from homeassistant.helpers.entity import (
+    DeviceInfo,
+    EntityCategory,
+)
+from homeassistant.helpers.device_registry import DeviceEntryType
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from homeassistant.util import dt as dt_util
 from homeassistant.const import (
-    CONF_DEVICES,
+    ATTR_DATE,
+    CONF_FRIENDLY_NAME,
     STATE_UNKNOWN,
 )
 
@@ -24,17 +33,24 @@ from .entities import GoveeLifePlatformEntity
 from .const import (
     DOMAIN,
     CONF_COORDINATORS,
+    CONF_PLATFORM_PLAN,
+    CONF_RATELIMIT,
+    CONF_API_COUNT,
+    API_COUNT_CONTROL,
+    API_COUNT_HOURS,
+    API_COUNT_POLL,
+    DEFAULT_NAME,
+    SIGNAL_API_COUNT_UPDATED,
+    SIGNAL_RATELIMIT_UPDATED,
 )
 from .utils import (
     async_ProgrammingDebug,
+    GoveeAPI_GetCachedStateValue,
+    GoveeAPI_GetRequestForecast,
 )
 
 _LOGGER: Final = logging.getLogger(__name__)
 platform='sensor'
-platform_device_types = [ 
-    'devices.types.sensor:.*', 
-    'devices.types.thermometer:.*' 
-]
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry, async_add_entities):
     """Set up the sensor platform."""
@@ -43,33 +59,33 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry, async_add_e
     
     
     try:
-        _LOGGER.debug("%s - async_setup_entry %s: Getting cloud devices from data store", entry.entry_id, platform)
+        _LOGGER.debug("%s - async_setup_entry %s: Getting platform plan from data store", entry.entry_id, platform)
         entry_data=hass.data[DOMAIN][entry.entry_id]
-        api_devices=entry_data[CONF_DEVICES]
+        platform_plan=entry_data[CONF_PLATFORM_PLAN][platform]
     except Exception as e:
-        _LOGGER.error("%s - async_setup_entry %s: Getting cloud devices from data store failed: %s (%s.%s)", entry.entry_id, platform, str(e), e.__class__.__module__, type(e).__name__)
+        _LOGGER.error("%s - async_setup_entry %s: Getting platform plan from data store failed: %s (%s.%s)", entry.entry_id, platform, str(e), e.__class__.__module__, type(e).__name__)
         return False
 
-    for device_cfg in api_devices:
+    for device_cfg, capability in platform_plan:
         try:
             d=device_cfg.get('device')
             coordinator = entry_data[CONF_COORDINATORS][d]
-            for capability in device_cfg.get('capabilities',[]):
-                r=device_cfg.get('type',STATE_UNKNOWN)+':'+capability.get('type',STATE_UNKNOWN)+':'+capability.get('instance',STATE_UNKNOWN)
-                setup=False
-                for platform_match in platform_device_types:
-                    if re.match(platform_match, r):
-                        setup=True
-                        break
-                if setup:
-                    _LOGGER.debug("%s - async_setup_entry %s: Setup capability: %s|%s|%s ", entry.entry_id, platform, d, capability.get('type',STATE_UNKNOWN).split('.')[-1], capability.get('instance',STATE_UNKNOWN))
-                    entity=GoveeLifeSensor(hass, entry, coordinator, device_cfg, platform=platform, cap=capability)
-                    entites.append(entity)
-            await asyncio.sleep(0)
+            _LOGGER.debug("%s - async_setup_entry %s: Setup capability: %s|%s|%s ", entry.entry_id, platform, d, capability.get('type',STATE_UNKNOWN).split('.')[-1], capability.get('instance',STATE_UNKNOWN))
+            entity=GoveeLifeSensor(hass, entry, coordinator, device_cfg, platform=platform, cap=capability)
+            entites.append(entity)
         except Exception as e:
             _LOGGER.error("%s - async_setup_entry %s: Setup device failed: %s (%s.%s)", entry.entry_id, platform, str(e), e.__class__.__module__, type(e).__name__)
             return False
 
+    try:
+        _LOGGER.debug("%s - async_setup_entry %s: Setup api request sensors", entry.entry_id, platform)
+        for kind in GoveeLifeRateLimitSensor.KINDS:
+            entites.append(GoveeLifeRateLimitSensor(hass, entry, kind))
+        for kind in GoveeLifeRequestCountSensor.KINDS:
+            entites.append(GoveeLifeRequestCountSensor(hass, entry, kind))
+    except Exception as e:
+        _LOGGER.error("%s - async_setup_entry %s: Setup api request sensors failed: %s (%s.%s)", entry.entry_id, platform, str(e), e.__class__.__module__, type(e).__name__)
+
     _LOGGER.info("%s - async_setup_entry: setup %s %s entities", entry.entry_id, len(entites), platform)
     if not entites:
         return None
@@ -82,11 +98,18 @@ class GoveeLifeSensor(GoveeLifePlatformEntity):
     def _init_platform_specific(self, **kwargs):
         """Platform specific init actions"""
         self._state_class = None
+        self._cap = kwargs.get('cap', None)
+
+    def _update_state_view(self):
+        """Decode the cached device state into the values the properties return"""
+        super()._update_state_view()
+        value = GoveeAPI_GetCachedStateValue(self.hass, self._entry_id, self._device_cfg.get('device'), self._cap.get('type', STATE_UNKNOWN), self._cap.get('instance', STATE_UNKNOWN))
+        #structured values have no scalar state
+        self._state = STATE_UNKNOWN if value is None or isinstance(value, (dict, list)) else value
 
     @property
     def state_class(self) -> SensorStateClass | None:
         """Return the state_class of the entity."""
-        _LOGGER.debug("%s - %s: state_class: property requested", self._api_id, self._identifier)
         return self._state_class
 
     @property
@@ -98,7 +121,138 @@ class GoveeLifeSensor(GoveeLifePlatformEntity):
     def _handle_coordinator_update(self) -> None:
         """Handle updated data from the coordinator."""
         #self._attr_is_on = self.coordinator.data[self.idx]["state"]        
-        d=self._device_cfg.get('device')
-        self.hass.data[DOMAIN][entry.entry_id][CONF_STATE][d]
-        self.async_write_ha_state()
+        self._async_write_state_view()
+
+
+
+class GoveeLifeEntrySensor(SensorEntity):
+    """Base class for diagnostic sensors of the config entry - updated through dispatcher signals."""
+
+    #kind: (name, device class, state class)
+    KINDS = {}
+    SIGNALS = []
+
+    def __init__(self, hass: HomeAssistant, entry: ConfigEntry, kind: str) -> None:
+        """Initialize the entity."""
+        self.hass = hass
+        self._entry_id = entry.entry_id
+        self._api_id = str(entry.data.get(CONF_FRIENDLY_NAME, DEFAULT_NAME))
+        self._kind = kind
+        self._name, self._device_class, self._state_class = self.KINDS[kind]
+        self._unique_id = (self._entry_id + '_' + kind).lower()
+
+    @property
+    def name(self) -> str | None:
+        """Return the name of the entity."""
+        return self._name
+
+    @property
+    def unique_id(self) -> str | None:
+        """Return the unique identifier for this entity."""
+        return self._unique_id
+
+    @property
+    def device_class(self) -> SensorDeviceClass | None:
+        """Return the device_class of the entity."""
+        return self._device_class
+
+    @property
+    def state_class(self) -> SensorStateClass | None:
+        """Return the state_class of the entity."""
+        return self._state_class
+
+    @property
+    def entity_category(self) -> EntityCategory | None:
+        """Return the entity_category of the entity."""
+        return EntityCategory.DIAGNOSTIC
+
+    @property
+    def should_poll(self) -> bool:
+        """Return if the entity needs polling - updates arrive through dispatcher signals."""
+        return False
+
+    @property
+    def device_info(self) -> DeviceInfo:
+        """Return device information for device registry."""
+        return DeviceInfo(
+            identifiers={(DOMAIN, self._entry_id)},
+            manufacturer=DOMAIN,
+            name=self._api_id,
+            entry_type=DeviceEntryType.SERVICE,
+        )
 
+    async def async_added_to_hass(self) -> None:
+        """Subscribe to updates."""
+        for signal in self.SIGNALS:
+            self.async_on_remove(async_dispatcher_connect(self.hass, signal.format(self._entry_id), self.async_write_ha_state))
+
+
+class GoveeLifeRateLimitSensor(GoveeLifeEntrySensor):
+    """Diagnostic sensor for the rate limit the cloud reports in its response headers."""
+
+    KINDS = {
+        'limit': ('API rate limit', None, None),
+        'remaining': ('API requests remaining', None, SensorStateClass.MEASUREMENT),
+        'reset': ('API rate limit reset', SensorDeviceClass.TIMESTAMP, None),
+    }
+    SIGNALS = [SIGNAL_RATELIMIT_UPDATED]
+
+    def __init__(self, hass: HomeAssistant, entry: ConfigEntry, kind: str) -> None:
+        """Initialize the entity."""
+        super().__init__(hass, entry, kind)
+        self._unique_id = (self._entry_id + '_ratelimit_' + kind).lower()
+
+    @property
+    def available(self) -> bool:
+        """Return if a response reported the rate limit."""
+        return not self.hass.data[DOMAIN][self._entry_id].get(CONF_RATELIMIT, None) is None
+
+    @property
+    def native_value(self):
+        """Return the reported value."""
+        ratelimit = self.hass.data[DOMAIN][self._entry_id].get(CONF_RATELIMIT, None) or {}
+        value = ratelimit.get(self._kind, None)
+        if self._kind == 'reset' and not value is None:
+            return dt_util.utc_from_timestamp(value)
+        return value
+
+
+class GoveeLifeRequestCountSensor(GoveeLifeEntrySensor):
+    """Diagnostic sensor for the persisted request count and the projected exhaustion of the daily quota."""
+
+    KINDS = {
+        API_COUNT_POLL: ('API poll requests today', None, SensorStateClass.TOTAL_INCREASING),
+        API_COUNT_CONTROL: ('API control requests today', None, SensorStateClass.TOTAL_INCREASING),
+        'rate': ('API requests per hour', None, SensorStateClass.MEASUREMENT),
+        'exhaustion': ('API quota exhaustion', SensorDeviceClass.TIMESTAMP, None),
+    }
+    SIGNALS = [SIGNAL_API_COUNT_UPDATED, SIGNAL_RATELIMIT_UPDATED]
+
+    def _get_count(self) -> dict:
+        """Return the request count of today."""
+        v = self.hass.data[DOMAIN][self._entry_id].get(CONF_API_COUNT, {})
+        return v if v.get(ATTR_DATE, None) == dt_util.now().date() else {}
+
+    @property
+    def native_value(self):
+        """Return the count, the hourly rate or the projected exhaustion."""
+        if self._kind in [API_COUNT_POLL, API_COUNT_CONTROL]:
+            return self._get_count().get(self._kind, 0)
+        return GoveeAPI_GetRequestForecast(self.hass, self._entry_id).get(self._kind, None)
+
+    @property
+    def extra_state_attributes(self):
+        """Return the hourly histogram or the forecast basis."""
+        if self._kind in [API_COUNT_POLL, API_COUNT_CONTROL]:
+            hours = self._get_count().get(API_COUNT_HOURS, {})
+            return {'hours': {int(hour): v.get(self._kind, 0) for hour, v in sorted(hours.items(), key=lambda i: int(i[0]))}}
+        if self._kind == 'exhaustion':
+            forecast = GoveeAPI_GetRequestForecast(self.hass, self._entry_id)
+            exhaustion = forecast.get('exhaustion', None)
+            reset = forecast.get('reset', None)
+            return {
+                'remaining': forecast.get('remaining', None),
+                'reset': reset,
+                'before_reset': not exhaustion is None and not reset is None and exhaustion < reset,
+            }
+        return None
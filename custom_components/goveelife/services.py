@@ -5,11 +5,15 @@ from typing import Final
 import logging
 import asyncio
 import functools
+import cProfile
+import os
+import pstats
 
 import time
 import datetime
 
-from homeassistant.core import HomeAssistant, ServiceCall
+from homeassistant.core import HomeAssistant, ServiceCall, ServiceResponse
+from homeassistant.exceptions import HomeAssistantError
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
 from homeassistant.const import (
@@ -19,20 +23,27 @@ from homeassistant.const import (
 from .const import (
     DOMAIN,
     CONF_ENTRY_ID,
+    CONF_PROFILE_DURATION,
+    CONF_PROFILE_TOP,
+    DATA_PROFILE,
+    PROFILE_FILENAME,
 )
 
 _LOGGER: Final = logging.getLogger(__name__)
 
 
-async def async_registerService(hass: HomeAssistant, name:str , service) -> None:
-    """Register a service if it does not already exist"""
+async def async_registerService(hass: HomeAssistant, name:str , service, supports_response=None, schema=None) -> None:
+    """Register a service if it does not already exist - supports_response for services that return data, schema validates the call data"""
     try:
         _LOGGER.debug("%s - async_registerService: %s", DOMAIN, name)
         await asyncio.sleep(0)        
         if not hass.services.has_service(DOMAIN, name):
             #_LOGGER.info("%s - async_registerServic: register service: %s", DOMAIN, name)
             #hass.services.async_register(DOMAIN, name, service)
-            hass.services.async_register(DOMAIN, name, functools.partial(service, hass))
+            if supports_response is None:
+                hass.services.async_register(DOMAIN, name, functools.partial(service, hass), schema=schema)
+            else:
+                hass.services.async_register(DOMAIN, name, functools.partial(service, hass), schema=schema, supports_response=supports_response)
         else:
             _LOGGER.debug("%s - async_registerServic: service already exists: %s", DOMAIN, name)  
     except Exception as e:
@@ -58,3 +69,58 @@ async def async_service_SetPollInterval(hass: HomeAssistant, call: ServiceCall)
     except Exception as e:
         _LOGGER.error("%s - async_service_SetPollInterval: %s failed: %s (%s.%s)", DOMAIN, call, str(e), e.__class__.__module__, type(e).__name__)
 
+
+
+async def async_service_Profile(hass: HomeAssistant, call: ServiceCall) -> ServiceResponse:
+    """Service to profile the event loop for a while - writes a stats file to the config directory and returns the top functions of the integration"""
+    #duration and top are validated by PROFILE_SERVICE_SCHEMA
+    duration = call.data[CONF_PROFILE_DURATION]
+    top = call.data[CONF_PROFILE_TOP]
+
+    #only one profiler can be active - a second one would replace the first
+    if not hass.data.get(DATA_PROFILE, None) is None:
+        raise HomeAssistantError("a profile is already running")
+    try:
+        profiler = hass.data[DATA_PROFILE] = cProfile.Profile()
+        _LOGGER.info("%s - async_service_Profile: profiling for %s seconds", DOMAIN, duration)
+        #the event loop thread runs coordinator updates, requests and entity state writes - executor jobs are not covered
+        profiler.enable()
+        try:
+            await asyncio.sleep(duration)
+        finally:
+            profiler.disable()
+            hass.data.pop(DATA_PROFILE, None)
+
+        filename = hass.config.path(PROFILE_FILENAME.format(int(time.time())))
+        await hass.async_add_executor_job(profiler.dump_stats, filename)
+        _LOGGER.info("%s - async_service_Profile: stats written to %s", DOMAIN, filename)
+        summary = await hass.async_add_executor_job(_profile_summary, profiler, top)
+        return dict(summary, filename=filename, duration=duration)
+
+    except Exception as e:
+        _LOGGER.error("%s - async_service_Profile: %s failed: %s (%s.%s)", DOMAIN, call, str(e), e.__class__.__module__, type(e).__name__)
+        raise HomeAssistantError("profile failed: %s" % str(e)) from e
+
+
+def _profile_summary(profiler: cProfile.Profile, top: int) -> dict:
+    """Return the time spent in the integration and its top functions by cumulative time"""
+    path = os.path.dirname(os.path.realpath(__file__)) + os.sep
+    stats = pstats.Stats(profiler)
+    functions = []
+    own_time = 0.0
+    for (filename, line, name), (primitive_calls, calls, tottime, cumtime, callers) in stats.stats.items():
+        if not filename.startswith(path):
+            continue
+        own_time += tottime
+        functions.append({
+            'function': '%s:%s(%s)' % (filename[len(path):], line, name),
+            'calls': calls,
+            'tottime': round(tottime, 6),
+            'cumtime': round(cumtime, 6),
+        })
+    functions.sort(key=lambda f: f['cumtime'], reverse=True)
+    return {
+        'total_time': round(stats.total_tt, 6),
+        'integration_time': round(own_time, 6),
+        'top': functions[:top],
+    }
@@ -0,0 +1,140 @@
+"""Device state store for the Govee Life integration."""
+
+from __future__ import annotations
+from typing import Final
+import logging
+import sys
+
+_LOGGER: Final = logging.getLogger(__name__)
+
+CAPABILITY_ONLINE: Final = ('devices.capabilities.online', 'online')
+
+#(type, instance) keys shared by all devices - one tuple of interned strings per capability kind
+_CAPABILITY_KEYS = {}
+
+
+def capability_key(value_type: str, value_instance: str) -> tuple:
+    """Return the shared (type, instance) key of a capability."""
+    key = (value_type, value_instance)
+    try:
+        return _CAPABILITY_KEYS[key]
+    except KeyError:
+        shared = _CAPABILITY_KEYS[key] = (sys.intern(value_type), sys.intern(value_instance))
+        return shared
+
+
+class GoveeAPICapabilityState:
+    """State of a capability - records are replaced, never changed.
+
+    The value is resolved once at parse time. A capability that carries more
+    than {'state': {'value': ...}} keeps the rest in extra to rebuild its dict."""
+
+    __slots__ = ('type', 'instance', 'value', 'extra')
+
+    def __init__(self, value_type: str, value_instance: str, value=None, extra: dict | None = None) -> None:
+        """Initialize the capability state."""
+        self.type, self.instance = capability_key(value_type, value_instance)
+        self.value = value
+        self.extra = extra
+
+    @classmethod
+    def from_dict(cls, cap: dict) -> GoveeAPICapabilityState:
+        """Return the record of a capability in the device/state payload shape."""
+        return _parse_capability(cap)[1]
+
+    def as_dict(self) -> dict:
+        """Return the capability in the device/state payload shape."""
+        if self.extra is None:
+            return {'type': self.type, 'instance': self.instance, 'state': {'value': self.value}}
+        return dict({'type': self.type, 'instance': self.instance}, **self.extra)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, GoveeAPICapabilityState):
+            return NotImplemented
+        return self.type is other.type and self.instance is other.instance and self.value == other.value and self.extra == other.extra
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return 'GoveeAPICapabilityState(%s)' % self.as_dict()
+
+
+def _parse_capability(cap: dict) -> tuple:
+    """Return the shared key and the record of a capability dict - runs for every capability of every poll."""
+    key = capability_key(cap['type'], cap['instance'])
+    state = cap.get('state', None)
+    record = object.__new__(GoveeAPICapabilityState)
+    record.type, record.instance = key
+    record.extra = None
+    if type(state) is dict and len(state) == 1 and 'value' in state:
+        record.value = state['value']
+        if len(cap) == 3:
+            return key, record
+    else:
+        record.value = state.get('value', state.get(key[1], None)) if isinstance(state, dict) else None
+    record.extra = {k: v for k, v in cap.items() if not k in ('type', 'instance')}
+    return key, record
+
+
+def _capability_state(cap) -> GoveeAPICapabilityState:
+    """Return a capability as record - records are taken as they are."""
+    if isinstance(cap, GoveeAPICapabilityState):
+        return cap
+    return GoveeAPICapabilityState.from_dict(cap)
+
+
+class GoveeAPIDeviceState:
+    """Capability state of a device indexed by (type, instance)."""
+
+    __slots__ = ('sku', 'device', 'capabilities')
+
+    def __init__(self, payload: dict) -> None:
+        """Initialize the state from a device/state payload."""
+        self.sku = payload.get('sku', None)
+        self.device = payload.get('device', None)
+        capabilities = self.capabilities = {}
+        for cap in payload.get('capabilities', []):
+            key, cap = _parse_capability(cap)
+            capabilities[key] = cap
+
+    def get_capability(self, value_type: str, value_instance: str) -> GoveeAPICapabilityState | None:
+        """Return the capability of type and instance."""
+        return self.capabilities.get((value_type, value_instance), None)
+
+    def get_value(self, value_type: str, value_instance: str):
+        """Return the state value of a capability."""
+        cap = self.capabilities.get((value_type, value_instance), None)
+        if cap is None:
+            return None
+        return cap.value
+
+    def update_capability(self, cap) -> GoveeAPICapabilityState | None:
+        """Replace the state of a known capability - a record or a capability dict, returns the previous record."""
+        cap = _capability_state(cap)
+        key = capability_key(cap.type, cap.instance)
+        old_cap = self.capabilities.get(key, None)
+        if old_cap is not None:
+            self.capabilities[key] = cap
+        return old_cap
+
+    def set_capability(self, cap) -> GoveeAPICapabilityState | None:
+        """Set the state of a capability - also one the state payload does not report, e.g. a pushed event."""
+        cap = _capability_state(cap)
+        key = capability_key(cap.type, cap.instance)
+        old_cap = self.capabilities.get(key, None)
+        self.capabilities[key] = cap
+        return old_cap
+
+    def changed_capabilities(self, other: GoveeAPIDeviceState) -> set:
+        """Return the (type, instance) keys of capabilities that differ from the other state."""
+        return {key for key in self.capabilities.keys() | other.capabilities.keys() if not self.capabilities.get(key, None) == other.capabilities.get(key, None)}
+
+    @property
+    def online(self) -> bool:
+        """Return if the device reports itself online."""
+        value = self.get_value(*CAPABILITY_ONLINE)
+        return False if value is None else value
+
+    def as_dict(self) -> dict:
+        """Return the state in the device/state payload shape - rebuilt on every call."""
+        return {'sku': self.sku, 'device': self.device, 'capabilities': [cap.as_dict() for cap in self.capabilities.values()]}
@@ -3,34 +3,19 @@
 from __future__ import annotations
 from typing import Final
 import logging
-import asyncio
-import re
 
 from homeassistant.core import HomeAssistant
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.const import CONF_DEVICES, STATE_ON, STATE_OFF, STATE_UNKNOWN
+from homeassistant.const import STATE_ON, STATE_OFF, STATE_UNKNOWN
 
 from .entities import GoveeLifePlatformEntity
 from .utils import GoveeAPI_GetCachedStateValue, async_GoveeAPI_ControlDevice
-from .const import DOMAIN, CONF_COORDINATORS
+from .const import DOMAIN, CONF_COORDINATORS, CONF_PLATFORM_PLAN
 
 _LOGGER: Final = logging.getLogger(__name__)
 platform = 'switch'
 
-platform_device_types = [
-    'devices.types.heater:.*on_off:.*',
-    'devices.types.heater:.*toggle:oscillationToggle',
-    'devices.types.fan:.*toggle:oscillationToggle',
-    'devices.types.socket:.*on_off:.*',
-    'devices.types.socket:.*toggle:.*',
-    'devices.types.light:.*toggle:gradientToggle',
-    'devices.types.ice_maker:.*on_off:.*',
-    'devices.types.aroma_diffuser:.*on_off:.*',
-    'devices.types.humidifier:.*on_off:.*',
-    'devices.types.humidifier:.*toggle:nightlightToggle',
-    'devices.types.kettle:.*on_off:.*'
-]
 
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry, async_add_entities):
@@ -39,24 +24,20 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry, async_add_e
     entities = []
 
     try:
-        _LOGGER.debug("%s - async_setup_entry %s: Getting cloud devices from data store", entry.entry_id, platform)
+        _LOGGER.debug("%s - async_setup_entry %s: Getting platform plan from data store", entry.entry_id, platform)
         entry_data = hass.data[DOMAIN][entry.entry_id]
-        api_devices = entry_data.get(CONF_DEVICES, [])
+        platform_plan = entry_data[CONF_PLATFORM_PLAN].get(platform, [])
     except Exception as e:
-        _LOGGER.error("%s - async_setup_entry %s: Getting cloud devices from data store failed: %s (%s.%s)", entry.entry_id, platform, str(e), e.__class__.__module__, type(e).__name__)
+        _LOGGER.error("%s - async_setup_entry %s: Getting platform plan from data store failed: %s (%s.%s)", entry.entry_id, platform, str(e), e.__class__.__module__, type(e).__name__)
         return False
 
-    for device_cfg in api_devices:
+    for device_cfg, capability in platform_plan:
         try:
             device = device_cfg.get('device')
             coordinator = entry_data[CONF_COORDINATORS][device]
-            for capability in device_cfg.get('capabilities', []):
-                capability_key = f"{device_cfg.get('type', STATE_UNKNOWN)}:{capability.get('type', STATE_UNKNOWN)}:{capability.get('instance', STATE_UNKNOWN)}"
-                if any(re.match(platform_match, capability_key) for platform_match in platform_device_types):
-                    _LOGGER.debug("%s - async_setup_entry %s: Setup capability: %s|%s|%s", entry.entry_id, platform, device, capability.get('type', STATE_UNKNOWN).split('.')[-1], capability.get('instance', STATE_UNKNOWN))
-                    entity = GoveeLifeSwitch(hass, entry, coordinator, device_cfg, platform=platform, cap=capability)
-                    entities.append(entity)
-            await asyncio.sleep(0)
+            _LOGGER.debug("%s - async_setup_entry %s: Setup capability: %s|%s|%s", entry.entry_id, platform, device, capability.get('type', STATE_UNKNOWN).split('.')[-1], capability.get('instance', STATE_UNKNOWN))
+            entity = GoveeLifeSwitch(hass, entry, coordinator, device_cfg, platform=platform, cap=capability)
+            entities.append(entity)
         except Exception as e:
             _LOGGER.error("%s - async_setup_entry %s: Setup device failed: %s (%s.%s)", entry.entry_id, platform, str(e), e.__class__.__module__, type(e).__name__)
             return False
@@ -90,16 +71,21 @@ class GoveeLifeSwitch(GoveeLifePlatformEntity):
             else:
                 _LOGGER.warning("%s - %s: _init_platform_specific: unhandled cap option: %s -> %s", self._api_id, self._identifier, self._cap['type'], option)
 
+    def _update_state_view(self):
+        """Decode the cached device state into the values the properties return."""
+        super()._update_state_view()
+        value = GoveeAPI_GetCachedStateValue(self.hass, self._entry_id, self._device_cfg.get('device'), self._cap.get('type', STATE_UNKNOWN), self._cap.get('instance', STATE_UNKNOWN))
+        self._state = self._state_mapping.get(value, STATE_UNKNOWN)
+
     @property
     def state(self) -> str | None:
         """Return the current state of the switch."""
-        value = GoveeAPI_GetCachedStateValue(self.hass, self._entry_id, self._device_cfg.get('device'), self._cap.get('type', STATE_UNKNOWN), self._cap.get('instance', STATE_UNKNOWN))
-        return self._state_mapping.get(value, STATE_UNKNOWN)
+        return self._state
 
     @property
     def is_on(self) -> bool:
         """Return true if switch is on."""
-        return self.state == STATE_ON
+        return self._state == STATE_ON
 
     async def async_turn_on(self, **kwargs) -> None:
         """Turn the switch on."""
@@ -110,8 +96,7 @@ class GoveeLifeSwitch(GoveeLifePlatformEntity):
                 "instance": self._cap['instance'],
                 "value": self._state_mapping_set[STATE_ON]
             }
-            if await async_GoveeAPI_ControlDevice(self.hass, self._entry_id, self._device_cfg, state_capability):
-                self.async_write_ha_state()
+            await async_GoveeAPI_ControlDevice(self.hass, self._entry_id, self._device_cfg, state_capability)
         except Exception as e:
             _LOGGER.error("%s - %s: async_turn_on failed: %s (%s.%s)", self._api_id, self._identifier, str(e), e.__class__.__module__, type(e).__name__)
 
@@ -124,7 +109,6 @@ class GoveeLifeSwitch(GoveeLifePlatformEntity):
                 "instance": self._cap['instance'],
                 "value": self._state_mapping_set[STATE_OFF]
             }
-            if await async_GoveeAPI_ControlDevice(self.hass, self._entry_id, self._device_cfg, state_capability):
-                self.async_write_ha_state()
+            await async_GoveeAPI_ControlDevice(self.hass, self._entry_id, self._device_cfg, state_capability)
         except Exception as e:
             _LOGGER.error("%s - %s: async_turn_off failed: %s (%s.%s)", self._api_id, self._identifier, str(e), e.__class__.__module__, type(e).__name__)
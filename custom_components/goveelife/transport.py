@@ -0,0 +1,204 @@
+"""Request transports for the Govee Life integration."""
+
+from __future__ import annotations
+from typing import Final
+import logging
+import asyncio
+import aiohttp
+import json
+import os
+import time
+import itertools
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.const import (
+    CONF_API_KEY,
+    CONF_PARAMS,
+    CONF_TIMEOUT,
+)
+
+from .const import (
+    DOMAIN,
+    CLOUD_API_URL_OPENAPI,
+    CLOUD_API_HEADER_KEY,
+    DEFAULT_TIMEOUT,
+    STATE_DEBUG_FILENAME,
+    TRANSPORT_RECORD_FILENAME,
+    TRANSPORT_RECORD_FLUSH,
+    TRANSPORT_REPLAY_FILENAME,
+)
+
+_LOGGER: Final = logging.getLogger(__name__)
+
+
+def _request_key(method: str, path: str, data) -> tuple:
+    """Return the index key of a request: method, path, device and capability."""
+    payload = (data or {}).get('payload', {})
+    capability = payload.get('capability', {})
+    return (method, path.strip('/'), payload.get('device', None), capability.get('type', None), capability.get('instance', None))
+
+
+class GoveeAPITransport:
+    """Cloud transport - performs requests on the shared keep-alive client session."""
+
+    def __init__(self, hass: HomeAssistant, entry_id: str) -> None:
+        """Initialize the transport."""
+        self.hass = hass
+        self._entry_id = entry_id
+
+    async def async_request(self, method: str, path: str, data=None):
+        """Async: Perform a request and return status code, response headers (lower case names) and response text."""
+        entry_data = self.hass.data[DOMAIN][self._entry_id]
+        headers = {"Content-Type": "application/json", CLOUD_API_HEADER_KEY: str(entry_data[CONF_PARAMS].get(CONF_API_KEY, None))}
+        timeout = entry_data[CONF_PARAMS].get(CONF_TIMEOUT, DEFAULT_TIMEOUT)
+        #total is left open - connect and read are bound separately so a cancelled request releases its connection immediately
+        client_timeout = aiohttp.ClientTimeout(total=None, sock_connect=timeout, sock_read=timeout)
+        url = CLOUD_API_URL_OPENAPI + '/' + path.strip("/")
+
+        session = async_get_clientsession(self.hass)
+        async with session.request(method, url, json=data, headers=headers, timeout=client_timeout) as r:
+            text = await r.text()
+            return r.status, {k.lower(): v for k, v in r.headers.items()}, text
+
+    async def async_close(self) -> None:
+        """Async: Release resources held by the transport."""
+        return None
+
+
+class GoveeAPITransportRecorder(GoveeAPITransport):
+    """Cloud transport that records request/response pairs and their latency."""
+
+    def __init__(self, hass: HomeAssistant, entry_id: str, filename: str) -> None:
+        """Initialize the recording transport."""
+        super().__init__(hass, entry_id)
+        self._filename = filename
+        self._buffer = []
+        self._start = time.monotonic()
+
+    async def async_request(self, method: str, path: str, data=None):
+        """Async: Perform a cloud request and record it."""
+        start = time.monotonic()
+        status, headers, text = await super().async_request(method, path, data)
+        try:
+            self._buffer.append(json.dumps({
+                "t": round(start - self._start, 3),
+                "method": method,
+                "path": path.strip('/'),
+                "request": data,
+                "status": status,
+                "headers": {k: v for k, v in headers.items() if 'ratelimit' in k or k == 'retry-after'},
+                "latency": round(time.monotonic() - start, 3),
+                "body": text,
+            }, separators=(',', ':')))
+            if len(self._buffer) >= TRANSPORT_RECORD_FLUSH:
+                await self.async_flush()
+        except Exception as e:
+            _LOGGER.error("%s - GoveeAPITransportRecorder: record failed: %s (%s.%s)", self._entry_id, str(e), e.__class__.__module__, type(e).__name__)
+        return status, headers, text
+
+    def _write(self, lines) -> None:
+        """Append recorded lines to the record file - a new file starts with its header."""
+        header = not os.path.isfile(self._filename) or os.path.getsize(self._filename) == 0
+        with open(self._filename, 'a') as stream:
+            if header:
+                stream.write(json.dumps({"version": 1, "replay_latency": False}) + '\n')
+            stream.write('\n'.join(lines) + '\n')
+
+    async def async_flush(self) -> None:
+        """Async: Write buffered records to disk."""
+        lines, self._buffer = self._buffer, []
+        if lines:
+            _LOGGER.debug("%s - GoveeAPITransportRecorder: writing %s records to %s", self._entry_id, len(lines), self._filename)
+            await self.hass.async_add_executor_job(self._write, lines)
+
+    async def async_close(self) -> None:
+        """Async: Flush remaining records."""
+        await self.async_flush()
+
+
+class GoveeAPITransportReplay(GoveeAPITransport):
+    """Transport that serves recorded responses from an in-memory index."""
+
+    def __init__(self, hass: HomeAssistant, entry_id: str, records, replay_latency: bool = False) -> None:
+        """Initialize the replay transport from a list of records."""
+        super().__init__(hass, entry_id)
+        self._replay_latency = replay_latency
+        index = {}
+        for record in records:
+            key = _request_key(record['method'], record['path'], record.get('request', None))
+            index.setdefault(key, []).append((record['status'], record.get('headers', {}), record['body'], record.get('latency', 0)))
+        #recorded sequences are served in order and start over once exhausted
+        self._index = {key: itertools.cycle(responses) for key, responses in index.items()}
+
+    async def async_request(self, method: str, path: str, data=None):
+        """Async: Return the next recorded response of the request."""
+        key = _request_key(method, path, data)
+        responses = self._index.get(key, None)
+        if responses is None:
+            return self._unrecorded_response(key, data)
+        status, headers, text, latency = next(responses)
+        if self._replay_latency and latency:
+            await asyncio.sleep(latency)
+        return status, headers, text
+
+    def _unrecorded_response(self, key: tuple, data):
+        """Return a response for a request that was not recorded."""
+        if key[1] == 'device/control':
+            #acknowledge control requests the way the cloud does
+            capability = dict(data['payload']['capability'])
+            capability['state'] = {"status": "success"}
+            return 200, {}, json.dumps({"requestId": "replay", "msg": "success", "code": 200, "capability": capability})
+        _LOGGER.warning("%s - GoveeAPITransportReplay: request not recorded: %s", self._entry_id, key)
+        return 404, {}, json.dumps({"code": 404, "msg": "not recorded"})
+
+
+def _load_replay_records(filename: str):
+    """Load a record file - returns the header and the records."""
+    header = {}
+    records = []
+    with open(filename, 'r') as stream:
+        for line in stream:
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            if 'method' in record:
+                records.append(record)
+            else:
+                header = record
+    return header, records
+
+
+def _load_legacy_debug_records(filename: str):
+    """Convert a diagnostics download into replay records."""
+    with open(filename, 'r') as stream:
+        payload = json.load(stream)
+    records = [{"method": "GET", "path": "user/devices", "status": 200, "body": json.dumps({"code": 200, "message": "success", "data": payload['data']['cloud_devices']})}]
+    for device, state in payload['data'].get('cloud_states', {}).items():
+        records.append({"method": "POST", "path": "device/state", "request": {"payload": {"device": device}}, "status": 200, "body": json.dumps({"requestId": "replay", "msg": "success", "code": 200, "payload": state})})
+    return {}, records
+
+
+async def async_GoveeAPI_CreateTransport(hass: HomeAssistant, entry_id: str) -> GoveeAPITransport:
+    """Async: Create the transport of an entry - replay or record if the matching file exists in the component folder"""
+    try:
+        path = os.path.dirname(os.path.realpath(__file__))
+        replay_file = os.path.join(path, TRANSPORT_REPLAY_FILENAME)
+        legacy_file = path + STATE_DEBUG_FILENAME
+        record_file = os.path.join(path, TRANSPORT_RECORD_FILENAME)
+
+        if await hass.async_add_executor_job(os.path.isfile, replay_file):
+            header, records = await hass.async_add_executor_job(_load_replay_records, replay_file)
+            _LOGGER.warning("%s - async_GoveeAPI_CreateTransport: replaying %s records from: %s", entry_id, len(records), replay_file)
+            return GoveeAPITransportReplay(hass, entry_id, records, header.get('replay_latency', False))
+        if await hass.async_add_executor_job(os.path.isfile, legacy_file):
+            header, records = await hass.async_add_executor_job(_load_legacy_debug_records, legacy_file)
+            _LOGGER.warning("%s - async_GoveeAPI_CreateTransport: replaying diagnostics from: %s", entry_id, legacy_file)
+            return GoveeAPITransportReplay(hass, entry_id, records)
+        if await hass.async_add_executor_job(os.path.isfile, record_file):
+            _LOGGER.warning("%s - async_GoveeAPI_CreateTransport: recording requests to: %s", entry_id, record_file)
+            return GoveeAPITransportRecorder(hass, entry_id, record_file)
+    except Exception as e:
+        _LOGGER.error("%s - async_GoveeAPI_CreateTransport: replay / record setup failed - using cloud: %s (%s.%s)", entry_id, str(e), e.__class__.__module__, type(e).__name__)
+    return GoveeAPITransport(hass, entry_id)
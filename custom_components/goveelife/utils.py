@@ -4,36 +4,91 @@ from __future__ import annotations
 from typing import Final
 import logging
 import asyncio
-import requests
 import json
-import os
 import uuid
 import re
-from datetime import date
+import math
+import time
+from datetime import timedelta
 
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.helpers import device_registry as dr
+from homeassistant.helpers.dispatcher import async_dispatcher_send
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
 from homeassistant.const import (
     ATTR_DATE,
-    CONF_API_KEY,
     CONF_COUNT,
+    CONF_DEVICES,
+    CONF_OPTIMISTIC,
     CONF_PARAMS,
     CONF_STATE,
-    CONF_TIMEOUT,
+    STATE_UNKNOWN,
 )
 
 from .const import (
     DOMAIN,
     CONF_API_COUNT,
-    CLOUD_API_URL_OPENAPI,
-    CLOUD_API_HEADER_KEY,
-    STATE_DEBUG_FILENAME,
+    CONF_API_COUNT_STORE,
+    CONF_CIRCUIT,
+    CONF_COORDINATORS,
+    CONF_LAN,
+    CONF_PUSH,
+    CONF_RATELIMIT,
+    CONF_ROUTER,
+    CONF_SCHEDULER,
+    CONF_SIGNAL_THROTTLE,
+    CONF_STATE_INFLIGHT,
+    CONF_STATE_PENDING,
+    CONF_STATE_UPDATED,
+    CONF_TRANSPORT,
+    API_COUNT_CONTROL,
+    API_COUNT_HOURS,
+    API_COUNT_POLL,
+    API_COUNT_SAVE_DELAY,
+    API_CONTROL_RESERVE,
+    API_DAILY_LIMIT,
+    DEFAULT_OPTIMISTIC,
+    LAN_CLOUD_REFRESH,
+    PLATFORM_CAPABILITY_TYPES,
+    PLATFORM_DEVICE_TYPES,
+    PUSH_POLL_INTERVAL,
+    SIGNAL_API_COUNT_UPDATED,
+    SIGNAL_RATELIMIT_UPDATED,
+    SIGNAL_THROTTLE_INTERVAL,
+    STATE_FRESHNESS,
+    STORAGE_KEY_API_COUNT,
+    STORAGE_VERSION,
+    SUPPORTED_PLATFORMS,
 )
+from .ratelimit import (
+    GoveeAPICircuitBreaker,
+    GoveeAPICircuitOpenError,
+    GoveeAPI_GetRateLimit,
+    GoveeAPI_GetRetryAfter,
+)
+from .router import (
+    GoveeAPIRouter,
+    ROUTE_CLOUD,
+    ROUTE_LAN,
+)
+from .state import (
+    GoveeAPICapabilityState,
+    GoveeAPIDeviceState,
+)
+from .transport import GoveeAPITransport
 
 _LOGGER: Final = logging.getLogger(__name__)
 
+#one alternation per platform - matched once per capability while building the platform plan
+_PLATFORM_CAPABILITY_MATCH: Final = {
+    platform: re.compile('|'.join('(?:' + pattern + ')' for pattern in patterns))
+    for platform, patterns in PLATFORM_CAPABILITY_TYPES.items()
+}
+
 async def async_ProgrammingDebug(obj, show_all:bool=False) -> None:
     """Async: return all attributes of a specific objec""" 
     try:
@@ -61,62 +116,306 @@ def ProgrammingDebug(obj, show_all:bool=False) -> None:
         _LOGGER.error("%s - ProgrammingDebug: failed: %s (%s.%s)", DOMAIN, str(e), e.__class__.__module__, type(e).__name__)
         pass
 
-async def async_GooveAPI_CountRequests(hass: HomeAssistant, entry_id: str) -> None:
-    """Asnyc: Count daily number of requests to GooveAPI"""       
+async def async_GooveAPI_LoadRequestCount(hass: HomeAssistant, entry_id: str) -> None:
+    """Asnyc: Load the persisted daily request count - a count of a past day starts over"""
+    entry_data=hass.data[DOMAIN][entry_id]
+    store=entry_data[CONF_API_COUNT_STORE]=Store(hass, STORAGE_VERSION, STORAGE_KEY_API_COUNT.format(entry_id))
+    try:
+        v = await store.async_load() or {}
+        today = dt_util.now().date()
+        if v.get(ATTR_DATE, None) == today.isoformat():
+            v[ATTR_DATE] = today
+            entry_data[CONF_API_COUNT] = v
+            _LOGGER.debug("%s - async_GooveAPI_LoadRequestCount: %s -> %s", entry_id, v[ATTR_DATE], v.get(CONF_COUNT, 0))
+    except Exception as e:
+        _LOGGER.warning("%s - async_GooveAPI_LoadRequestCount: Failed: %s (%s.%s)", entry_id, str(e), e.__class__.__module__, type(e).__name__)
+
+async def async_GooveAPI_SaveRequestCount(hass: HomeAssistant, entry_id: str) -> None:
+    """Asnyc: Write the daily request count to storage now"""
     try:
         entry_data=hass.data[DOMAIN][entry_id]
-        today = date.today()
+        store=entry_data.get(CONF_API_COUNT_STORE, None)
+        if not store is None and CONF_API_COUNT in entry_data:
+            await store.async_save(_GooveAPI_SerializeRequestCount(entry_data[CONF_API_COUNT]))
+    except Exception as e:
+        _LOGGER.error("%s - async_GooveAPI_SaveRequestCount: Failed: %s (%s.%s)", entry_id, str(e), e.__class__.__module__, type(e).__name__)
+
+def _GooveAPI_SerializeRequestCount(v) -> dict:
+    """Return the request count in its storage format"""
+    return dict(v, **{ATTR_DATE: v[ATTR_DATE].isoformat()})
+
+async def async_GooveAPI_CountRequests(hass: HomeAssistant, entry_id: str, path: str = None) -> None:
+    """Asnyc: Count daily and hourly number of requests to GooveAPI"""       
+    try:
+        entry_data=hass.data[DOMAIN][entry_id]
+        #local day like the hourly buckets
+        today = dt_util.now().date()
+        kind = API_COUNT_CONTROL if str(path).strip('/') == 'device/control' else API_COUNT_POLL
         #entry_data.setdefault(CONF_API_COUNT, {CONF_COUNT : 0, ATTR_DATE : today})        
         v = entry_data.get(CONF_API_COUNT, {CONF_COUNT : 0, ATTR_DATE : today})        
         if v[ATTR_DATE] == today:
             v[CONF_COUNT] = int(v[CONF_COUNT]) + 1
+            v[kind] = int(v.get(kind, 0)) + 1
         else:
-            v[CONF_COUNT] = 1           
+            v = {CONF_COUNT : 1, ATTR_DATE : today, kind : 1}
+        #hour keys are strings to survive the json storage
+        hour = v.setdefault(API_COUNT_HOURS, {}).setdefault(str(dt_util.now().hour), {})
+        hour[kind] = hour.get(kind, 0) + 1
         entry_data[CONF_API_COUNT] = v
-        
-        _LOGGER.debug("%s - async_GooveAPI_CountRequests: %s -> %s", entry_id, v[ATTR_DATE], v[CONF_COUNT])
+
+        store = entry_data.get(CONF_API_COUNT_STORE, None)
+        if not store is None:
+            store.async_delay_save(lambda: _GooveAPI_SerializeRequestCount(v), API_COUNT_SAVE_DELAY)
+        GoveeAPI_DispatchSignal(hass, entry_id, SIGNAL_API_COUNT_UPDATED)
+        _LOGGER.debug("%s - async_GooveAPI_CountRequests: %s -> %s (%s: %s)", entry_id, v[ATTR_DATE], v[CONF_COUNT], kind, v[kind])
     except Exception as e:
         _LOGGER.error("%s - async_GooveAPI_CountRequests: Failed: %s (%s.%s)", entry_id, str(e), e.__class__.__module__, type(e).__name__)
         return None
 
-async def async_GoveeAPI_GETRequest(hass: HomeAssistant, entry_id: str, path: str) -> None:
-    """Asnyc: Request device list via GooveAPI"""
+def GoveeAPI_DispatchSignal(hass: HomeAssistant, entry_id: str, signal: str) -> None:
+    """Send a dispatcher signal of the entry at most once per SIGNAL_THROTTLE_INTERVAL - sends in between are merged into one at its end"""
+    throttle = hass.data[DOMAIN][entry_id].setdefault(CONF_SIGNAL_THROTTLE, {}).setdefault(signal, {'last': None, 'unsub': None})
+    if not throttle['unsub'] is None:
+        return None
+
+    @callback
+    def _async_send(_now=None) -> None:
+        throttle['unsub'] = None
+        throttle['last'] = time.monotonic()
+        async_dispatcher_send(hass, signal.format(entry_id))
+
+    elapsed = None if throttle['last'] is None else time.monotonic() - throttle['last']
+    if elapsed is None or elapsed >= SIGNAL_THROTTLE_INTERVAL:
+        _async_send()
+    else:
+        throttle['unsub'] = async_call_later(hass, SIGNAL_THROTTLE_INTERVAL - elapsed, _async_send)
+
+def GoveeAPI_CancelSignals(hass: HomeAssistant, entry_id: str) -> None:
+    """Drop the throttled dispatcher signals of the entry that are not sent yet"""
+    for throttle in hass.data[DOMAIN][entry_id].get(CONF_SIGNAL_THROTTLE, {}).values():
+        if not throttle['unsub'] is None:
+            throttle['unsub']()
+            throttle['unsub'] = None
+
+def GoveeAPI_GetRequestForecast(hass: HomeAssistant, entry_id: str) -> dict:
+    """Return the request rate of the last hour, the remaining quota and the projected time of its exhaustion"""
     try:
-        debug_file=os.path.dirname(os.path.realpath(__file__))+STATE_DEBUG_FILENAME
-        if os.path.isfile(debug_file):
-            _LOGGER.debug("%s - async_GoveeAPI_GETRequest: load debug file: %s", entry_id, debug_file)
-            with open(debug_file, 'r') as stream:
-                payload = json.load(stream)
-                return payload['data']['cloud_devices']
+        entry_data=hass.data[DOMAIN][entry_id]
+        v = entry_data.get(CONF_API_COUNT, {})
+        if not v.get(ATTR_DATE, None) == dt_util.now().date():
+            v = {}
+        now = dt_util.now()
+        hours = v.get(API_COUNT_HOURS, {})
+        #sliding hour - the previous hour is weighted by the part of it that is still inside the window
+        current = sum(hours.get(str(now.hour), {}).values())
+        previous = sum(hours.get(str(now.hour - 1), {}).values()) if now.hour > 0 else 0
+        rate = current + previous * (1 - now.minute / 60)
+
+        ratelimit = entry_data.get(CONF_RATELIMIT, None)
+        if not ratelimit is None and not ratelimit.get('reset', None) is None and ratelimit['reset'] > time.time():
+            remaining = ratelimit['remaining']
+            reset = dt_util.utc_from_timestamp(ratelimit['reset'])
+        else:
+            remaining = max(API_DAILY_LIMIT - int(v.get(CONF_COUNT, 0)), 0)
+            reset = dt_util.start_of_local_day(now) + timedelta(days=1)
+
+        exhaustion = None
+        if rate > 0:
+            exhaustion = now + timedelta(hours=remaining / rate)
+        return {'rate': round(rate, 1), 'remaining': remaining, 'reset': reset, 'exhaustion': exhaustion}
     except Exception as e:
-        _LOGGER.error("%s - async_GoveeAPI_GETRequest: debug file load failed: %s (%s.%s)", entry_id, str(e), e.__class__.__module__, type(e).__name__)
-        return None
+        _LOGGER.error("%s - GoveeAPI_GetRequestForecast: Failed: %s (%s.%s)", entry_id, str(e), e.__class__.__module__, type(e).__name__)
+        return {}
+
+def GoveeAPI_CreatePlatformPlan(entry_id: str, api_devices) -> dict:
+    """Return per platform the (device_cfg, capability) pairs to set up entities for - capability is None for device entities"""
+    plan = {platform: [] for platform in SUPPORTED_PLATFORMS}
+    device_platforms = {}
+    for platform, device_types in PLATFORM_DEVICE_TYPES.items():
+        for device_type in device_types:
+            device_platforms.setdefault(device_type, []).append(platform)
+    capability_platforms = {}
+
+    for device_cfg in api_devices:
+        try:
+            device_type = device_cfg.get('type', STATE_UNKNOWN)
+            for platform in device_platforms.get(device_type, []):
+                plan[platform].append((device_cfg, None))
+            for capability in device_cfg.get('capabilities', []):
+                r = device_type + ':' + capability.get('type', STATE_UNKNOWN) + ':' + capability.get('instance', STATE_UNKNOWN)
+                platforms = capability_platforms.get(r, None)
+                if platforms is None:
+                    platforms = capability_platforms[r] = [platform for platform, match in _PLATFORM_CAPABILITY_MATCH.items() if match.match(r)]
+                for platform in platforms:
+                    plan[platform].append((device_cfg, capability))
+        except Exception as e:
+            _LOGGER.error("%s - GoveeAPI_CreatePlatformPlan: device failed: %s: %s (%s.%s)", entry_id, device_cfg.get('device', None), str(e), e.__class__.__module__, type(e).__name__)
 
+    _LOGGER.debug("%s - GoveeAPI_CreatePlatformPlan: %s", entry_id, {platform: len(v) for platform, v in plan.items()})
+    return plan
+
+def GoveeAPI_GetPlannedPollInterval(hass: HomeAssistant, entry_id: str) -> int:
+    """Return the per device poll interval in seconds that fits the remaining daily GooveAPI budget"""
     try:
-        _LOGGER.debug("%s - async_GoveeAPI_GETRequest: perform api request", entry_id)
         entry_data=hass.data[DOMAIN][entry_id]
-        
-        #_LOGGER.debug("%s - async_GoveeAPI_GETRequest: perpare parameters for GET request"
-        headers={"Content-Type":"application/json",CLOUD_API_HEADER_KEY: str(entry_data[CONF_PARAMS].get(CONF_API_KEY, None))}
-        timeout=entry_data[CONF_PARAMS].get(CONF_TIMEOUT, None)
-        url=CLOUD_API_URL_OPENAPI + '/' + path.strip("/")
+        v = entry_data.get(CONF_API_COUNT, {})
+        if not v.get(ATTR_DATE, None) == dt_util.now().date():
+            v = {}
+
+        ratelimit = entry_data.get(CONF_RATELIMIT, None)
+        if not ratelimit is None and not ratelimit.get('reset', None) is None and ratelimit['reset'] > time.time():
+            #the server reported quota covers all clients of the account - only the unused control reserve is held back
+            reserve = (ratelimit.get('limit', None) or API_DAILY_LIMIT) * API_CONTROL_RESERVE
+            budget = ratelimit['remaining'] - max(reserve - int(v.get(API_COUNT_CONTROL, 0)), 0)
+            seconds_left = ratelimit['reset'] - time.time()
+        else:
+            #control requests are served from the reserve first - anything above it is taken from the poll budget
+            reserve = API_DAILY_LIMIT * API_CONTROL_RESERVE
+            control_overflow = max(int(v.get(API_COUNT_CONTROL, 0)) - reserve, 0)
+            budget = API_DAILY_LIMIT - reserve - int(v.get(API_COUNT_POLL, 0)) - control_overflow
+
+            now = dt_util.now()
+            seconds_left = (dt_util.start_of_local_day(now) + timedelta(days=1) - now).total_seconds()
+
+        #only devices the scheduler polls share the budget - LAN and push devices read the cloud now and then only
+        scheduler = entry_data.get(CONF_SCHEDULER, None)
+        polled = scheduler.devices if scheduler is not None else {device_cfg.get('device') for device_cfg in entry_data.get(CONF_DEVICES) or []}
+        lan = entry_data.get(CONF_LAN, None)
+        push = entry_data.get(CONF_PUSH, None)
+        devices = 0
+        for d in polled:
+            if lan is not None and lan.serves(d):
+                budget -= seconds_left / LAN_CLOUD_REFRESH
+            elif push is not None and push.connected and d in push.devices:
+                budget -= seconds_left / PUSH_POLL_INTERVAL
+            else:
+                devices += 1
+        devices = max(devices, 1)
+        if budget < devices:
+            _LOGGER.warning("%s - GoveeAPI_GetPlannedPollInterval: poll budget exhausted - next poll after daily reset in %s seconds", entry_id, int(seconds_left))
+            return math.ceil(seconds_left)
+
+        interval = math.ceil(seconds_left * devices / budget)
+        #_LOGGER.debug("%s - GoveeAPI_GetPlannedPollInterval: %s devices, %s requests left for %s seconds -> %s", entry_id, devices, budget, int(seconds_left), interval)
+        return interval
+    except Exception as e:
+        _LOGGER.error("%s - GoveeAPI_GetPlannedPollInterval: Failed: %s (%s.%s)", entry_id, str(e), e.__class__.__module__, type(e).__name__)
+        return 0
+
+async def async_GoveeAPI_Request(hass: HomeAssistant, entry_id: str, method: str, path: str, data=None):
+    """Async: Perform a request via the fastest healthy path to the device - falls back to the next path if one fails"""
+    entry_data=hass.data[DOMAIN][entry_id]
+    d=(data or {}).get('payload', {}).get('device', None)
+    lan=entry_data.get(CONF_LAN, None)
+    if d is None or lan is None or not lan.serves(d):
+        return await _async_GoveeAPI_CloudRequest(hass, entry_id, method, path, data)
+
+    router=entry_data.get(CONF_ROUTER, None)
+    if router is None:
+        router=entry_data[CONF_ROUTER]=GoveeAPIRouter(entry_id)
+    response=None
+    error=None
+    reason='fastest healthy path'
+    for route in router.routes(d, [ROUTE_LAN, ROUTE_CLOUD]):
+        started=time.monotonic()
+        try:
+            if route == ROUTE_LAN:
+                #served locally - no quota and no circuit breaker involved
+                r = await lan.async_request(path, data)
+                if r is None:
+                    #not covered by the LAN API - no health change
+                    reason='not covered by %s' % route
+                    continue
+            else:
+                r = await _async_GoveeAPI_CloudRequest(hass, entry_id, method, path, data)
+        except asyncio.CancelledError:
+            raise
+        except GoveeAPICircuitOpenError as e:
+            #the circuit breaker keeps track of the cloud health
+            error=e
+            reason='%s: %s' % (route, str(e))
+            continue
+        except Exception as e:
+            _LOGGER.debug("%s - async_GoveeAPI_Request: %s via %s failed: %s (%s.%s)", entry_id, d, route, str(e), e.__class__.__module__, type(e).__name__)
+            error=e
+            reason='%s: %s' % (route, str(e) or type(e).__name__)
+            router.record(d, route, None, reason)
+            continue
+
+        status=r[0]
+        if status == 429 or status >= 500:
+            response=r
+            reason='%s: status %s' % (route, status)
+            router.record(d, route, None, reason)
+            continue
+        router.record(d, route, time.monotonic() - started, reason)
+        return r
+
+    #no path succeeded - the cloud always answers or raises
+    if response is None:
+        raise error
+    return response
+
+async def _async_GoveeAPI_CloudRequest(hass: HomeAssistant, entry_id: str, method: str, path: str, data=None):
+    """Async: Perform a request via the GooveAPI transport of the entry"""
+    entry_data=hass.data[DOMAIN][entry_id]
+    transport=entry_data.get(CONF_TRANSPORT, None)
+    if transport is None:
+        transport=entry_data[CONF_TRANSPORT]=GoveeAPITransport(hass, entry_id)
+
+    breaker=entry_data.get(CONF_CIRCUIT, None)
+    if breaker is None:
+        breaker=entry_data[CONF_CIRCUIT]=GoveeAPICircuitBreaker(entry_id)
+    if not breaker.allow_request():
+        raise GoveeAPICircuitOpenError("circuit open - retry in %s seconds" % int(breaker.retry_in))
+
+    #only requests that are sent count against the daily limit
+    await async_GooveAPI_CountRequests(hass, entry_id, path)
+    try:
+        status, headers, text = await transport.async_request(method, path, data)
+    except asyncio.CancelledError:
+        breaker.release_probe()
+        raise
+    except Exception:
+        breaker.record_failure()
+        raise
+
+    ratelimit = GoveeAPI_GetRateLimit(headers)
+    if not ratelimit is None and not ratelimit == entry_data.get(CONF_RATELIMIT, None):
+        entry_data[CONF_RATELIMIT] = ratelimit
+        #remaining drops with every request - the sensors follow at the throttle interval
+        GoveeAPI_DispatchSignal(hass, entry_id, SIGNAL_RATELIMIT_UPDATED)
+
+    if status == 429 or status >= 500:
+        breaker.record_failure(GoveeAPI_GetRetryAfter(headers))
+    else:
+        #401 is an authentication failure - the cloud answered, so the circuit closes
+        breaker.record_success()
+    return status, headers, text
+
+async def async_GoveeAPI_GETRequest(hass: HomeAssistant, entry_id: str, path: str) -> None:
+    """Asnyc: Request device list via GooveAPI"""
+    try:
+        _LOGGER.debug("%s - async_GoveeAPI_GETRequest: perform api request", entry_id)
 
         #_LOGGER.debug("%s - async_GoveeAPI_GETRequest: extecute GET request"
-        await async_GooveAPI_CountRequests(hass, entry_id)
-        r = await hass.async_add_executor_job(lambda: requests.get(url,headers=headers,timeout=timeout))        
-        if r.status_code == 429:
+        status, headers, text = await async_GoveeAPI_Request(hass, entry_id, 'GET', path)
+        if status == 429:
             _LOGGER.error("%s - async_GoveeAPI_GETRequest: Too many API request - limit is 10000/Account/Day", entry_id)
             return None
-        elif r.status_code == 401:
+        elif status == 401:
             _LOGGER.error("%s - async_GoveeAPI_GETRequest: Unauthorize - check you APIKey", entry_id)
             return None
-        elif not r.status_code == 200:
-            _LOGGER.error("%s - async_GoveeAPI_GETRequest: Failed: %s", entry_id, str(r.text))
+        elif not status == 200:
+            _LOGGER.error("%s - async_GoveeAPI_GETRequest: Failed: %s", entry_id, str(text))
             return None
 
         _LOGGER.debug("%s - async_GoveeAPI_GETRequest: convert resulting json to object", entry_id)
-        return json.loads(r.text)['data']
+        return json.loads(text)['data']
 
+    except GoveeAPICircuitOpenError as e:
+        _LOGGER.debug("%s - async_GoveeAPI_GETRequest: skipped: %s", entry_id, str(e))
+        return None
     except Exception as e:
         _LOGGER.error("%s - async_GoveeAPI_GETRequest: Failed: %s (%s.%s)", entry_id, str(e), e.__class__.__module__, type(e).__name__)
         return None
@@ -125,74 +424,109 @@ async def async_GoveeAPI_POSTRequest(hass: HomeAssistant, entry_id: str, path: s
     """Asnyc: Perform post state request / control request via GooveAPI"""       
     try:           
         #_LOGGER.debug("%s - async_GoveeAPI_POSTRequest: perform api request", entry_id)
-        entry_data=hass.data[DOMAIN][entry_id]
-        
-        #_LOGGER.debug("%s - async_GoveeAPI_POSTRequest: perpare parameters for POST request"
-        headers={"Content-Type":"application/json",CLOUD_API_HEADER_KEY: str(entry_data[CONF_PARAMS].get(CONF_API_KEY, None))}
-        timeout=entry_data[CONF_PARAMS].get(CONF_TIMEOUT, None)
         data = re.sub('<dynamic_uuid>', str(uuid.uuid4()), data)
         _LOGGER.debug("%s - async_GoveeAPI_POSTRequest: data = %s", entry_id, data)
         data = json.loads(data)
-        url=CLOUD_API_URL_OPENAPI + '/' + path.strip("/")
 
         #_LOGGER.debug("%s - async_GoveeAPI_POSTRequest: extecute POST request"
-        await async_GooveAPI_CountRequests(hass, entry_id)
-        r = await hass.async_add_executor_job(lambda: requests.post(url,json=data,headers=headers,timeout=timeout))        
-        if r.status_code == 429:
+        status, headers, text = await async_GoveeAPI_Request(hass, entry_id, 'POST', path, data)
+        if status == 429:
             _LOGGER.error("%s - async_GoveeAPI_POSTRequest: Too many API request - limit is 10000/Account/Day", entry_id)
             if return_status_code == True:
-                return r.status_code
+                return status
             return None
-        elif r.status_code == 401:
+        elif status == 401:
             _LOGGER.error("%s - async_GoveeAPI_POSTRequest: Unauthorize - check you APIKey", entry_id)
             if return_status_code == True:
-                return r.status_code
+                return status
             return None
-        elif not r.status_code == 200:
-            _LOGGER.error("%s - async_GoveeAPI_POSTRequest: Failed status_code: %s", entry_id, str(r.text))
+        elif not status == 200:
+            _LOGGER.error("%s - async_GoveeAPI_POSTRequest: Failed status_code: %s", entry_id, str(text))
             if return_status_code == True:
-                return r.status_code
+                return status
             return None
 
         #_LOGGER.debug("%s - async_GoveeAPI_POSTRequest: convert resulting json to object", entry_id)
-        return json.loads(r.text)
+        return json.loads(text)
 
+    except GoveeAPICircuitOpenError as e:
+        _LOGGER.debug("%s - async_GoveeAPI_POSTRequest: skipped: %s", entry_id, str(e))
+        if return_status_code == True:
+            return 429
+        return None
     except Exception as e:
         _LOGGER.error("%s - async_GoveeAPI_POSTRequest: Failed: %s (%s.%s)", entry_id, str(e), e.__class__.__module__, type(e).__name__)
         return None
 
+def GoveeAPI_BuildRequest(device_cfg, state_capability=None) -> str:
+    """Return the json body of a device/state or - with a capability - device/control request"""
+    json_str='{"requestId": "<dynamic_uuid>","payload": {"sku": "' + str(device_cfg.get('sku')) + '","device": "' + str(device_cfg.get('device')) + '"'
+    if not state_capability is None:
+        json_str+=',"capability": ' + json.dumps(state_capability)
+    return json_str + '}}'
+
 async def async_GoveeAPI_GetDeviceState(hass: HomeAssistant, entry_id: str, device_cfg, return_status_code=False) -> None:
-    """Asnyc: Request and save state of device via GooveAPI"""
+    """Asnyc: Request and save state of device via GooveAPI - concurrent requests for a device share one fetch"""
     try:
         #_LOGGER.debug("%s - async_GoveeAPI_GetDeviceState: preparing values", entry_id)       
         entry_data=hass.data[DOMAIN][entry_id]
-        json_str='{"requestId": "<dynamic_uuid>","payload": {"sku": "' + str(device_cfg.get('sku')) + '","device": "' + str(device_cfg.get('device')) + '"}}'
-        r = None
+        d=device_cfg.get('device')
+        inflight=entry_data.setdefault(CONF_STATE_INFLIGHT, {})
+        fetch=inflight.get(d, None)
+        if fetch is None:
+            updated=entry_data.setdefault(CONF_STATE_UPDATED, {}).get(d, None)
+            if not updated is None and time.monotonic() - updated < STATE_FRESHNESS and d in entry_data.get(CONF_STATE, {}):
+                _LOGGER.debug("%s - async_GoveeAPI_GetDeviceState: reuse fresh state: %s", entry_id, d)
+                return True
+            fetch=inflight[d]={'task': hass.async_create_task(_async_GoveeAPI_FetchDeviceState(hass, entry_id, device_cfg)), 'waiters': 0}
+            fetch['task'].add_done_callback(lambda _: inflight.pop(d, None) if inflight.get(d, None) is fetch else None)
+        else:
+            _LOGGER.debug("%s - async_GoveeAPI_GetDeviceState: join running request: %s", entry_id, d)
     except Exception as e:
         _LOGGER.error("%s - async_GoveeAPI_GetDeviceState: preparing values failed: %s (%s.%s)", entry_id, str(e), e.__class__.__module__, type(e).__name__)
-        return False       
-        
+        return False
+
+    #shield the shared fetch - a cancelled caller must not cancel it for the others
+    fetch['waiters'] += 1
+    try:
+        r = await asyncio.shield(fetch['task'])
+    except asyncio.CancelledError:
+        #the last caller gave up (e.g. the coordinator timeout) - the request is cancelled instead of updating the state unnoticed
+        if fetch['waiters'] == 1 and not fetch['task'].done():
+            _LOGGER.debug("%s - async_GoveeAPI_GetDeviceState: cancel request without waiters: %s", entry_id, d)
+            fetch['task'].cancel()
+        raise
+    finally:
+        fetch['waiters'] -= 1
+    if isinstance(r, int) and not isinstance(r, bool) and not return_status_code == True:
+        return False
+    return r
+
+async def _async_GoveeAPI_FetchDeviceState(hass: HomeAssistant, entry_id: str, device_cfg):
+    """Asnyc: Request and save state of device via GooveAPI"""
     try:
-        debug_file=os.path.dirname(os.path.realpath(__file__))+STATE_DEBUG_FILENAME
-        if os.path.isfile(debug_file):
-            _LOGGER.debug("%s - async_GoveeAPI_GetDeviceState: load debug file: %s", entry_id, debug_file)
-            with open(debug_file, 'r') as stream:
-                payload = json.load(stream)
-                r=payload['data']['cloud_states'][device_cfg.get('device')]
+        #_LOGGER.debug("%s - async_GoveeAPI_GetDeviceState: preparing values", entry_id)       
+        entry_data=hass.data[DOMAIN][entry_id]
+        json_str=GoveeAPI_BuildRequest(device_cfg)
     except Exception as e:
-        _LOGGER.error("%s - async_GoveeAPI_GetDeviceState: debug file load failed: %s (%s.%s)", entry_id, str(e), e.__class__.__module__, type(e).__name__)
-        return False 
+        _LOGGER.error("%s - async_GoveeAPI_GetDeviceState: preparing values failed: %s (%s.%s)", entry_id, str(e), e.__class__.__module__, type(e).__name__)
+        return False       
         
     try:
-        if r is None:
-            r = await async_GoveeAPI_POSTRequest(hass,entry_id, 'device/state', json_str, return_status_code)
+        started = time.monotonic()
+        r = await async_GoveeAPI_POSTRequest(hass,entry_id, 'device/state', json_str, True)
+        if isinstance(r, dict):
             r = r['payload']
-        if isinstance(r, int) and return_status_code == True:
+        if isinstance(r, int):
             return r
-        if not isinstance(r, int):            
+        if not r is None:
             entry_data.setdefault(CONF_STATE, {})
             d=device_cfg.get('device')
-            entry_data[CONF_STATE][d] = r
+            state = GoveeAPIDeviceState(r)
+            if entry_data.get(CONF_STATE_PENDING, {}).get(d, None):
+                _GoveeAPI_ReconcileOptimisticState(entry_data, d, state, started)
+            entry_data[CONF_STATE][d] = state
+            entry_data.setdefault(CONF_STATE_UPDATED, {})[d] = time.monotonic()
             return True
         return False
         
@@ -200,78 +534,157 @@ async def async_GoveeAPI_GetDeviceState(hass: HomeAssistant, entry_id: str, devi
         _LOGGER.error("%s - async_GoveeAPI_GetDeviceState: Failed: %s (%s.%s)", entry_id, str(e), e.__class__.__module__, type(e).__name__)
         return False
 
-async def async_GoveeAPI_ControlDevice(hass: HomeAssistant, entry_id: str, device_cfg, state_capability, return_status_code=False) -> None:
-    """Asnyc: Trigger device action via GooveAPI"""
+async def async_GoveeAPI_ControlDevice(hass: HomeAssistant, entry_id: str, device_cfg, state_capability, return_status_code=False, notify=True) -> None:
+    """Asnyc: Trigger device action via GooveAPI - notify=False leaves publishing the confirmed capability to the caller"""
     try:
         #_LOGGER.debug("%s - async_GoveeAPI_ControlDevice: preparing values", entry_id)       
         entry_data=hass.data[DOMAIN][entry_id]
-        state_capability_json = json.dumps(state_capability)
-        json_str='{"requestId": "<dynamic_uuid>","payload": {"sku": "' + str(device_cfg.get('sku')) + '","device": "' + str(device_cfg.get('device')) + '","capability": ' + state_capability_json +'}}'
+        json_str=GoveeAPI_BuildRequest(device_cfg, state_capability)
         _LOGGER.debug("%s - async_GoveeAPI_ControlDevice: json_str = %s", entry_id, json_str) 
-        r = None
     except Exception as e:
         _LOGGER.error("%s - async_GoveeAPI_ControlDevice: preparing values failed: %s (%s.%s)", entry_id, str(e), e.__class__.__module__, type(e).__name__)
         return False     
 
-    try:
-        debug_file=os.path.dirname(os.path.realpath(__file__))+STATE_DEBUG_FILENAME
-        if os.path.isfile(debug_file):
-            _LOGGER.debug("%s - async_GoveeAPI_ControlDevice: create debug reply", entry_id)
-            state_capability['state'] = { "status" : "success" }
-            state_capability_json = json.dumps(state_capability)
-            r = json.loads('{"requestId": "debug-dummy", "msg": "success", "code": 200, "capability": '+ state_capability_json + '}')
-    except Exception as e:
-        _LOGGER.error("%s - async_GoveeAPI_GetDeviceState: debug reply failed: %s (%s.%s)", entry_id, str(e), e.__class__.__module__, type(e).__name__)
-        return False
+    optimistic_cap = None
+    if entry_data[CONF_PARAMS].get(CONF_OPTIMISTIC, DEFAULT_OPTIMISTIC):
+        optimistic_cap = GoveeAPI_SetOptimisticState(hass, entry_id, device_cfg, state_capability)
 
     try:
-        if r is None:
-            r = await async_GoveeAPI_POSTRequest(hass,entry_id, 'device/control', json_str, return_status_code)
+        r = await async_GoveeAPI_POSTRequest(hass,entry_id, 'device/control', json_str, return_status_code)
         _LOGGER.debug("%s - async_GoveeAPI_ControlDevice: r = %s", entry_id, r)
+        d=device_cfg.get('device')
         if isinstance(r, int) and return_status_code == True:
+            _GoveeAPI_ResolveOptimisticState(entry_data, d, optimistic_cap, False)
             return r
-        if not isinstance(r, int) and not r.get('capability',None) is None:
+        if isinstance(r, dict) and not r.get('capability',None) is None:
             entry_data.setdefault(CONF_STATE, {})
-            d=device_cfg.get('device')
             new_cap = r['capability']
-            v = new_cap.pop('value')
-            new_cap['state'] = { "value" : v }            
-            for cap in entry_data[CONF_STATE][d]['capabilities']:
-                if cap['type'] == new_cap['type'] and cap['instance'] == new_cap['instance']:                    
-                    entry_data[CONF_STATE][d]['capabilities'].remove(cap)
-                    entry_data[CONF_STATE][d]['capabilities'].append(new_cap)
-                    _LOGGER.debug("%s - async_GoveeAPI_ControlDevice: updated old capability state: %s", entry_id, cap)
-                    _LOGGER.debug("%s - async_GoveeAPI_ControlDevice: with new capability state: %s", entry_id, new_cap)
-                    return True
-        else:
+            new_cap = GoveeAPICapabilityState(new_cap['type'], new_cap['instance'], new_cap['value'])
+            cap = entry_data[CONF_STATE][d].update_capability(new_cap)
+            published = _GoveeAPI_ResolveOptimisticState(entry_data, d, optimistic_cap, True)
+            if not cap is None:
+                #all entities of the capability follow - the next poll diffs against the updated cache and would not notify them
+                if notify and not published:
+                    _GoveeAPI_NotifyCapabilities(entry_data, d, [(new_cap.type, new_cap.instance)])
+                _LOGGER.debug("%s - async_GoveeAPI_ControlDevice: updated old capability state: %s", entry_id, cap)
+                _LOGGER.debug("%s - async_GoveeAPI_ControlDevice: with new capability state: %s", entry_id, new_cap)
+                coordinator = entry_data.get(CONF_COORDINATORS, {}).get(d, None)
+                if coordinator is not None:
+                    coordinator.async_reset_poll_interval()
+                return True
+        elif isinstance(r, dict):
             _LOGGER.warning("%s - async_GoveeAPI_ControlDevice: unhandled api return = %s", entry_id, r)  
+            #the command may have been applied - the next state read confirms or rolls back
+            _GoveeAPI_DeferOptimisticState(entry_data, d, optimistic_cap)
+        else:
+            _GoveeAPI_ResolveOptimisticState(entry_data, d, optimistic_cap, False)
         return False
 
     except Exception as e:
         _LOGGER.error("%s - async_GoveeAPI_ControlDevice: Failed: %s (%s.%s)", entry_id, str(e), e.__class__.__module__, type(e).__name__)
+        _GoveeAPI_ResolveOptimisticState(entry_data, device_cfg.get('device'), optimistic_cap, False)
         return False
 
-def GoveeAPI_GetCachedStateValue(hass: HomeAssistant, entry_id: str, device_id, value_type, value_instance):
-    """Asnyc: Get value of a state from local cache"""
+def GoveeAPI_SetOptimisticState(hass: HomeAssistant, entry_id: str, device_cfg, state_capability) -> GoveeAPICapabilityState | None:
+    """Apply the target value of a control request to the cached state and publish it - returns the pending capability"""
     try:
-        #_LOGGER.debug("%s - async_GoveeAPI_GetCachedStateValue: preparing values", entry_id)       
         entry_data=hass.data[DOMAIN][entry_id]
-        capabilities = ((entry_data.get(CONF_STATE)).get(device_id)).get('capabilities',[])
-        value=None
+        d=device_cfg.get('device')
+        cap=GoveeAPICapabilityState(state_capability['type'], state_capability['instance'], state_capability['value'])
+        key=(cap.type, cap.instance)
+        old_cap = entry_data[CONF_STATE][d].update_capability(cap)
+        if old_cap is None:
+            return None
+        pending = entry_data.setdefault(CONF_STATE_PENDING, {}).setdefault(d, {})
+        #a newer command replaces the target - a rollback returns to the last confirmed state
+        previous = pending[key]['previous'] if key in pending else old_cap
+        pending[key] = {'cap': cap, 'previous': previous, 'done': None}
+        _LOGGER.debug("%s - GoveeAPI_SetOptimisticState: %s: %s pending", entry_id, d, key)
+        _GoveeAPI_NotifyCapabilities(entry_data, d, [key])
+        return cap
     except Exception as e:
-        _LOGGER.error("%s - async_GoveeAPI_GetCachedStateValue: Failed: %s (%s.%s)", entry_id, str(e), e.__class__.__module__, type(e).__name__)
+        _LOGGER.error("%s - GoveeAPI_SetOptimisticState: Failed: %s (%s.%s)", entry_id, str(e), e.__class__.__module__, type(e).__name__)
+        return None
+
+def _GoveeAPI_ResolveOptimisticState(entry_data, d, cap, confirmed: bool) -> bool:
+    """Confirm or roll back the pending capability of a control request and publish it - returns if it was published"""
+    if cap is None:
+        return False
+    key = (cap.type, cap.instance)
+    pending = entry_data.get(CONF_STATE_PENDING, {}).get(d, {})
+    p = pending.get(key, None)
+    if p is None or not p['cap'] is cap:
+        #resolved by a state read or replaced by a newer command
+        return False
+    del pending[key]
+    state = entry_data[CONF_STATE][d]
+    if not confirmed and state.get_capability(*key) is cap:
+        _LOGGER.debug("%s - _GoveeAPI_ResolveOptimisticState: roll back: %s", d, key)
+        state.update_capability(p['previous'])
+    _GoveeAPI_NotifyCapabilities(entry_data, d, [key])
+    return True
+
+def _GoveeAPI_DeferOptimisticState(entry_data, d, cap) -> None:
+    """Leave the pending capability of a control request to the next state read"""
+    if cap is None:
         return None
+    p = entry_data.get(CONF_STATE_PENDING, {}).get(d, {}).get((cap.type, cap.instance), None)
+    if not p is None and p['cap'] is cap:
+        p['done'] = time.monotonic()
+        coordinator = entry_data.get(CONF_COORDINATORS, {}).get(d, None)
+        if coordinator is not None:
+            coordinator.async_reset_poll_interval()
+
+def _GoveeAPI_ReconcileOptimisticState(entry_data, d, state: GoveeAPIDeviceState, started: float) -> None:
+    """Confirm pending capabilities a state read reports - keep the others unless the read is newer than the command"""
+    pending = entry_data[CONF_STATE_PENDING][d]
+    resolved = []
+    for key, p in list(pending.items()):
+        if state.get_value(*key) == p['cap'].value:
+            resolved.append(key)
+        elif not p['done'] is None and started > p['done']:
+            #the cloud did not apply the command
+            _LOGGER.debug("%s - _GoveeAPI_ReconcileOptimisticState: roll back: %s", d, key)
+            resolved.append(key)
+        else:
+            #the control response is outstanding - the read may predate the command
+            state.update_capability(p['cap'])
+    for key in resolved:
+        del pending[key]
+    if resolved:
+        _GoveeAPI_NotifyCapabilities(entry_data, d, resolved)
+
+def _GoveeAPI_NotifyCapabilities(entry_data, d, keys) -> None:
+    """Publish capabilities that changed outside a poll to the entities of a device"""
+    coordinator = entry_data.get(CONF_COORDINATORS, {}).get(d, None)
+    if coordinator is not None:
+        coordinator.async_notify_capabilities(keys)
+
+async def async_GoveeAPI_ControlDevicePipeline(hass: HomeAssistant, entry_id: str, device_cfg, stages) -> bool:
+    """Asnyc: Trigger multiple device actions via GooveAPI - capabilities of a stage are sent concurrently, stages in order"""
+    try:
+        result = False
+        changed = []
+        for stage in stages:
+            if not stage:
+                continue
+            _LOGGER.debug("%s - async_GoveeAPI_ControlDevicePipeline: %s: sending stage: %s", entry_id, device_cfg.get('device'), stage)
+            r = await asyncio.gather(*[async_GoveeAPI_ControlDevice(hass, entry_id, device_cfg, state_capability, notify=False) for state_capability in stage])
+            changed += [(state_capability['type'], state_capability['instance']) for state_capability, v in zip(stage, r) if v is True]
+            result = result or any(v is True for v in r)
+        #one notification for all confirmed capabilities - the entities write their state once
+        if changed:
+            _GoveeAPI_NotifyCapabilities(hass.data[DOMAIN][entry_id], device_cfg.get('device'), changed)
+        return result
+    except Exception as e:
+        _LOGGER.error("%s - async_GoveeAPI_ControlDevicePipeline: Failed: %s (%s.%s)", entry_id, str(e), e.__class__.__module__, type(e).__name__)
+        return False
 
+def GoveeAPI_GetCachedStateValue(hass: HomeAssistant, entry_id: str, device_id, value_type, value_instance):
+    """Asnyc: Get value of a state from local cache"""
     try:
         #_LOGGER.debug("%s - async_GoveeAPI_GetCachedStateValue: getting value: %s - %s", entry_id, value_type, value_instance)  
-        for cap in capabilities:
-            if cap['type'] == value_type and cap['instance'] == value_instance:
-                cap_state = cap.get('state',None)
-                if not cap_state == None:
-                    value = cap_state.get('value',cap_state.get(value_instance,None))
-        #_LOGGER.debug("%s - async_GoveeAPI_GetCachedStateValue: value: %s = %s", entry_id, value_instance, value)   
-        return value
+        return hass.data[DOMAIN][entry_id][CONF_STATE][device_id].get_value(value_type, value_instance)
     except Exception as e:
         _LOGGER.error("%s - async_GoveeAPI_GetCachedStateValue: Failed: %s (%s.%s)", entry_id, str(e), e.__class__.__module__, type(e).__name__)
         return None
-
@@ -0,0 +1,10 @@
+"""Test setup - the integration is imported with the Home Assistant stand-ins of the benchmarks if Home Assistant is not installed."""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks'))
+
+from fakes import install  # noqa: E402
+
+install()
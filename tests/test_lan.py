@@ -0,0 +1,200 @@
+"""LAN client against a local UDP responder that stands in for a Govee device."""
+
+from __future__ import annotations
+import asyncio
+import json
+import logging
+import socket
+import types
+
+import pytest
+
+from homeassistant.const import CONF_STATE
+from homeassistant.core import HomeAssistant
+
+from custom_components.goveelife import lan
+from custom_components.goveelife.const import DOMAIN
+from custom_components.goveelife.lan import GoveeAPILanClient, GoveeAPILanError, _lan_capabilities
+from custom_components.goveelife.state import GoveeAPIDeviceState
+
+ENTRY_ID = 'test'
+DEVICE = 'AA:BB:CC:DD:EE:FF:00:01'
+SKU = 'H6199'
+
+
+def _free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+class GoveeLanResponder(asyncio.DatagramProtocol):
+    """Answers scan and devStatus like a device and applies turn, brightness and colorwc commands."""
+
+    def __init__(self, reply_port: int, answer: bool = True, apply: bool = True) -> None:
+        self.reply_port = reply_port
+        self.answer = answer
+        self.apply = apply
+        self.received = []
+        self.status = {"onOff": 0, "brightness": 10, "color": {"r": 0, "g": 0, "b": 0}, "colorTemInKelvin": 0}
+
+    def connection_made(self, transport) -> None:
+        self.transport = transport
+
+    def _reply(self, cmd: str, data: dict) -> None:
+        self.transport.sendto(json.dumps({"msg": {"cmd": cmd, "data": data}}).encode(), ('127.0.0.1', self.reply_port))
+
+    def datagram_received(self, data: bytes, addr) -> None:
+        msg = json.loads(data)['msg']
+        self.received.append(msg)
+        cmd, payload = msg['cmd'], msg['data']
+        if cmd == 'scan':
+            self._reply('scan', {"ip": "127.0.0.1", "device": DEVICE, "sku": SKU})
+        elif cmd == 'devStatus':
+            if self.answer:
+                self._reply('devStatus', self.status)
+        elif self.apply and cmd == 'turn':
+            self.status['onOff'] = payload['value']
+        elif self.apply and cmd == 'brightness':
+            self.status['brightness'] = payload['value']
+        elif self.apply and cmd == 'colorwc':
+            self.status['color'] = payload['color']
+            self.status['colorTemInKelvin'] = payload['colorTemInKelvin']
+
+
+def _state() -> GoveeAPIDeviceState:
+    return GoveeAPIDeviceState({'sku': SKU, 'device': DEVICE, 'capabilities': [
+        {'type': 'devices.capabilities.online', 'instance': 'online', 'state': {'value': True}},
+        {'type': 'devices.capabilities.on_off', 'instance': 'powerSwitch', 'state': {'value': 0}},
+        {'type': 'devices.capabilities.range', 'instance': 'brightness', 'state': {'value': 10}},
+        {'type': 'devices.capabilities.toggle', 'instance': 'gradientToggle', 'state': {'value': 1}},
+    ]})
+
+
+def _control(instance: str, value, capability_type: str = 'devices.capabilities.color_setting') -> dict:
+    return {'requestId': 'test', 'payload': {'sku': SKU, 'device': DEVICE, 'capability': {'type': capability_type, 'instance': instance, 'value': value}}}
+
+
+def _run(scenario, **responder_kwargs):
+    """Run scenario(client, responder) with a started client that discovered the responder."""
+    async def main():
+        loop = asyncio.get_running_loop()
+        hass = HomeAssistant(loop)
+        hass.data[DOMAIN] = {ENTRY_ID: {CONF_STATE: {DEVICE: _state()}}}
+        listen_port, device_port = _free_port(), _free_port()
+        transport, responder = await loop.create_datagram_endpoint(lambda: GoveeLanResponder(listen_port, **responder_kwargs), local_addr=('127.0.0.1', device_port))
+        client = GoveeAPILanClient(hass, ENTRY_ID, multicast_address='127.0.0.1', scan_port=device_port, listen_port=listen_port, control_port=device_port)
+        try:
+            await client.async_start()
+            for _ in range(50):
+                if client.serves(DEVICE):
+                    break
+                await asyncio.sleep(0.01)
+            return await scenario(client, responder)
+        finally:
+            await client.async_stop()
+            transport.close()
+    return asyncio.run(main())
+
+
+@pytest.fixture(autouse=True)
+def _short_timeouts(monkeypatch):
+    monkeypatch.setattr(lan, 'LAN_TIMEOUT', 0.2)
+    monkeypatch.setattr(lan, 'LAN_CONFIRM_DELAY', 0.01)
+
+
+def test_scan_discovers_device():
+    async def scenario(client, responder):
+        return dict(client.devices), responder.received[0]
+    devices, scan = _run(scenario)
+    assert devices[DEVICE]['ip'] == '127.0.0.1'
+    assert devices[DEVICE]['sku'] == SKU
+    assert scan == {"cmd": "scan", "data": {"account_topic": "reserve"}}
+
+
+@pytest.mark.parametrize('instance, capability_type, value, command', [
+    ('powerSwitch', 'devices.capabilities.on_off', 1, {"cmd": "turn", "data": {"value": 1}}),
+    ('brightness', 'devices.capabilities.range', 150, {"cmd": "brightness", "data": {"value": 100}}),
+    ('colorRgb', 'devices.capabilities.color_setting', 0x123456, {"cmd": "colorwc", "data": {"color": {"r": 0x12, "g": 0x34, "b": 0x56}, "colorTemInKelvin": 0}}),
+    ('colorTemperatureK', 'devices.capabilities.color_setting', 4000, {"cmd": "colorwc", "data": {"color": {"r": 0, "g": 0, "b": 0}, "colorTemInKelvin": 4000}}),
+])
+def test_control_encodes_command_and_confirms_by_status(instance, capability_type, value, command):
+    async def scenario(client, responder):
+        r = await client.async_request('device/control', _control(instance, value, capability_type))
+        return r, responder.received
+    (status, headers, text), received = _run(scenario)
+    assert received[1] == command
+    assert received[2] == {"cmd": "devStatus", "data": {}}
+    assert status == 200
+    capability = json.loads(text)['capability']
+    assert capability['instance'] == instance
+    #the confirmed value is the one the device reports
+    assert capability['value'] == (100 if instance == 'brightness' else value)
+
+
+def test_control_not_applied_raises():
+    async def scenario(client, responder):
+        with pytest.raises(GoveeAPILanError):
+            await client.async_request('device/control', _control('brightness', 50, 'devices.capabilities.range'))
+    _run(scenario, apply=False)
+
+
+def test_control_without_status_reply_raises():
+    async def scenario(client, responder):
+        with pytest.raises(TimeoutError):
+            await client.async_request('device/control', _control('powerSwitch', 1, 'devices.capabilities.on_off'))
+    _run(scenario, answer=False)
+
+
+def test_control_not_covered_returns_none():
+    async def scenario(client, responder):
+        return await client.async_request('device/control', _control('gradientToggle', 1, 'devices.capabilities.toggle'))
+    assert _run(scenario) is None
+
+
+def test_state_overlays_status_on_cached_state():
+    async def scenario(client, responder):
+        #the first read is left to the cloud
+        assert await client.async_request('device/state', {'payload': {'device': DEVICE}}) is None
+        responder.status.update(onOff=1, brightness=42)
+        return await client.async_request('device/state', {'payload': {'device': DEVICE}})
+    status, headers, text = _run(scenario)
+    state = GoveeAPIDeviceState(json.loads(text)['payload'])
+    assert state.get_value('devices.capabilities.on_off', 'powerSwitch') == 1
+    assert state.get_value('devices.capabilities.range', 'brightness') == 42
+    assert state.get_value('devices.capabilities.toggle', 'gradientToggle') == 1
+
+
+def test_state_first_read_goes_to_cloud_right_after_boot(monkeypatch):
+    #the monotonic clock starts near zero on a freshly booted host
+    monkeypatch.setattr(lan, 'time', types.SimpleNamespace(monotonic=lambda: 1.0))
+    async def scenario(client, responder):
+        return await client.async_request('device/state', {'payload': {'device': DEVICE}})
+    assert _run(scenario) is None
+
+
+def test_state_without_status_reply_raises():
+    async def scenario(client, responder):
+        await client.async_request('device/state', {'payload': {'device': DEVICE}})
+        with pytest.raises(TimeoutError):
+            await client.async_request('device/state', {'payload': {'device': DEVICE}})
+    _run(scenario, answer=False)
+
+
+def test_status_without_color_keeps_color_unknown():
+    values = _lan_capabilities({"onOff": 1, "brightness": 80, "colorTemInKelvin": 3000})
+    assert values[('devices.capabilities.color_setting', 'colorRgb')] is None
+
+
+def test_listen_port_in_use_warns(caplog):
+    port = _free_port()
+    other = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    other.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    other.bind(('', port))
+    try:
+        client = GoveeAPILanClient(HomeAssistant(), ENTRY_ID, listen_port=port)
+        with caplog.at_level(logging.WARNING):
+            client._create_socket().close()
+        assert 'is used by another application' in caplog.text
+    finally:
+        other.close()
@@ -0,0 +1,189 @@
+"""Push client against a local MQTT broker stand-in that speaks the MQTT 3.1.1 subset paho needs."""
+
+from __future__ import annotations
+import asyncio
+import json
+import types
+
+import pytest
+
+pytest.importorskip('paho.mqtt.client')
+
+from homeassistant.const import CONF_API_KEY, CONF_PARAMS, CONF_STATE  # noqa: E402
+from homeassistant.core import HomeAssistant  # noqa: E402
+
+from custom_components.goveelife.const import CONF_COORDINATORS, DOMAIN, EVENT_PROPS_ID  # noqa: E402
+from custom_components.goveelife.push import GoveeAPIPushClient  # noqa: E402
+from custom_components.goveelife.state import GoveeAPIDeviceState  # noqa: E402
+
+ENTRY_ID = 'test'
+API_KEY = 'key'
+DEVICE = 'AA:BB:CC:DD:EE:FF:00:04'
+SKU = 'H7141'
+
+
+def _remaining_length(n: int) -> bytes:
+    out = bytearray()
+    while True:
+        n, digit = divmod(n, 128)
+        out.append(digit | (128 if n else 0))
+        if not n:
+            return bytes(out)
+
+
+class GoveeMqttBroker:
+    """Accepts one client - answers CONNECT, SUBSCRIBE and PINGREQ and publishes with QoS 0."""
+
+    def __init__(self) -> None:
+        self.subscribed = asyncio.Event()
+        self.topics = []
+        self._writer = None
+
+    async def async_start(self) -> int:
+        self._server = await asyncio.start_server(self._async_client, '127.0.0.1', 0)
+        return self._server.sockets[0].getsockname()[1]
+
+    async def async_stop(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def _async_read_packet(self, reader):
+        header = (await reader.readexactly(1))[0]
+        length, multiplier = 0, 1
+        while True:
+            digit = (await reader.readexactly(1))[0]
+            length += (digit & 127) * multiplier
+            multiplier *= 128
+            if not digit & 128:
+                break
+        return header, await reader.readexactly(length)
+
+    async def _async_client(self, reader, writer) -> None:
+        self._writer = writer
+        try:
+            while True:
+                header, body = await self._async_read_packet(reader)
+                kind = header >> 4
+                if kind == 1:
+                    #CONNECT - accepted
+                    writer.write(bytes([0x20, 2, 0, 0]))
+                elif kind == 8:
+                    #SUBSCRIBE - packet id, then topic filters with their QoS
+                    packet_id, filters = body[:2], body[2:]
+                    granted = bytearray()
+                    while filters:
+                        size = int.from_bytes(filters[:2], 'big')
+                        self.topics.append(filters[2:2 + size].decode())
+                        filters = filters[3 + size:]
+                        granted.append(0)
+                    writer.write(bytes([0x90]) + _remaining_length(2 + len(granted)) + packet_id + bytes(granted))
+                    self.subscribed.set()
+                elif kind == 12:
+                    writer.write(bytes([0xD0, 0]))
+                elif kind == 14:
+                    break
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def async_publish(self, topic: str, payload: dict) -> None:
+        topic = topic.encode()
+        body = len(topic).to_bytes(2, 'big') + topic + json.dumps(payload).encode()
+        self._writer.write(bytes([0x30]) + _remaining_length(len(body)) + body)
+        await self._writer.drain()
+
+
+class _Coordinator:
+    """Records what the push client publishes."""
+
+    def __init__(self) -> None:
+        self.notified = []
+        self.resets = 0
+
+    def async_notify_capabilities(self, keys) -> None:
+        self.notified.append(set(keys))
+
+    def async_reset_poll_interval(self) -> None:
+        self.resets += 1
+
+
+def _state() -> GoveeAPIDeviceState:
+    return GoveeAPIDeviceState({'sku': SKU, 'device': DEVICE, 'capabilities': [
+        {'type': 'devices.capabilities.online', 'instance': 'online', 'state': {'value': True}},
+        {'type': 'devices.capabilities.on_off', 'instance': 'powerSwitch', 'state': {'value': 1}},
+        {'type': 'devices.capabilities.range', 'instance': 'humidity', 'state': {'value': 55}},
+    ]})
+
+
+def _message(capabilities: list) -> dict:
+    return {'sku': SKU, 'device': DEVICE, 'deviceName': 'Nursery Humidifier', 'capabilities': capabilities}
+
+
+async def _async_wait(condition, timeout: float = 5) -> None:
+    for _ in range(int(timeout / 0.01)):
+        if condition():
+            return None
+        await asyncio.sleep(0.01)
+    raise AssertionError('condition not met')
+
+
+def test_push_applies_changes_and_notifies_changed_capabilities():
+    async def main():
+        hass = HomeAssistant(asyncio.get_running_loop())
+        events = []
+        hass.bus = types.SimpleNamespace(async_fire=lambda event_type, data: events.append((event_type, data)))
+        coordinator = _Coordinator()
+        hass.data[DOMAIN] = {ENTRY_ID: {CONF_PARAMS: {CONF_API_KEY: API_KEY}, CONF_STATE: {DEVICE: _state()}, CONF_COORDINATORS: {DEVICE: coordinator}}}
+        state = hass.data[DOMAIN][ENTRY_ID][CONF_STATE][DEVICE]
+
+        broker = GoveeMqttBroker()
+        port = await broker.async_start()
+        client = GoveeAPIPushClient(hass, ENTRY_ID, host='127.0.0.1', port=port, tls=False)
+        try:
+            await client.async_start()
+            await asyncio.wait_for(broker.subscribed.wait(), 5)
+            await _async_wait(lambda: client.connected)
+            assert broker.topics == ['GA/' + API_KEY]
+
+            #powerSwitch is unchanged - only humidity and the new event are published
+            await broker.async_publish('GA/' + API_KEY, _message([
+                {'type': 'devices.capabilities.on_off', 'instance': 'powerSwitch', 'state': {'value': 1}},
+                {'type': 'devices.capabilities.range', 'instance': 'humidity', 'state': {'value': 60}},
+                {'type': 'devices.capabilities.event', 'instance': 'lackWaterEvent', 'state': [{'name': 'lack', 'value': 1, 'message': 'Lack of Water'}]},
+            ]))
+            await _async_wait(lambda: coordinator.notified)
+            assert coordinator.notified == [{('devices.capabilities.range', 'humidity'), ('devices.capabilities.event', 'lackWaterEvent')}]
+            assert state.get_value('devices.capabilities.range', 'humidity') == 60
+            assert state.get_value('devices.capabilities.event', 'lackWaterEvent') == 1
+            assert state.get_capability('devices.capabilities.event', 'lackWaterEvent').as_dict()['state']['events'][0]['name'] == 'lack'
+            assert events[0][0] == EVENT_PROPS_ID
+            assert DEVICE in client.devices and coordinator.resets == 1
+
+            #a repeated message changes nothing - it is still fired on the event bus
+            await broker.async_publish('GA/' + API_KEY, _message([
+                {'type': 'devices.capabilities.range', 'instance': 'humidity', 'state': {'value': 60}},
+            ]))
+            await _async_wait(lambda: len(events) == 2)
+            assert len(coordinator.notified) == 1
+        finally:
+            await client.async_stop()
+            await broker.async_stop()
+
+    asyncio.run(main())
+
+
+def test_push_unknown_device_is_ignored():
+    async def main():
+        hass = HomeAssistant(asyncio.get_running_loop())
+        hass.bus = types.SimpleNamespace(async_fire=lambda event_type, data: None)
+        coordinator = _Coordinator()
+        hass.data[DOMAIN] = {ENTRY_ID: {CONF_PARAMS: {CONF_API_KEY: API_KEY}, CONF_STATE: {DEVICE: _state()}, CONF_COORDINATORS: {DEVICE: coordinator}}}
+        client = GoveeAPIPushClient(hass, ENTRY_ID)
+        client._async_handle_message(json.dumps(dict(_message([]), device='00:00')))
+        assert coordinator.notified == [] and client.devices == set()
+
+    asyncio.run(main())